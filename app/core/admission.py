@@ -0,0 +1,118 @@
+"""Admission control for booking requests, with no database work.
+
+Two checks run before a booking reaches the database:
+
+* Token buckets per user and per team. A bucket holds up to ``burst``
+  tokens and refills at ``rate`` tokens per second. A request without a
+  token is rejected with 429 and a ``Retry-After``. Only members are
+  charged to a team's bucket, so nobody can drain another team's.
+* An occupancy view of slots known to be full. It is fed with the committed
+  counts the booking engine publishes and with the capacity failures it
+  hits. Requests for such a slot fail fast with the same 409 the database
+  check would give.
+
+Like the principal cache, all of this is per worker. The view only ever
+under-reports occupancy, since bookings made by other workers are not seen,
+so it never rejects a request the database would accept. Entries older than
+``ADMISSION_OCCUPANCY_TTL_SECONDS`` are ignored, so a capacity raised on
+another worker takes effect here within that time.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+rejected_requests = metrics.counter("admission_rejected_total", "Booking requests rejected before reaching the database")
+
+class TokenBucketLimiter:
+    """Token buckets by key, least recently used beyond ``max_keys`` dropped (they'd be full anyway)."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict() # key -> (tokens, updated_at)
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token; return 0 on success, else the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class OccupancyView:
+    """Last seen booked count per (date, time slot), with the capacity it was seen under."""
+
+    def __init__(self, ttl_seconds: float, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._slots: Dict[Tuple[date, str], Tuple[int, int, float]] = {} # -> (booked, max_teams, seen_at)
+
+    def record(self, reservation_date: date, time_slot, booked_count: int, max_teams: int):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._slots) >= self.max_size:
+                self._slots = {key: entry for key, entry in self._slots.items() if now - entry[2] < self.ttl_seconds}
+            self._slots[(reservation_date, time_slot)] = (booked_count, max_teams, now)
+
+    def full_capacity(self, reservation_date: date, time_slot) -> Optional[int]:
+        """The capacity of the slot if it is known to be full, else None."""
+        with self._lock:
+            entry = self._slots.get((reservation_date, time_slot))
+        if entry is None:
+            return None
+        booked_count, max_teams, seen_at = entry
+        if time.monotonic() - seen_at >= self.ttl_seconds or booked_count < max_teams:
+            return None
+        return max_teams
+
+    def clear(self):
+        """Forget everything, e.g. after a capacity change."""
+        with self._lock:
+            self._slots.clear()
+
+user_limiter = TokenBucketLimiter(settings.ADMISSION_USER_RATE, settings.ADMISSION_USER_BURST)
+team_limiter = TokenBucketLimiter(settings.ADMISSION_TEAM_RATE, settings.ADMISSION_TEAM_BURST)
+occupancy = OccupancyView(settings.ADMISSION_OCCUPANCY_TTL_SECONDS)
+
+def reject(reason: str):
+    metrics.inc(rejected_requests, (("reason", reason),))
+
+def check_rate(user_id: int, team_id: Optional[int] = None):
+    """Take a token from the user's bucket and, if given, the team's, or raise 429."""
+    if not settings.ADMISSION_ENABLED:
+        return
+    buckets = [("user_rate", user_limiter, user_id)]
+    if team_id is not None:
+        buckets.append(("team_rate", team_limiter, team_id))
+    for reason, limiter, key in buckets:
+        wait = limiter.acquire(key)
+        if wait:
+            reject(reason)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many booking attempts. Please wait a moment and try again.",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
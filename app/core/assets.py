@@ -0,0 +1,133 @@
+"""Fingerprinted, precompressed static assets.
+
+The build step copies every JS/CSS file under ``app/static`` to
+``app/static/dist`` with a content hash in its name, next to ``.gz`` and
+``.br`` variants and a ``manifest.json``:
+
+    python -m app.core.assets
+
+Templates link assets through ``asset_url``, which resolves names through
+the manifest. Without a build it falls back to the plain files, so
+development works unchanged. Rerun the build after editing JS/CSS.
+``AssetFiles`` serves the hashed files with an immutable cache policy and
+picks the precompressed variant the client accepts.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+STATIC_DIR = Path("app/static")
+DIST_DIRNAME = "dist"
+STATIC_URL = "/static"
+FINGERPRINTED_SUFFIXES = {".js", ".css"}
+# Preferred first; the build writes a file per encoding
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def build(static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    """Write the fingerprinted and precompressed assets; return the manifest."""
+    try:
+        import brotli
+    except ImportError: # Optional; browsers fall back to the gzip variant
+        brotli = None
+
+    dist_dir = static_dir / DIST_DIRNAME
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+    for source in sorted(static_dir.rglob("*")):
+        if not source.is_file() or source.suffix not in FINGERPRINTED_SUFFIXES or dist_dir in source.parents:
+            continue
+        name = source.relative_to(static_dir).as_posix()
+        data = source.read_bytes()
+        hashed_name = f"{Path(name).with_suffix('')}.{_fingerprint(data)}{source.suffix}"
+        target = dist_dir / hashed_name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        # mtime=0 keeps the .gz output reproducible across builds
+        Path(f"{target}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            Path(f"{target}.br").write_bytes(brotli.compress(data, quality=11))
+        manifest[name] = f"{DIST_DIRNAME}/{hashed_name}"
+
+    (dist_dir / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+def load_manifest(static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    try:
+        return json.loads((static_dir / DIST_DIRNAME / "manifest.json").read_text())
+    except FileNotFoundError:
+        return {}
+
+manifest = load_manifest()
+
+def asset_url(name: str) -> str:
+    """URL of a static asset, fingerprinted if the build step has run."""
+    return f"{STATIC_URL}/{manifest.get(name, name)}"
+
+def _accepted_encodings(accept_encoding: str):
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that serves fingerprinted files precompressed and immutable."""
+
+    def is_fingerprinted(self, full_path) -> bool:
+        """Whether ``full_path`` is in the build output, judged from the static directory down only."""
+        for directory in self.all_directories:
+            try:
+                relative = Path(full_path).relative_to(os.path.realpath(directory))
+            except ValueError:
+                continue
+            return relative.parts[0] == DIST_DIRNAME
+        return False
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        if not self.is_fingerprinted(full_path):
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+            response.headers["Cache-Control"] = REVALIDATE
+        else:
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            media_type = mimetypes.guess_type(str(full_path))[0]
+            response = None
+            for encoding, suffix in ENCODINGS:
+                variant = f"{full_path}{suffix}"
+                if encoding in accepted and os.path.isfile(variant):
+                    response = FileResponse(variant, status_code=status_code, media_type=media_type, headers={"Content-Encoding": encoding})
+                    break
+            if response is None:
+                response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+            response.headers["Cache-Control"] = IMMUTABLE
+            response.headers["Vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+if __name__ == "__main__":
+    for name, hashed_name in build().items():
+        print(f"{name} -> {hashed_name}")
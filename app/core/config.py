@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +6,32 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    DB_MODE: Literal["sync", "async"] = "sync"
+    # SQLite connection profile, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KIB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_FOREIGN_KEYS: bool = True
+    # Connection pool per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_LOCK_RETRIES: int = 3
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: Optional[int] = None # Defaults to the number of CPUs
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    METRICS_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0
+    # Admission control for booking requests (token buckets refill per second)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_USER_RATE: float = 1.0
+    ADMISSION_USER_BURST: int = 5
+    ADMISSION_TEAM_RATE: float = 2.0
+    ADMISSION_TEAM_BURST: int = 10
+    ADMISSION_OCCUPANCY_TTL_SECONDS: float = 5.0
 
     class Config:
         env_file = ".env"
@@ -1,23 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, AsyncSessionLocal, is_lock_error, lock_retry_delay
 from app.core.config import settings
+from app.core.auth_cache import Principal, principal_cache
 from app.services import user_service
 from app.schemas.token import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Routers depend on get_db and hand the session to run_db, so the same
+# handlers serve both DB modes.
+get_db = get_async_db if settings.DB_MODE == "async" else get_sync_db
+
+@asynccontextmanager
+async def db_session():
+    """A session outside request scope, for long-lived responses that must not pin a pooled connection."""
+    if settings.DB_MODE == "async":
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+async def run_db(db, fn, *args, **kwargs):
+    """Call a sync service function ``fn(db, ...)`` without blocking the event loop.
+
+    AsyncSessions run it through ``run_sync`` so its I/O is awaited on the
+    async driver; plain Sessions run it in the threadpool. ``run_sync``
+    runs on the event loop thread, so lock retries of ``retry_on_lock``
+    functions are done here, waiting with ``asyncio.sleep``.
+    """
+    if isinstance(db, AsyncSession):
+        fn_once = getattr(fn, "without_retry", None)
+        if fn_once is None:
+            return await db.run_sync(fn, *args, **kwargs)
+        for attempt in range(settings.DB_LOCK_RETRIES + 1):
+            try:
+                return await db.run_sync(fn_once, *args, **kwargs)
+            except OperationalError as exc:
+                await db.rollback()
+                if not is_lock_error(exc) or attempt == settings.DB_LOCK_RETRIES:
+                    raise
+                await asyncio.sleep(lock_retry_delay(attempt))
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    return await authenticate(token, db)
+
+async def get_streaming_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Like get_current_user, but releases its session before the response starts streaming."""
+    async with db_session() as db:
+        return await authenticate(token, db)
+
+async def authenticate(token: str, db) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -31,7 +93,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = user_service.get_user_by_username(db, username=token_data.username)
-    if user is None:
+    principal = await run_db(db, user_service.get_principal, username=token_data.username)
+    if principal is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    principal_cache.put(token, principal, token_exp=payload["exp"])
+    return principal
@@ -0,0 +1,34 @@
+"""JSON responses for pre-assembled payloads.
+
+Endpoints that build plain dicts (see ``app.db.projections``) return them
+through ``FastJSONResponse`` and skip response-model validation. ``orjson``
+encodes dates, enums and UTF-8 natively; without it the standard library
+encoder produces the same output, more slowly.
+"""
+import enum
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError: # Optional; the stdlib fallback is byte-for-byte equivalent
+    orjson = None
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
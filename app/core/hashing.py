@@ -0,0 +1,115 @@
+"""Dedicated process pool for bcrypt work.
+
+bcrypt is CPU bound, so hashing in Starlette's shared threadpool lets a
+login burst starve every other endpoint. ``password_hasher`` runs hashing
+and verification in a size-limited process pool. It rejects work with
+503 once ``PASSWORD_HASH_MAX_PENDING`` jobs are already queued or running.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core import security
+from app.core.config import settings
+
+class PasswordHasherPool:
+    def __init__(self, max_workers: Optional[int], max_pending: int):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent login requests. Please try again shortly.",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(security.verify_and_update_password, password, hashed_password)
+
+    @property
+    def bulk_limit(self) -> int:
+        return max(1, min(self.max_workers, self.max_pending // 2))
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash a batch of passwords, blocking until done. Call from a worker thread.
+
+        Meant for admin bulk work (roster import). At most ``bulk_limit``
+        jobs are queued at a time, and they count towards ``pending``, so
+        a login waits behind at most one job per worker and always has at
+        least half of ``max_pending`` left.
+        """
+        hashes: List[Optional[str]] = [None] * len(passwords)
+        executor = self._get_executor()
+        queued = iter(enumerate(passwords))
+        in_flight = {}
+        try:
+            while True:
+                for index, password in islice(queued, self.bulk_limit - len(in_flight)):
+                    with self._lock:
+                        self.pending += 1
+                    in_flight[executor.submit(security.get_password_hash, password)] = index
+                if not in_flight:
+                    return hashes
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    with self._lock:
+                        self.pending -= 1
+                        self.completed += 1
+                    hashes[index] = future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            with self._lock:
+                self.pending -= len(in_flight)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+password_hasher = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
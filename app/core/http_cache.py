@@ -0,0 +1,22 @@
+"""Helpers for conditional GETs (ETag / If-None-Match)."""
+from typing import Optional
+
+from fastapi import Response, status
+
+# Authenticated payloads: browsers may keep them but must revalidate each time
+REVALIDATE = "private, no-cache"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def set_etag(response: Response, etag: str, cache_control: str = REVALIDATE):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
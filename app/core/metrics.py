@@ -0,0 +1,234 @@
+"""Request and SQL metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every HTTP request and labels it with the
+matched route template, never the raw path, so label cardinality stays
+bounded. ``instrument_engine`` hooks an engine's cursor events. Each
+statement is counted globally and against the request that issued it,
+tracked through a context variable that also follows the request into the
+threadpool and into ``run_sync``. Statements slower than ``SLOW_QUERY_MS``
+are logged to ``app.db.slow_query`` with their bound parameters redacted to
+their types.
+
+Every observation is a few dict updates under one lock, cheap enough to
+leave on. ``GET /metrics`` renders the registry for admins.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List] = {} # labels -> [bucket counts..., +Inf count, sum, count]
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 3)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in sorted(self._values.items())]
+        return lines
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+class RequestStats:
+    __slots__ = ("statements", "sql_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+class MetricsRegistry:
+    def __init__(self, slow_query_seconds: float):
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS)
+        self.request_statements = Histogram("http_request_sql_statements", "SQL statements issued per HTTP request", STATEMENT_COUNT_BUCKETS)
+        self.request_sql_duration = Histogram("http_request_sql_duration_seconds", "Time spent in SQL per HTTP request", LATENCY_BUCKETS)
+        self.statement_duration = Histogram("db_statement_duration_seconds", "SQL statement latency", SQL_LATENCY_BUCKETS)
+        self.slow_statements = Counter("db_slow_statements_total", "SQL statements slower than the slow query threshold")
+        self._counters: List[Counter] = []
+        self._gauges: List[Tuple[str, str, Callable[[], Dict[Labels, float]]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Register an application counter; increment it with ``inc``."""
+        counter = Counter(name, help)
+        with self._lock:
+            self._counters.append(counter)
+        return counter
+
+    def inc(self, counter: Counter, labels: Labels = (), amount: float = 1):
+        with self._lock:
+            counter.inc(labels, amount)
+
+    def add_gauge(self, name: str, help: str, collect: Callable[[], Dict[Labels, float]]):
+        """Register a gauge whose samples are collected at scrape time, replacing one of the same name."""
+        self._gauges = [gauge for gauge in self._gauges if gauge[0] != name] + [(name, help, collect)]
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        labels = (("method", method), ("route", route))
+        with self._lock:
+            self.request_duration.observe(seconds, labels + (("status", str(status)),))
+            self.request_statements.observe(stats.statements, labels)
+            self.request_sql_duration.observe(stats.sql_seconds, labels)
+
+    def observe_statement(self, statement: str, parameters, executemany: bool, seconds: float):
+        stats = _current_request.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_seconds += seconds
+        operation = statement.lstrip()[:6].upper()
+        with self._lock:
+            self.statement_duration.observe(seconds, (("operation", operation),))
+            if seconds >= self.slow_query_seconds:
+                self.slow_statements.inc((("operation", operation),))
+        if seconds >= self.slow_query_seconds:
+            slow_query_logger.warning(
+                "slow query (%.1f ms%s): %s params=%s",
+                seconds * 1000, ", executemany" if executemany else "", " ".join(statement.split()), redact(parameters),
+            )
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight HTTP requests being served",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+            ]
+            for metric in (self.request_duration, self.request_statements, self.request_sql_duration, self.statement_duration, self.slow_statements, *self._counters):
+                lines += metric.render()
+        for name, help, collect in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in sorted(collect().items())]
+        return "\n".join(lines) + "\n"
+
+def redact(parameters) -> str:
+    """Replace bound values by their type names; statements never log user data."""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (list, tuple, dict)):
+        return f"[{len(parameters)} rows of {redact(parameters[0])}]"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(f"<{type(value).__name__}>" for value in parameters) + ")"
+    return "<redacted>"
+
+metrics = MetricsRegistry(slow_query_seconds=settings.SLOW_QUERY_MS / 1000)
+
+def instrument_engine(engine, registry: MetricsRegistry = metrics):
+    """Time every cursor execution of a (sync) engine."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_start")
+        if starts:
+            registry.observe_statement(statement, parameters, executemany, time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("metrics_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. ``/api/admin/teams/{team_id}/members/{user_id}``.
+
+    ``include_router`` prefixes are part of the template: copied into
+    ``route.path`` by FastAPI versions that copy included routes, and kept
+    on the effective route context by those that include routers lazily
+    (where ``route.path`` is the path given to the decorator).
+    """
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path_format = getattr(context, "path_format", None) or getattr(scope.get("route"), "path", None)
+    if path_format is None:
+        # Mounted apps (static files) only leave their prefix behind
+        return f"{scope['root_path']}/{{path}}" if scope.get("root_path") else "unmatched"
+    return path_format
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; cheaper than BaseHTTPMiddleware and safe for streaming responses."""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        with self.registry._lock:
+            self.registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+            with self.registry._lock:
+                self.registry.in_flight -= 1
+            self.registry.observe_request(scope["method"], route_template(scope), status_code, elapsed, stats)
@@ -0,0 +1,132 @@
+"""Publish/subscribe channel for pushing live updates to connected clients.
+
+Services publish plain dicts after their transaction commits. The endpoint
+that streams them to browsers subscribes per channel. ``InProcessBroker``
+only reaches subscribers in the same worker process. With several workers,
+replace ``broker`` with a ``Broker`` backed by a local message broker
+(a Redis/NATS pub/sub or a unix socket relay) that implements the same
+methods.
+"""
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15.0
+
+# Sent in place of the messages a slow subscriber missed; the client
+# reloads its snapshot.
+RESYNC = {"type": "resync"}
+
+class Subscription:
+    """Messages for one subscriber, delivered to an asyncio queue on its loop."""
+
+    def __init__(self, broker: "Broker", channels: Set[str], loop: asyncio.AbstractEventLoop, max_size: int):
+        self.broker = broker
+        self.channels = channels
+        self._loop = loop
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_size)
+        self._overflowed = False
+
+    def deliver(self, message: dict):
+        """Hand a message over from any thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError: # The subscriber's loop is already closed
+            pass
+
+    def _put(self, message: dict):
+        if self._overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop everything queued and tell the client to reload instead
+            self._overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next message, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            message = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if message is RESYNC:
+            self._overflowed = False
+        return message
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+class Broker:
+    def publish(self, channel: str, message: dict) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        raise NotImplementedError
+
+class InProcessBroker(Broker):
+    """Fan-out to subscribers of this process. ``publish`` is thread-safe and never blocks."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def publish(self, channel: str, message: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Subscribe from a coroutine; messages are delivered to its running loop."""
+        subscription = Subscription(self, set(channels), asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+async def event_stream(channels: Iterable[str], keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+    """Subscribe to ``channels`` and format the messages as a text/event-stream body.
+
+    Starts with a ``ready`` event once the subscription is live, so clients
+    can load their snapshot without missing updates. Comment lines keep idle
+    connections open through proxies. Subscribing here rather than in the
+    endpoint ties the subscription to the life of the response.
+    """
+    async with broker.subscribe(channels) as subscription:
+        yield "event: ready\ndata: {}\n\n"
+        while True:
+            message = await subscription.get(timeout=keepalive)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {json.dumps(message, separators=(',', ':'))}\n\n"
+
+broker: Broker = InProcessBroker()
@@ -1,16 +1,30 @@
-from passlib.context import CryptContext
+import functools
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@functools.lru_cache(maxsize=None)
+def get_pwd_context():
+    """The bcrypt context, built on first use.
+
+    Hashing runs in the worker processes of ``app.core.hashing``, so the
+    server process itself never needs passlib.
+    """
+    from passlib.context import CryptContext
+
+    # Hashes made with a different cost factor are reported as needing an update
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    """Returns (is_valid, new_hash). new_hash is set when the stored hash predates the current policy."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
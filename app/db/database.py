@@ -1,11 +1,119 @@
-from sqlalchemy import create_engine
+import functools
+import random
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """PRAGMAs applied to every new SQLite connection."""
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    busy_timeout_ms: int = 5000
+    cache_size_kib: int = 65536
+    mmap_size: int = 268435456
+    foreign_keys: bool = True
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
+    def pragmas(self):
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}",
+            # A negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size=-{int(self.cache_size_kib)}",
+            f"PRAGMA mmap_size={int(self.mmap_size)}",
+            f"PRAGMA foreign_keys={'ON' if self.foreign_keys else 'OFF'}",
+        ]
+
+sqlite_profile = SQLiteProfile(
+    journal_mode=settings.SQLITE_JOURNAL_MODE,
+    synchronous=settings.SQLITE_SYNCHRONOUS,
+    busy_timeout_ms=settings.SQLITE_BUSY_TIMEOUT_MS,
+    cache_size_kib=settings.SQLITE_CACHE_SIZE_KIB,
+    mmap_size=settings.SQLITE_MMAP_SIZE,
+    foreign_keys=settings.SQLITE_FOREIGN_KEYS,
 )
+
+def apply_sqlite_profile(engine, profile: SQLiteProfile):
+    """Run the profile's PRAGMAs on every connection the engine opens."""
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in profile.pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+def _is_file_database(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+aiosqlite:")
+
+def _engine_options(url: str) -> dict:
+    if _is_file_database(url):
+        return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+    return {}
+
+def build_engine(url: str, profile: SQLiteProfile = sqlite_profile):
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **_engine_options(url))
+    if profile is not None and url.startswith("sqlite"):
+        apply_sqlite_profile(engine, profile)
+    return engine
+
+engine = build_engine(settings.DATABASE_URL)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+def is_lock_error(exc: OperationalError) -> bool:
+    message = str(exc.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+def lock_retry_delay(attempt: int) -> float:
+    return 0.05 * (2 ** attempt) * (1 + random.random())
+
+def retry_on_lock(fn):
+    """Retry a write service function ``fn(db, ...)`` when SQLite reports a lock
+    that outlasted busy_timeout. The session is rolled back before each retry.
+
+    The undecorated function is kept as ``wrapper.without_retry``, so that
+    ``run_db`` can retry on an AsyncSession with ``asyncio.sleep`` instead
+    of blocking the event loop between attempts."""
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        for attempt in range(settings.DB_LOCK_RETRIES + 1):
+            try:
+                return fn(db, *args, **kwargs)
+            except OperationalError as exc:
+                db.rollback()
+                if not is_lock_error(exc) or attempt == settings.DB_LOCK_RETRIES:
+                    raise
+                time.sleep(lock_retry_delay(attempt))
+    wrapper.without_retry = fn
+    return wrapper
+
+def async_database_url(url: str) -> str:
+    """Map a sync SQLite URL to its aiosqlite equivalent."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+# The async stack is only built when DB_MODE=async. The sync engine above
+# is still used for schema setup, migrations and scripts.
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **_engine_options(_async_url))
+    if _async_url.startswith("sqlite"):
+        apply_sqlite_profile(async_engine.sync_engine, sqlite_profile)
+    if settings.METRICS_ENABLED:
+        instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
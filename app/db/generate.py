@@ -0,0 +1,230 @@
+"""Generate a large synthetic dataset for benchmarks and query-plan testing.
+
+Rebuilds the database from scratch (like ``seed``) with:
+
+* an ``admin`` account (``adminpassword``) and ``--students`` students
+  ``student1..N`` (all ``password123``, sharing one precomputed hash)
+* ``--courses`` courses with ``--teams-per-course`` teams of
+  ``--team-size`` students each; every course draws its teams from a random
+  sample of the students, so most students are in several teams
+* ``--months`` months of reservations up to the end of the current month.
+  Slots are skewed towards lunch, weekdays and a few hot days and filled to
+  about ``--fill`` of ``--max-concurrent-teams``. Every booking rule holds:
+  one booking per team and day, no member in two reservations of the same
+  slot, and no slot over capacity.
+
+Rows go in through DBAPI ``executemany`` with explicit ids, in transactions
+of ``--chunk-size`` rows. The occupancy ledger and the usage rollups are
+filled to match.
+
+    python -m app.db.generate --students 20000 --courses 100 --teams-per-course 40 \\
+        --team-size 5 --months 12 --max-concurrent-teams 1000 --fill 0.9
+
+With these settings it builds about a million reservations.
+"""
+import argparse
+import calendar
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.db import migrations, models
+from app.db.database import engine, sqlite_profile
+from app.services import usage_service
+
+# Relative demand per time slot and weekday (Monday first)
+SLOT_WEIGHTS = {"MORNING": 0.35, "LUNCH": 1.0, "DINNER": 0.7}
+WEEKDAY_WEIGHTS = (1.0, 1.0, 0.95, 0.9, 0.75, 0.3, 0.25)
+HOT_DAY_SHARE = 0.05 # Share of days with a deadline-style demand spike
+HOT_DAY_FACTOR = 1.6
+
+def month_start(day: date, months_back: int) -> date:
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def _insert(conn, table: str, columns: Sequence[str], rows: List[tuple]):
+    if rows:
+        placeholders = ", ".join("?" for _ in columns)
+        conn.exec_driver_sql(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+def _chunked_insert(conn, table: str, columns: Sequence[str], rows: List[tuple], chunk_size: int):
+    for start in range(0, len(rows), chunk_size):
+        with conn.begin():
+            _insert(conn, table, columns, rows[start:start + chunk_size])
+
+def generate_reservations(
+    rng: random.Random,
+    teams: Dict[int, Tuple[int, ...]],
+    first_day: date,
+    last_day: date,
+    capacity: int,
+    fill: float,
+) -> Iterator[Tuple[date, str, int, Tuple[int, ...]]]:
+    """Yield (date, slot, team_id, participant_ids), one day at a time."""
+    team_ids = list(teams)
+    peak = max(SLOT_WEIGHTS.values()) * max(WEEKDAY_WEIGHTS)
+    day = first_day
+    while day <= last_day:
+        day_factor = WEEKDAY_WEIGHTS[day.weekday()]
+        if rng.random() < HOT_DAY_SHARE:
+            day_factor *= HOT_DAY_FACTOR
+        slots = list(SLOT_WEIGHTS.items())
+        rng.shuffle(slots)
+        wanted = {
+            slot: min(int(capacity * fill * weight * day_factor / peak * rng.uniform(0.85, 1.15)), capacity)
+            for slot, weight in slots
+        }
+        # Each team books at most one slot a day: deal out a random subset of
+        # the teams, with some slack for teams skipped over member conflicts
+        needed = sum(wanted.values())
+        available = rng.sample(team_ids, min(len(team_ids), needed + needed // 10 + 10))
+        for slot, _ in slots:
+            busy = set()
+            booked = 0
+            while booked < wanted[slot] and available:
+                team_id = available.pop()
+                members = [user_id for user_id in teams[team_id] if user_id not in busy]
+                if not members:
+                    continue
+                # Half to all of the free members take part
+                start = rng.randrange(len(members))
+                count = rng.randint(max(1, len(members) // 2), len(members))
+                participants = tuple((members[start:] + members[:start])[:count])
+                busy.update(participants)
+                booked += 1
+                yield day, slot, team_id, participants
+        day += timedelta(days=1)
+
+def generate(
+    students: int,
+    courses: int,
+    teams_per_course: int,
+    team_size: int,
+    months: int,
+    max_concurrent_teams: int,
+    fill: float,
+    chunk_size: int,
+    seed: int,
+) -> Dict[str, int]:
+    rng = random.Random(seed)
+    if teams_per_course * team_size > students:
+        raise ValueError("teams-per-course x team-size must not exceed the number of students")
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+
+    # One connection for the whole load. Without fsync and without the
+    # secondary indexes of the big tables (rebuilt in one pass at the end),
+    # inserts are several times faster; a crash mid-run just means rerunning.
+    bulk_indexes = [
+        index for table in (models.Reservation.__table__, models.ReservationParticipant.__table__)
+        for index in table.indexes
+    ]
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        conn.exec_driver_sql("PRAGMA journal_mode=OFF")
+        conn.commit()
+        with conn.begin():
+            for index in bulk_indexes:
+                index.drop(conn)
+
+        hashed = get_password_hash("password123")
+        users = [(1, "admin", "관리자", get_password_hash("adminpassword"), True)]
+        users += [(i + 1, f"student{i}", f"학생{i}", hashed, False) for i in range(1, students + 1)]
+        _chunked_insert(conn, "users", ("id", "username", "full_name", "password", "is_admin"), users, chunk_size)
+        student_ids = [row[0] for row in users[1:]]
+
+        course_rows = [(c, f"Course {c}") for c in range(1, courses + 1)]
+        team_rows, member_rows = [], []
+        teams: Dict[int, Tuple[int, ...]] = {}
+        for course_id, _ in course_rows:
+            enrolled = rng.sample(student_ids, teams_per_course * team_size)
+            for t in range(teams_per_course):
+                team_id = len(team_rows) + 1
+                team_rows.append((team_id, f"Course {course_id} Team {t + 1}", course_id))
+                teams[team_id] = tuple(enrolled[t * team_size:(t + 1) * team_size])
+                member_rows.extend((user_id, team_id) for user_id in teams[team_id])
+        _chunked_insert(conn, "courses", ("id", "name"), course_rows, chunk_size)
+        _chunked_insert(conn, "teams", ("id", "name", "course_id"), team_rows, chunk_size)
+        _chunked_insert(conn, "team_members", ("user_id", "team_id"), member_rows, chunk_size)
+        with conn.begin():
+            _insert(conn, "system_settings", ("key", "value", "version"), [("max_concurrent_teams", str(max_concurrent_teams), 1)])
+
+        today = date.today()
+        first_day = month_start(today, months - 1)
+        last_day = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+        occupancy: Dict[Tuple[date, str], int] = {}
+        reservations, participants = [], []
+        reservation_count = participant_count = 0
+
+        def flush():
+            with conn.begin():
+                _insert(conn, "reservations", ("id", "reservation_date", "time_slot", "team_id", "is_confirmed"), reservations)
+                _insert(conn, "reservation_participants", ("reservation_id", "user_id"), participants)
+            reservations.clear()
+            participants.clear()
+
+        for day, slot, team_id, participant_ids in generate_reservations(rng, teams, first_day, last_day, max_concurrent_teams, fill):
+            reservation_count += 1
+            reservations.append((reservation_count, day.isoformat(), slot, team_id, day < today))
+            participants.extend((reservation_count, user_id) for user_id in participant_ids)
+            participant_count += len(participant_ids)
+            occupancy[(day, slot)] = occupancy.get((day, slot), 0) + 1
+            if len(reservations) + len(participants) >= chunk_size:
+                flush()
+        flush()
+        _chunked_insert(
+            conn, "slot_occupancy", ("reservation_date", "time_slot", "booked_count"),
+            [(day.isoformat(), slot, count) for (day, slot), count in occupancy.items()], chunk_size,
+        )
+        with conn.begin():
+            for index in bulk_indexes:
+                index.create(conn)
+            conn.exec_driver_sql("PRAGMA analysis_limit=1000") # Sampled statistics are enough for the planner
+            conn.exec_driver_sql("ANALYZE")
+        with Session(bind=conn) as db:
+            usage_service.backfill(db)
+        conn.exec_driver_sql(f"PRAGMA journal_mode={sqlite_profile.journal_mode}")
+        conn.exec_driver_sql(f"PRAGMA synchronous={sqlite_profile.synchronous}")
+        conn.commit()
+
+    return {
+        "users": len(users),
+        "courses": len(course_rows),
+        "teams": len(team_rows),
+        "team_members": len(member_rows),
+        "reservations": reservation_count,
+        "reservation_participants": participant_count,
+        "slots": len(occupancy),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--teams-per-course", type=int, default=40)
+    parser.add_argument("--team-size", type=int, default=5)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--max-concurrent-teams", type=int, default=6)
+    parser.add_argument("--fill", type=float, default=0.8, help="Target share of slot capacity at peak demand")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per transaction")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate(
+        args.students, args.courses, args.teams_per_course, args.team_size, args.months,
+        args.max_concurrent_teams, args.fill, args.chunk_size, args.seed,
+    )
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        print(f"{table:<26} {count:>10,}")
+    print(f"Generated in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
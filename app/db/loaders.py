@@ -0,0 +1,32 @@
+"""Named eager-loading profiles, one per response schema.
+
+Each profile is a tuple of loader options to pass to ``Query.options(*profile)``
+so that serializing the schema never triggers a lazy load.
+"""
+from sqlalchemy.orm import selectinload
+
+from . import models
+
+# schemas.user.UserDetails: assigned_teams -> member_details
+USER_DETAILS = (
+    selectinload(models.User.teams)
+    .selectinload(models.TeamMember.team)
+    .selectinload(models.Team.members)
+    .selectinload(models.TeamMember.user),
+)
+
+# schemas.team.Team, TeamListing: member_details, in one IN query for any number of teams,
+# in user id order (the order_by of Team.members)
+TEAM = (
+    selectinload(models.Team.members).joinedload(models.TeamMember.user, innerjoin=True),
+)
+
+# schemas.user.MemberListing: assigned_teams, in one IN query for any number of users
+MEMBER = (
+    selectinload(models.User.teams).joinedload(models.TeamMember.team, innerjoin=True),
+)
+
+# schemas.reservation.Reservation: participants -> user
+RESERVATION = (
+    selectinload(models.Reservation.participants).selectinload(models.ReservationParticipant.user),
+)
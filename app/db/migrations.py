@@ -0,0 +1,162 @@
+"""Versioned, forward-only schema migrations.
+
+``Base.metadata.create_all`` creates missing tables but never changes
+existing ones, so anything added to a table after it was first created
+(indexes, constraints, columns) is shipped as a migration here as well.
+Fresh databases already get those objects from ``create_all``, so every
+migration must be idempotent (``IF NOT EXISTS`` and the like). Data that a
+new table derives from existing rows is filled in by a migration too.
+
+Applied versions are recorded in the ``schema_migrations`` table.
+``setup_schema`` creates the tables and applies pending migrations under an
+exclusive lock on ``<database file>.lock``, so several server workers
+starting at once don't run DDL against the same file concurrently; the
+ones that get the lock later find the schema current and do nothing. The
+app runs it on startup, or run it by hand with:
+
+    python -m app.db.migrations
+"""
+import contextlib
+import os
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+def _0001_booking_indexes(conn: Connection):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_reservations_date_slot ON reservations (reservation_date, time_slot)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_reservations_team_date ON reservations (team_id, reservation_date)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_reservation_participants_user_id ON reservation_participants (user_id, reservation_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_team_members_team_id ON team_members (team_id)"
+    ))
+
+def _0002_settings_version(conn: Connection):
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(system_settings)"))}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE system_settings ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+def _0003_usage_rollups(conn: Connection):
+    # create_all adds the rollup tables empty; count the bookings made before
+    # them. Written against the tables as they were at this version, not the
+    # live usage_service, so later changes there don't rewrite old upgrades.
+    # Nothing is archived yet on a database below version 3.
+    for table in ("team_month_usage", "course_month_usage", "user_month_usage"):
+        conn.execute(text(f"DELETE FROM {table}"))
+    conn.execute(text(
+        "INSERT INTO team_month_usage (team_id, month, time_slot, reservations) "
+        "SELECT team_id, strftime('%Y-%m', reservation_date), time_slot, COUNT(*) "
+        "FROM reservations GROUP BY team_id, strftime('%Y-%m', reservation_date), time_slot"
+    ))
+    conn.execute(text(
+        "INSERT INTO course_month_usage (course_id, month, reservations, participants) "
+        "SELECT teams.course_id, strftime('%Y-%m', r.reservation_date), COUNT(*), COALESCE(SUM(p.participants), 0) "
+        "FROM reservations AS r JOIN teams ON teams.id = r.team_id "
+        "LEFT JOIN (SELECT reservation_id, COUNT(*) AS participants FROM reservation_participants "
+        "GROUP BY reservation_id) AS p ON p.reservation_id = r.id "
+        "GROUP BY teams.course_id, strftime('%Y-%m', r.reservation_date)"
+    ))
+    conn.execute(text(
+        "INSERT INTO user_month_usage (user_id, month, participations) "
+        "SELECT p.user_id, strftime('%Y-%m', r.reservation_date), COUNT(*) "
+        "FROM reservation_participants AS p JOIN reservations AS r ON r.id = p.reservation_id "
+        "GROUP BY p.user_id, strftime('%Y-%m', r.reservation_date)"
+    ))
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "booking_indexes", _0001_booking_indexes),
+    Migration(2, "settings_version", _0002_settings_version),
+    Migration(3, "usage_rollups", _0003_usage_rollups),
+]
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+def upgrade(engine: Engine) -> List[Migration]:
+    """Apply every pending migration, each in its own transaction."""
+    applied = []
+    for migration in MIGRATIONS:
+        with engine.begin() as conn:
+            _ensure_version_table(conn)
+            done = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE version = :version"),
+                {"version": migration.version},
+            ).first()
+            if done:
+                continue
+            migration.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": migration.version, "name": migration.name},
+            )
+        applied.append(migration)
+    return applied
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on ``path`` (created if missing), blocking until it is free."""
+    with open(path, "a+b") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1) # Retries for about 10 seconds
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def setup_schema(engine: Engine) -> List[Migration]:
+    """Create missing tables and apply pending migrations, one process at a time."""
+    from app.db.database import Base
+    from app.db import models # noqa: F401 (registers the tables)
+
+    database = engine.url.database
+    if engine.url.get_backend_name() != "sqlite" or not database or database == ":memory:":
+        lock = contextlib.nullcontext()
+    else:
+        lock = file_lock(f"{database}.lock")
+    with lock:
+        Base.metadata.create_all(bind=engine)
+        return upgrade(engine)
+
+if __name__ == "__main__":
+    from app.db.database import engine
+
+    for migration in setup_schema(engine):
+        print(f"Applied migration {migration.version:04d} {migration.name}")
+    print(f"Schema is at version {current_version(engine)}")
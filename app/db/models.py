@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Boolean, Enum as PyEnum
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Boolean, Index, Enum as PyEnum, func, text
 from sqlalchemy.orm import relationship
 from .database import Base
 import enum
@@ -22,7 +22,7 @@ class Team(Base):
     name = Column(String, unique=True, index=True, nullable=False)
     course_id = Column(Integer, ForeignKey('courses.id'))
     course = relationship("Course")
-    members = relationship("TeamMember", back_populates="team")
+    members = relationship("TeamMember", back_populates="team", order_by="TeamMember.user_id")
 
     @property
     def member_details(self):
@@ -30,6 +30,7 @@ class Team(Base):
 
 class TeamMember(Base):
     __tablename__ = 'team_members'
+    __table_args__ = (Index('ix_team_members_team_id', 'team_id'),)
     user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
     team_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
     user = relationship("User", back_populates="teams")
@@ -47,6 +48,11 @@ class TimeSlot(str, enum.Enum):
 
 class Reservation(Base):
     __tablename__ = 'reservations'
+    __table_args__ = (
+        # A team may only hold one reservation per day
+        Index('uq_reservations_team_date', 'team_id', 'reservation_date', unique=True),
+        Index('ix_reservations_date_slot', 'reservation_date', 'time_slot'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey('teams.id'), nullable=False)
     reservation_date = Column(Date, nullable=False)
@@ -57,13 +63,105 @@ class Reservation(Base):
 
 class ReservationParticipant(Base):
     __tablename__ = 'reservation_participants'
+    __table_args__ = (Index('ix_reservation_participants_user_id', 'user_id', 'reservation_id'),)
     reservation_id = Column(Integer, ForeignKey('reservations.id'), primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
     reservation = relationship("Reservation", back_populates="participants")
     user = relationship("User")
 
+# Cold storage for closed months, moved over by archive_service. Same
+# columns and ids as the hot tables; no foreign keys, so rows can be
+# copied in any order.
+class ArchivedReservation(Base):
+    __tablename__ = 'reservations_archive'
+    __table_args__ = (Index('ix_reservations_archive_date_slot', 'reservation_date', 'time_slot'),)
+    id = Column(Integer, primary_key=True)
+    team_id = Column(Integer, nullable=False)
+    reservation_date = Column(Date, nullable=False)
+    time_slot = Column(PyEnum(TimeSlot), nullable=False)
+    is_confirmed = Column(Boolean, default=False)
+
+class ArchivedReservationParticipant(Base):
+    __tablename__ = 'reservation_participants_archive'
+    __table_args__ = (Index('ix_reservation_participants_archive_user_id', 'user_id', 'reservation_id'),)
+    reservation_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+
+class ArchivedMonth(Base):
+    # Months ("YYYY-MM") whose reservations live in the archive tables
+    __tablename__ = 'archived_months'
+    month = Column(String, primary_key=True)
+    reservations = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
+
+class SlotOccupancy(Base):
+    # Ledger of booked teams per (date, time slot), maintained by the booking engine
+    __tablename__ = 'slot_occupancy'
+    reservation_date = Column(Date, primary_key=True)
+    time_slot = Column(PyEnum(TimeSlot), primary_key=True)
+    booked_count = Column(Integer, nullable=False, default=0)
+
+class WaitlistStatus(str, enum.Enum):
+    WAITING = "WAITING"
+    PROMOTED = "PROMOTED"
+    DROPPED = "DROPPED"
+
+class WaitlistEntry(Base):
+    # A team queued for a full slot; promoted to a reservation first come,
+    # first served when the slot gains a seat
+    __tablename__ = 'waitlist_entries'
+    __table_args__ = (
+        Index('ix_waitlist_entries_slot', 'reservation_date', 'time_slot', 'status', 'id'),
+        # A team waits at most once per slot
+        Index('uq_waitlist_entries_waiting', 'team_id', 'reservation_date', 'time_slot', unique=True, sqlite_where=text("status = 'WAITING'")),
+    )
+    id = Column(Integer, primary_key=True)
+    team_id = Column(Integer, ForeignKey('teams.id'), nullable=False)
+    reservation_date = Column(Date, nullable=False)
+    time_slot = Column(PyEnum(TimeSlot), nullable=False)
+    requested_by = Column(Integer, ForeignKey('users.id'), nullable=False)
+    participant_ids = Column(String, nullable=False) # Comma-separated user ids
+    status = Column(PyEnum(WaitlistStatus), nullable=False, default=WaitlistStatus.WAITING)
+    reservation_id = Column(Integer, ForeignKey('reservations.id'))
+    detail = Column(String) # Why the entry was dropped
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+# Usage rollups, maintained in the booking transaction by usage_service.
+# Months are "YYYY-MM"; each table is indexed by month for the admin reports.
+class TeamMonthUsage(Base):
+    __tablename__ = 'team_month_usage'
+    __table_args__ = (Index('ix_team_month_usage_month', 'month'),)
+    team_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
+    month = Column(String, primary_key=True)
+    time_slot = Column(PyEnum(TimeSlot), primary_key=True)
+    reservations = Column(Integer, nullable=False, default=0)
+
+class CourseMonthUsage(Base):
+    __tablename__ = 'course_month_usage'
+    __table_args__ = (Index('ix_course_month_usage_month', 'month'),)
+    course_id = Column(Integer, ForeignKey('courses.id'), primary_key=True)
+    month = Column(String, primary_key=True)
+    reservations = Column(Integer, nullable=False, default=0)
+    participants = Column(Integer, nullable=False, default=0)
+
+class UserMonthUsage(Base):
+    __tablename__ = 'user_month_usage'
+    __table_args__ = (Index('ix_user_month_usage_month', 'month', 'participations'),)
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    month = Column(String, primary_key=True)
+    participations = Column(Integer, nullable=False, default=0)
+
+class DataVersion(Base):
+    # Version stamps of cached reads, e.g. "month:2026-11" or "date:2026-11-03",
+    # bumped in the same transaction as the writes they cover
+    __tablename__ = 'data_versions'
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 class SystemSettings(Base):
     __tablename__ = 'system_settings'
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String, unique=True, nullable=False)
     value = Column(String, nullable=False)
+    # Bumped on every write so cached copies can detect changes cheaply
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,38 @@
+"""Count the SQL statements an engine executes, to catch N+1 regressions.
+
+    with assert_max_queries(engine, 3):
+        client.get("/api/auth/users/me", headers=headers)
+"""
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryCounter:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+@contextmanager
+def assert_max_queries(engine: Engine, max_count: int):
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > max_count:
+        raise AssertionError(
+            f"Expected at most {max_count} SQL statements, got {counter.count}:\n" + "\n".join(counter.statements)
+        )
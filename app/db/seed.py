@@ -1,10 +1,9 @@
 import random
 from sqlalchemy.orm import Session
 
+from app.core.security import get_password_hash
 from app.db.database import SessionLocal, engine, Base
 from app.db import models
-from app.schemas.user import UserCreate
-from app.services.user_service import create_user
 
 def seed_data():
     db = SessionLocal()
@@ -15,41 +14,30 @@ def seed_data():
 
     print("Creating initial data...")
 
+    # Everything is flushed in bulk and committed once at the end; for
+    # production-sized datasets use ``python -m app.db.generate``.
+
     # 1. Create Admin User
-    admin_user = UserCreate(username="admin", full_name="관리자", password="adminpassword")
-    create_user(db, admin_user)
+    db.add(models.User(username="admin", full_name="관리자", password=get_password_hash("adminpassword"), is_admin=True))
 
-    # 2. Create Student Users
-    students = []
-    for i in range(1, 16):
-        student_user = UserCreate(username=f"student{i}", full_name=f"학생{i}", password="password123")
-        created_student = create_user(db, student_user)
-        students.append(created_student)
+    # 2. Create Student Users (all share one password, so hash it once)
+    student_hash = get_password_hash("password123")
+    students = [models.User(username=f"student{i}", full_name=f"학생{i}", password=student_hash) for i in range(1, 16)]
+    db.add_all(students)
 
     # 3. Create Courses
     course_names = ["소프트웨어공학", "인공지능개론", "데이터베이스"]
-    courses = []
-    for name in course_names:
-        course = models.Course(name=name)
-        db.add(course)
-        db.commit()
-        db.refresh(course)
-        courses.append(course)
+    courses = [models.Course(name=name) for name in course_names]
+    db.add_all(courses)
+    db.flush()
 
     # 4. Create Teams
-    teams = []
-    team_count = 1
-    for course in courses:
-        for i in range(1, 4):
-            team = models.Team(name=f"{course.name} {i}팀", course_id=course.id)
-            db.add(team)
-            db.commit()
-            db.refresh(team)
-            teams.append(team)
+    teams = [models.Team(name=f"{course.name} {i}팀", course_id=course.id) for course in courses for i in range(1, 4)]
+    db.add_all(teams)
+    db.flush()
 
     # 5. Create System Settings
     db.add(models.SystemSettings(key="max_concurrent_teams", value="6"))
-    db.commit()
 
     # 5. Assign members to teams
     random.seed(42) # for reproducible results
@@ -76,7 +64,7 @@ def seed_data():
                 team_member = models.TeamMember(user_id=student.id, team_id=team.id)
                 db.add(team_member)
                 team_compositions[team.name].append(student.username)
-            db.commit()
+    db.commit()
 
     print("--- Initial Data Created Successfully ---")
     print("\n[Admin Account]")
@@ -1,26 +1,87 @@
+"""Application factory.
+
+Importing this module has no side effects. ``create_app`` builds the app,
+and its lifespan sets up the schema (once across workers, see
+``migrations.setup_schema``) and warms the caches before traffic is
+accepted. ``app`` is created on first access, so both of these work:
+
+    uvicorn app.main:app --workers 4
+    uvicorn app.main:create_app --factory
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from app.db.database import engine
-from app.db import models
-from app.routers import auth, student, admin, pages # import pages router
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
 
-# Create all database tables
-models.Base.metadata.create_all(bind=engine)
+startup_logger = logging.getLogger("app.startup")
 
-# Initialize FastAPI app
-app = FastAPI()
+def _prepare():
+    from app.db import migrations
+    from app.db.database import SessionLocal, engine
+    from app.services import reservation_service
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    # Bring the database up to the current schema version
+    migrations.setup_schema(engine)
+    db = SessionLocal()
+    try:
+        reservation_service.warm_caches(db)
+    finally:
+        db.close()
 
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(student.router, prefix="/api/student", tags=["student"])
-app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
-app.include_router(pages.router) # include pages router
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.hashing import password_hasher
 
-@app.get("/")
-def read_root():
-    # Redirect to login page by default
+    started = time.perf_counter()
+    await run_in_threadpool(_prepare)
+    app.state.startup_seconds = time.perf_counter() - started
+    startup_logger.info("Schema and caches ready in %.1f ms", app.state.startup_seconds * 1000)
+    yield
+    # Stop the hashing worker processes so they don't outlive the server
+    password_hasher.shutdown()
+
+def create_app() -> FastAPI:
     from fastapi.responses import RedirectResponse
-    return RedirectResponse(url="/login")
+
+    from app.core.assets import AssetFiles
+    from app.core.hashing import password_hasher
+    from app.core.metrics import MetricsMiddleware, metrics
+    from app.core.pubsub import broker
+    from app.routers import auth, student, admin, pages, metrics as metrics_router
+
+    app = FastAPI(lifespan=lifespan)
+
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        metrics.add_gauge(
+            "password_hash_jobs", "Password hashing jobs by state",
+            lambda: {(("state", key),): value for key, value in password_hasher.stats().items() if key in ("pending", "completed", "rejected")},
+        )
+        metrics.add_gauge("availability_stream_subscribers", "Open live availability streams", lambda: {(): broker.subscriber_count()})
+
+    # Mount static files (fingerprinted builds are served precompressed and immutable)
+    app.mount("/static", AssetFiles(directory="app/static"), name="static")
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+    app.include_router(student.router, prefix="/api/student", tags=["student"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+    app.include_router(pages.router) # include pages router
+    app.include_router(metrics_router.router)
+
+    @app.get("/")
+    def read_root():
+        # Redirect to login page by default
+        return RedirectResponse(url="/login")
+
+    return app
+
+def __getattr__(name: str):
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
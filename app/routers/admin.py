@@ -1,41 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from datetime import date
 
-from app.core.dependencies import get_db, get_current_user
-from app.services import admin_service
-from app.schemas import course as course_schema, team as team_schema, user as user_schema, setting as setting_schema, reservation as reservation_schema
+from app.core.dependencies import get_db, get_current_user, run_db
+from app.core.auth_cache import Principal
+from app.core.hashing import password_hasher
+from app.db.database import SessionLocal, is_lock_error
+from app.core.fast_json import FastJSONResponse
+from app.core.http_cache import etag_matches, not_modified, set_etag
+from app.services import admin_service, reservation_service, roster_service, settings_service, usage_service, version_service
+from app.schemas import course as course_schema, team as team_schema, user as user_schema, setting as setting_schema, reservation as reservation_schema, roster as roster_schema, usage as usage_schema
 
 router = APIRouter()
 
-def get_current_admin_user(current_user: user_schema.User = Depends(get_current_user)):
+def get_current_admin_user(current_user: Principal = Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
     return current_user
 
 # ... existing admin routes for courses and teams ...
 @router.post("/courses", response_model=course_schema.Course, dependencies=[Depends(get_current_admin_user)])
-def create_course(course: course_schema.CourseCreate, db: Session = Depends(get_db)):
-    return admin_service.create_course(db=db, course=course)
+async def create_course(course: course_schema.CourseCreate, db: Session = Depends(get_db)):
+    return await run_db(db, admin_service.create_course, course=course)
 
 @router.post("/teams", response_model=team_schema.Team, dependencies=[Depends(get_current_admin_user)])
-def create_team(team: team_schema.TeamBase, course_id: int, db: Session = Depends(get_db)):
-    return admin_service.create_team(db=db, team=team, course_id=course_id)
+async def create_team(team: team_schema.TeamBase, course_id: int, db: Session = Depends(get_db)):
+    return await run_db(db, admin_service.create_team, team=team, course_id=course_id)
 
 @router.post("/teams/{team_id}/members/{user_id}", dependencies=[Depends(get_current_admin_user)])
-def add_team_member(team_id: int, user_id: int, db: Session = Depends(get_db)):
-    return admin_service.add_team_member(db=db, team_id=team_id, user_id=user_id)
+async def add_team_member(team_id: int, user_id: int, db: Session = Depends(get_db)):
+    return await run_db(db, admin_service.add_team_member, team_id=team_id, user_id=user_id)
+
+@router.get("/courses", response_model=course_schema.CoursePage, dependencies=[Depends(get_current_admin_user)])
+async def list_courses(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = None,
+    member_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """Courses with team and member counts, paged; pass the returned next_cursor to continue."""
+    return await run_db(db, admin_service.get_courses_page, limit=limit, cursor=cursor, member_id=member_id)
+
+@router.get("/teams", response_model=team_schema.TeamPage, dependencies=[Depends(get_current_admin_user)])
+async def list_teams(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = None,
+    course_id: Optional[int] = None,
+    member_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """Teams with their members, paged, optionally filtered by course and/or member."""
+    return await run_db(db, admin_service.get_teams_page, limit=limit, cursor=cursor, course_id=course_id, member_id=member_id)
+
+@router.get("/members", response_model=user_schema.MemberPage, dependencies=[Depends(get_current_admin_user)])
+async def list_members(
+    limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[int] = None,
+    course_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """Team members with their teams, paged, optionally filtered by course and/or team."""
+    return await run_db(db, admin_service.get_members_page, limit=limit, cursor=cursor, course_id=course_id, team_id=team_id)
+
+@router.post("/roster/import", response_model=roster_schema.RosterImportResult, dependencies=[Depends(get_current_admin_user)])
+async def import_roster(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson", "json"]] = None,
+):
+    """Bulk upsert users, courses, teams and memberships from a CSV/NDJSON/JSON roster."""
+    fmt = format or roster_service.roster_format(file.filename or "")
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Cannot tell the roster format from the file name; pass ?format=")
+
+    # The import waits on the hashing pool, so it runs in the threadpool on
+    # its own sync session in both DB modes, never on the event loop.
+    def run_import():
+        with SessionLocal() as db:
+            try:
+                return roster_service.import_roster(db, roster_service.read_roster(file.file, fmt))
+            except OperationalError as exc:
+                if not is_lock_error(exc):
+                    raise
+                # Batches before the locked one are committed; the import is an upsert, so it can be re-run
+                raise HTTPException(
+                    status_code=503, detail="The database is busy; try the import again", headers={"Retry-After": "1"},
+                )
+
+    return await run_in_threadpool(run_import)
 
 # New routes for settings and reservation viewing
 @router.get("/settings", response_model=List[setting_schema.Setting], dependencies=[Depends(get_current_admin_user)])
-def get_settings(db: Session = Depends(get_db)):
-    return admin_service.get_settings(db)
+async def get_settings(request: Request, response: Response, db: Session = Depends(get_db)):
+    version = await run_db(db, settings_service.registry.version)
+    etag = f'"settings.{version}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await run_db(db, admin_service.get_settings)
 
 @router.put("/settings", response_model=setting_schema.Setting, dependencies=[Depends(get_current_admin_user)])
-def update_setting(setting: setting_schema.Setting, db: Session = Depends(get_db)):
-    return admin_service.update_setting(db=db, setting=setting)
+async def update_setting(setting: setting_schema.Setting, db: Session = Depends(get_db)):
+    updated = setting_schema.Setting.model_validate(await run_db(db, admin_service.update_setting, setting=setting))
+    if setting.key == "max_concurrent_teams":
+        # Raised capacity frees seats for queued teams
+        await run_db(db, reservation_service.promote_waitlist)
+    return updated
 
 @router.get("/reservations-by-date", response_model=List[reservation_schema.Reservation], dependencies=[Depends(get_current_admin_user)])
-def get_reservations_by_date(reservation_date: date, db: Session = Depends(get_db)):
-    return admin_service.get_reservations_by_date(db=db, reservation_date=reservation_date)
+async def get_reservations_by_date(request: Request, reservation_date: date, db: Session = Depends(get_db)):
+    etag = await run_db(db, version_service.reservations_etag, scope=version_service.date_scope(reservation_date))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response = FastJSONResponse(await run_db(db, admin_service.get_reservations_by_date, reservation_date=reservation_date))
+    set_etag(response, etag)
+    return response
+
+@router.get("/reservations", response_model=reservation_schema.ReservationPage, dependencies=[Depends(get_current_admin_user)])
+async def get_reservations_in_range(
+    start_date: date,
+    end_date: date,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Reservations between two dates, paged; pass the returned next_cursor to continue."""
+    page = await run_db(db, admin_service.get_reservations_page, start_date=start_date, end_date=end_date, limit=limit, cursor=cursor)
+    return FastJSONResponse(page)
+
+@router.get("/reservations/export", dependencies=[Depends(get_current_admin_user)])
+async def export_reservations(start_date: date, end_date: date, format: Literal["csv", "ndjson"] = "csv"):
+    """Download the reservations between two dates as CSV or NDJSON, streamed."""
+    admin_service.check_date_range(start_date, end_date)
+
+    # The export owns its session for as long as it streams. StreamingResponse
+    # iterates this sync generator in the threadpool, on the sync engine in
+    # both DB modes.
+    def stream():
+        with SessionLocal() as db:
+            yield from admin_service.export_reservations(db, start_date, end_date, format)
+
+    filename = f"reservations_{start_date.isoformat()}_{end_date.isoformat()}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=admin_service.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Monthly usage, read from the rollup tables
+@router.get("/usage/courses", response_model=List[usage_schema.CourseUsage], dependencies=[Depends(get_current_admin_user)])
+async def get_course_usage(year: int = Query(..., ge=1, le=9999), month: int = Query(..., ge=1, le=12), db: Session = Depends(get_db)):
+    return await run_db(db, usage_service.get_course_usage, year=year, month=month)
+
+@router.get("/usage/teams", response_model=List[usage_schema.TeamUsage], dependencies=[Depends(get_current_admin_user)])
+async def get_team_usage(year: int = Query(..., ge=1, le=9999), month: int = Query(..., ge=1, le=12), course_id: Optional[int] = None, db: Session = Depends(get_db)):
+    return await run_db(db, usage_service.get_team_usage, year=year, month=month, course_id=course_id)
+
+@router.get("/usage/users", response_model=List[usage_schema.UserUsage], dependencies=[Depends(get_current_admin_user)])
+async def get_user_usage(year: int = Query(..., ge=1, le=9999), month: int = Query(..., ge=1, le=12), limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    return await run_db(db, usage_service.get_user_usage, year=year, month=month, limit=limit)
+
+@router.get("/password-hashing/stats", dependencies=[Depends(get_current_admin_user)])
+def get_password_hashing_stats():
+    return password_hasher.stats()
@@ -6,27 +6,38 @@ from datetime import timedelta
 from app.schemas import user as user_schema, token as token_schema
 from app.services import user_service
 from app.core import security
-from app.core.dependencies import get_db, get_current_user
+from app.core.hashing import password_hasher
+from app.core.dependencies import get_db, get_current_user, run_db
+from app.core.auth_cache import Principal
 from app.core.config import settings
 
 router = APIRouter()
 
+# These handlers are async so that bcrypt runs in the dedicated hashing pool
+# instead of holding a threadpool worker.
 @router.post("/register", response_model=user_schema.User)
-def register_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
-    db_user = user_service.get_user_by_username(db, username=user.username)
+async def register_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_db(db, user_service.get_user_by_username, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    return user_service.create_user(db=db, user=user)
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_db(db, user_service.create_user, user=user, hashed_password=hashed_password)
 
 @router.post("/token", response_model=token_schema.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = user_service.get_user_by_username(db, username=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_db(db, user_service.get_user_by_username, username=form_data.username)
+    is_valid, new_hash = (False, None)
+    if user:
+        is_valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # The bcrypt cost policy changed since this hash was made
+        await run_db(db, user_service.update_password_hash, user.id, new_hash)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -34,5 +45,5 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=user_schema.UserDetails)
-def read_users_me(current_user: user_schema.User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+async def read_users_me(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    return await run_db(db, user_service.get_user_details, user_id=current_user.id)
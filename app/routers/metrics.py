@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import metrics
+from app.routers.admin import get_current_admin_user
+
+router = APIRouter()
+
+# Prometheus scrapes this with an admin bearer token (``authorization`` in the scrape config)
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(get_current_admin_user)], include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
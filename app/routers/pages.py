@@ -1,23 +1,52 @@
-from fastapi import APIRouter, Request
+import functools
+import hashlib
+from typing import Dict, Tuple
+
+from fastapi import APIRouter, Request, Response
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+
+from app.core.assets import asset_url
+from app.core.http_cache import etag_matches, not_modified
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+@functools.lru_cache(maxsize=None)
+def get_templates():
+    """The Jinja environment, built when the first page is rendered."""
+    from fastapi.templating import Jinja2Templates
+
+    templates = Jinja2Templates(directory="app/templates")
+    templates.env.globals["asset_url"] = asset_url
+    return templates
+
+# The pages are static shells that load their data through the API, so
+# each one is rendered once per process and served from memory.
+PAGE_CACHE_CONTROL = "no-cache"
+_rendered: Dict[str, Tuple[bytes, str]] = {}
+
+def render_page(request: Request, name: str) -> Response:
+    page = _rendered.get(name)
+    if page is None:
+        body = get_templates().get_template(name).render().encode("utf-8")
+        page = _rendered[name] = (body, f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+    body, etag = page
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control=PAGE_CACHE_CONTROL)
+    return HTMLResponse(body, headers={"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL})
 
 @router.get("/login", response_class=HTMLResponse)
-def login_page(request: Request):
-    return templates.TemplateResponse("auth/login.html", {"request": request})
+async def login_page(request: Request):
+    return render_page(request, "auth/login.html")
 
 @router.get("/student/reservations", response_class=HTMLResponse)
-def student_reservation_page(request: Request):
+async def student_reservation_page(request: Request):
     # This page should be protected, we'll add that logic later
-    return templates.TemplateResponse("student/reservation.html", {"request": request})
+    return render_page(request, "student/reservation.html")
 
 @router.get("/admin/dashboard", response_class=HTMLResponse)
-def admin_dashboard_page(request: Request):
-    return templates.TemplateResponse("admin/dashboard.html", {"request": request})
+async def admin_dashboard_page(request: Request):
+    return render_page(request, "admin/dashboard.html")
 
 @router.get("/admin/settings", response_class=HTMLResponse)
-def admin_settings_page(request: Request):
-    return templates.TemplateResponse("admin/settings.html", {"request": request})
+async def admin_settings_page(request: Request):
+    return render_page(request, "admin/settings.html")
@@ -1,29 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.dependencies import get_db, get_current_user
-from app.services import reservation_service
-from app.schemas import reservation as reservation_schema
-from app.schemas import user as user_schema
+from app.core.dependencies import get_db, get_current_user, get_streaming_user, run_db
+from app.core.auth_cache import Principal
+from app.core.pubsub import event_stream
+from app.core.fast_json import FastJSONResponse
+from app.core.http_cache import etag_matches, not_modified, set_etag
+from app.services import admin_service, reservation_service, version_service
+from app.schemas import course as course_schema, team as team_schema, reservation as reservation_schema, waitlist as waitlist_schema
 
 router = APIRouter()
 
+@router.get("/courses", response_model=course_schema.CoursePage)
+async def list_my_courses(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """The courses the current user has a team in, with team and member counts."""
+    return await run_db(db, admin_service.get_courses_page, limit=limit, cursor=cursor, member_id=current_user.id)
+
+@router.get("/teams", response_model=team_schema.TeamPage)
+async def list_my_teams(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = None,
+    course_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """The current user's teams with their members, paged, optionally only those of one course."""
+    return await run_db(db, admin_service.get_teams_page, limit=limit, cursor=cursor, course_id=course_id, member_id=current_user.id)
+
 @router.post("/reservations", response_model=reservation_schema.Reservation)
-def create_reservation(
+async def create_reservation(
     reservation: reservation_schema.ReservationCreate,
     db: Session = Depends(get_db),
-    current_user: user_schema.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new reservation for the current user's team."""
-    return reservation_service.create_reservation(db=db, reservation=reservation, user_id=current_user.id)
+    reservation_service.admit(current_user, reservation.team_id, [(reservation.reservation_date, reservation.time_slot)])
+    return await run_db(db, reservation_service.create_reservation, reservation=reservation, user_id=current_user.id)
+
+@router.post("/reservations/batch", response_model=reservation_schema.BatchReservationResponse)
+async def create_reservations_batch(
+    batch: reservation_schema.BatchReservationCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Book a list of dates and/or a weekly recurrence for one team in one transaction."""
+    reservation_service.admit(current_user, batch.team_id)
+    return await run_db(db, reservation_service.create_reservations_batch, batch=batch, user_id=current_user.id)
 
 @router.get("/reservations", response_model=List[reservation_schema.Reservation])
-def get_reservations(
-    year: int,
-    month: int,
+async def get_reservations(
+    request: Request,
+    year: int = Query(..., ge=1, le=9999),
+    month: int = Query(..., ge=1, le=12),
     db: Session = Depends(get_db),
-    current_user: user_schema.User = Depends(get_current_user) # Ensures endpoint is protected
+    current_user: Principal = Depends(get_current_user) # Ensures endpoint is protected
 ):
     """Get all reservations for a given year and month."""
-    return reservation_service.get_reservations_for_month(db=db, year=year, month=month)
+    etag = await run_db(db, version_service.reservations_etag, scope=version_service.month_scope(year, month))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    reservations = await run_db(db, reservation_service.get_reservations_for_month, year=year, month=month)
+    # Already shaped like the response model; encode directly
+    response = FastJSONResponse(reservations)
+    set_etag(response, etag)
+    return response
+
+@router.get("/reservations/summary", response_model=reservation_schema.MonthAvailability)
+async def get_reservation_summary(
+    year: int = Query(..., ge=1, le=9999),
+    month: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get booked counts and remaining capacity per day and time slot for a month."""
+    return await run_db(db, reservation_service.get_month_availability, year=year, month=month, user_id=current_user.id)
+
+@router.post("/waitlist", response_model=waitlist_schema.WaitlistEntry, status_code=201)
+async def join_waitlist(
+    reservation: reservation_schema.ReservationCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Queue a team for a full slot; it is booked automatically when a seat frees up."""
+    reservation_service.admit(current_user, reservation.team_id)
+    entry_id = await run_db(db, reservation_service.join_waitlist, reservation=reservation, user_id=current_user.id)
+    # The slot may have room by now
+    await run_db(db, reservation_service.promote_waitlist, slots=[(reservation.reservation_date, reservation.time_slot)])
+    return await run_db(db, reservation_service.get_waitlist_entry, entry_id=entry_id)
+
+@router.get("/waitlist", response_model=List[waitlist_schema.WaitlistEntry])
+async def get_waitlist(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """Upcoming waitlist entries of the current user's teams, with queue positions."""
+    return await run_db(db, reservation_service.get_waitlist, team_ids=current_user.team_ids)
+
+@router.delete("/waitlist/{entry_id}", status_code=204)
+async def leave_waitlist(entry_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    await run_db(db, reservation_service.leave_waitlist, entry_id=entry_id, team_ids=current_user.team_ids)
+
+@router.get("/reservations/stream")
+async def stream_availability(
+    year: int = Query(..., ge=1, le=9999),
+    month: int = Query(..., ge=1, le=12),
+    current_user: Principal = Depends(get_streaming_user)
+):
+    """Server-sent events with slot occupancy changes for a month and capacity changes."""
+    channels = [reservation_service.availability_channel(year, month), reservation_service.AVAILABILITY_BROADCAST]
+    return StreamingResponse(
+        event_stream(channels),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
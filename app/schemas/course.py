@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class CourseBase(BaseModel):
     name: str
@@ -11,3 +12,12 @@ class Course(CourseBase):
 
     class Config:
         from_attributes = True
+
+# Admin course listing; the teams themselves are listed per course
+class CourseSummary(Course):
+    team_count: int
+    member_count: int
+
+class CoursePage(BaseModel):
+    items: List[CourseSummary]
+    next_cursor: Optional[int] = None
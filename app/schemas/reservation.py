@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from datetime import date
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from datetime import date, timedelta
+from typing import List, Literal, Optional
 from app.db.models import TimeSlot
 from .user import User # Import User schema for response
 
@@ -24,3 +24,85 @@ class Reservation(ReservationBase):
 
     class Config:
         from_attributes = True
+
+# Admin date-range report, one keyset page at a time
+class ReservationPage(BaseModel):
+    items: List[Reservation]
+    next_cursor: Optional[str] = None
+
+# Compact month view used by the student calendar
+class SlotAvailability(BaseModel):
+    reservation_date: date
+    time_slot: TimeSlot
+    booked_count: int
+    remaining: int
+
+class MyReservation(ReservationBase):
+    id: int
+
+class MonthAvailability(BaseModel):
+    year: int
+    month: int
+    max_concurrent_teams: int
+    slots: List[SlotAvailability]
+    my_reservations: List[MyReservation]
+
+# Batch and recurring bookings for one team
+MAX_BATCH_ENTRIES = 100
+
+class BatchReservationEntry(BaseModel):
+    reservation_date: date
+    time_slot: TimeSlot
+
+class RecurrenceRule(BaseModel):
+    """Every `interval_weeks` weeks on start_date's weekday, up to end_date."""
+    start_date: date
+    end_date: date
+    time_slot: TimeSlot
+    interval_weeks: int = Field(1, ge=1, le=520)
+
+    def count(self) -> int:
+        """Number of dates in the rule, without building them."""
+        if self.end_date < self.start_date:
+            return 0
+        return (self.end_date - self.start_date).days // (7 * self.interval_weeks) + 1
+
+    def dates(self) -> List[date]:
+        # Offsets from start_date, so nothing is computed past end_date (which may be date.max)
+        step = timedelta(weeks=self.interval_weeks)
+        return [self.start_date + step * index for index in range(self.count())]
+
+class BatchReservationCreate(BaseModel):
+    team_id: int
+    participant_ids: List[int] = Field(..., min_length=1)
+    entries: List[BatchReservationEntry] = Field([], max_length=MAX_BATCH_ENTRIES)
+    recurrence: Optional[RecurrenceRule] = None
+
+    @model_validator(mode="after")
+    def check_entries(self):
+        if not self.entries and self.recurrence is None:
+            raise ValueError("Provide entries, a recurrence rule, or both.")
+        if self.recurrence is not None and self.recurrence.end_date < self.recurrence.start_date:
+            raise ValueError("recurrence.end_date must not be before start_date.")
+        # Counted, not expanded: a rule running to 9999-12-31 is rejected without building it
+        if len(self.entries) + (self.recurrence.count() if self.recurrence is not None else 0) > MAX_BATCH_ENTRIES:
+            raise ValueError(f"A batch can contain at most {MAX_BATCH_ENTRIES} entries.")
+        return self
+
+    def expand(self):
+        """All requested (date, time slot) pairs, in request order."""
+        pairs = [(entry.reservation_date, entry.time_slot) for entry in self.entries]
+        if self.recurrence is not None:
+            pairs += [(day, self.recurrence.time_slot) for day in self.recurrence.dates()]
+        return pairs
+
+class BatchReservationResult(BaseModel):
+    reservation_date: date
+    time_slot: TimeSlot
+    status: Literal["created", "conflict"]
+    reservation_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BatchReservationResponse(BaseModel):
+    created: int
+    results: List[BatchReservationResult]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+class RosterRowError(BaseModel):
+    row: int
+    error: str
+
+class RosterImportResult(BaseModel):
+    rows: int
+    users_created: int
+    users_updated: int
+    courses_created: int
+    teams_created: int
+    memberships_added: int
+    errors: List[RosterRowError]
@@ -18,3 +18,19 @@ class Team(TeamBase):
 
     class Config:
         from_attributes = True
+
+# Admin team listing, one keyset page at a time
+class TeamListing(Team):
+    course_id: Optional[int] = None
+
+class TeamPage(BaseModel):
+    items: List[TeamListing]
+    next_cursor: Optional[int] = None
+
+# A team as listed under a member, without its other members
+class TeamRef(TeamBase):
+    id: int
+    course_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class CourseUsage(BaseModel):
+    course_id: int
+    name: str
+    reservations: int
+    participants: int
+
+class TeamUsage(BaseModel):
+    team_id: int
+    name: str
+    course_id: int
+    reservations: int
+    by_time_slot: Dict[str, int]
+
+class UserUsage(BaseModel):
+    user_id: int
+    username: str
+    full_name: Optional[str] = None
+    participations: int
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
-from .team import Team
+from .team import Team, TeamRef
 
 class UserBase(BaseModel):
     username: str
@@ -20,3 +20,11 @@ class User(UserBase):
 # A more complete User schema for the /users/me endpoint
 class UserDetails(User):
     assigned_teams: List[Team] = []
+
+# Admin member listing, one keyset page at a time
+class MemberListing(User):
+    assigned_teams: List[TeamRef] = []
+
+class MemberPage(BaseModel):
+    items: List[MemberListing]
+    next_cursor: Optional[int] = None
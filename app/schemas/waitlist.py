@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional
+from app.db.models import TimeSlot, WaitlistStatus
+
+class WaitlistEntry(BaseModel):
+    id: int
+    team_id: int
+    reservation_date: date
+    time_slot: TimeSlot
+    status: WaitlistStatus
+    position: Optional[int] = None # 1-based place in the queue while waiting
+    reservation_id: Optional[int] = None
+    detail: Optional[str] = None
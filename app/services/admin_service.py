@@ -1,42 +1,242 @@
-from sqlalchemy.orm import Session, joinedload
+import base64
+import csv
+import io
+from sqlalchemy import distinct, func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import date
+from typing import Iterator, Optional
 
-from app.db import models
+from app.db import models, loaders, projections
+from app.db.database import retry_on_lock
+from app.core import fast_json
+from app.core.auth_cache import principal_cache
+from app.services import archive_service, settings_service, reservation_service
 from app.schemas import course as course_schema, team as team_schema, setting as setting_schema, reservation as reservation_schema
 
 def get_settings(db: Session):
-    return db.query(models.SystemSettings).all()
+    return settings_service.registry.all(db)
 
+@retry_on_lock
 def update_setting(db: Session, setting: setting_schema.Setting):
     db_setting = db.query(models.SystemSettings).filter(models.SystemSettings.key == setting.key).first()
     if not db_setting:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Setting '{setting.key}' not found")
+    try:
+        settings_service.registry.parse(setting.key, setting.value)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     db_setting.value = setting.value
+    db_setting.version = settings_service.next_version(db)
     db.commit()
+    settings_service.registry.refresh(db)
+    if setting.key == "max_concurrent_teams":
+        reservation_service.publish_capacity(settings_service.registry.get(db, setting.key))
     db.refresh(db_setting)
     return db_setting
 
 def get_reservations_by_date(db: Session, reservation_date: date):
-    return db.query(models.Reservation).options(
-        joinedload(models.Reservation.team),
-        joinedload(models.Reservation.participants).joinedload(models.ReservationParticipant.user)
-    ).filter(models.Reservation.reservation_date == reservation_date).order_by(models.Reservation.time_slot).all()
+    tables = archive_service.tables_for(db, reservation_date)
+    return projections.reservations(
+        db, tables.reservation.reservation_date == reservation_date, order_by=(tables.reservation.time_slot,), tables=tables,
+    )
 
+# --- Date-range reports ---
+# Ranges are read in (reservation_date, time_slot, id) order, which the
+# (reservation_date, time_slot) index serves without sorting. Pages continue
+# after the key of the last row of the previous page (keyset pagination), so
+# every page costs the same however deep into the range it is. A range that
+# crosses the archive boundary is read part by part, archive first; ids are
+# kept on archiving, so a cursor stays valid when its month is archived.
+def range_order(reservation=models.Reservation):
+    return (reservation.reservation_date, reservation.time_slot, reservation.id)
+
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_SIZE = 1000 # Rows fetched from the cursor at a time
+EXPORT_CHUNK_BYTES = 64 * 1024
+CSV_COLUMNS = ("id", "reservation_date", "time_slot", "team_id", "is_confirmed", "participant_ids", "participant_usernames", "participant_names")
+
+def check_date_range(start_date: date, end_date: date):
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+
+def encode_cursor(reservation_date: date, time_slot: models.TimeSlot, reservation_id: int) -> str:
+    raw = f"{reservation_date.isoformat()}|{time_slot.value}|{reservation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        reservation_date, time_slot, reservation_id = raw.split("|")
+        return date.fromisoformat(reservation_date), models.TimeSlot(time_slot), int(reservation_id)
+    except ValueError: # Covers bad base64, UTF-8, field counts and values
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+def get_reservations_page(db: Session, start_date: date, end_date: date, limit: int, cursor: Optional[str] = None):
+    """One page of the reservations between two dates, plus the cursor of the next page."""
+    check_date_range(start_date, end_date)
+    after = decode_cursor(cursor) if cursor else None
+    items, keys = [], []
+    for tables, part_start, part_end in archive_service.split_range(db, start_date, end_date):
+        if after is not None and after[0] > part_end:
+            continue
+        order = range_order(tables.reservation)
+        query = db.query(*order).filter(tables.reservation.reservation_date.between(part_start, part_end))
+        if after is not None:
+            query = query.filter(tuple_(*order) > tuple_(*after))
+        part_keys = query.order_by(*order).limit(limit + 1 - len(keys)).all()
+        part_page = part_keys[:limit - len(keys)]
+        if part_page:
+            items += projections.reservations(
+                db, tables.reservation.id.in_([key.id for key in part_page]), order_by=order[:2], tables=tables,
+            )
+        keys += part_keys
+        if len(keys) > limit:
+            break
+    page = keys[:limit]
+    return {"items": items, "next_cursor": encode_cursor(*page[-1]) if len(keys) > limit else None}
+
+def _csv_row(reservation: dict):
+    users = [participant["user"] for participant in reservation["participants"]]
+    return (
+        reservation["id"],
+        reservation["reservation_date"].isoformat(),
+        reservation["time_slot"].value,
+        reservation["team_id"],
+        int(bool(reservation["is_confirmed"])),
+        ";".join(str(user["id"]) for user in users),
+        ";".join(user["username"] for user in users),
+        ";".join(user["full_name"] or "" for user in users),
+    )
+
+def _range_reservations(db: Session, start_date: date, end_date: date) -> Iterator[dict]:
+    for tables, part_start, part_end in archive_service.split_range(db, start_date, end_date):
+        rows = db.execute(
+            projections.reservation_query(
+                tables.reservation.reservation_date.between(part_start, part_end),
+                order_by=range_order(tables.reservation)[:2], tables=tables,
+            ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        yield from projections.group_reservations(rows)
+
+def export_reservations(db: Session, start_date: date, end_date: date, fmt: str) -> Iterator[bytes]:
+    """Stream the reservations between two dates as CSV or NDJSON, in chunks.
+
+    Rows are pulled from the cursor ``EXPORT_BATCH_SIZE`` at a time and
+    folded into reservations on the fly, so memory stays flat however
+    long the range is. NDJSON lines match the Reservation schema; CSV
+    has one row per reservation with ``;``-separated participants.
+    """
+    text = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(text)
+        text.write("\ufeff") # BOM, so spreadsheet apps pick UTF-8 for the Korean names
+        writer.writerow(CSV_COLUMNS)
+    chunk = bytearray(text.getvalue().encode())
+    for reservation in _range_reservations(db, start_date, end_date):
+        if fmt == "csv":
+            text.seek(0)
+            text.truncate()
+            writer.writerow(_csv_row(reservation))
+            chunk += text.getvalue().encode()
+        else:
+            chunk += fast_json.dumps(reservation) + b"\n"
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+# --- Course, team and member listings ---
+# Each listing is a keyset page in id order; pass the returned next_cursor
+# as ``cursor`` to continue. The level below the page (team counts, team
+# members, a member's teams) is loaded with one IN query over the page, so
+# a page costs two queries however many teams a course has.
+
+def _page(query, id_column, limit: int, cursor: Optional[int]):
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    page = rows[:limit]
+    return page, (page[-1].id if len(rows) > limit else None)
+
+def get_courses_page(db: Session, limit: int, cursor: Optional[int] = None, member_id: Optional[int] = None):
+    """Courses with their team and member counts; ``member_id`` keeps the courses that user has a team in."""
+    query = db.query(models.Course.id, models.Course.name)
+    if member_id is not None:
+        query = query.filter(models.Course.id.in_(
+            select(models.Team.course_id).join(models.TeamMember).where(models.TeamMember.user_id == member_id)
+        ))
+    page, next_cursor = _page(query, models.Course.id, limit, cursor)
+    counts = {
+        row.course_id: row for row in db.query(
+            models.Team.course_id,
+            func.count(distinct(models.Team.id)).label("team_count"),
+            func.count(distinct(models.TeamMember.user_id)).label("member_count"),
+        ).outerjoin(models.TeamMember).filter(
+            models.Team.course_id.in_([course.id for course in page])
+        ).group_by(models.Team.course_id)
+    } if page else {}
+    items = [
+        {
+            "id": course.id,
+            "name": course.name,
+            "team_count": counts[course.id].team_count if course.id in counts else 0,
+            "member_count": counts[course.id].member_count if course.id in counts else 0,
+        }
+        for course in page
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+def get_teams_page(db: Session, limit: int, cursor: Optional[int] = None, course_id: Optional[int] = None, member_id: Optional[int] = None):
+    """Teams with their members, optionally only those of a course and/or with a given member."""
+    query = db.query(models.Team).options(*loaders.TEAM)
+    if course_id is not None:
+        query = query.filter(models.Team.course_id == course_id)
+    if member_id is not None:
+        query = query.filter(models.Team.members.any(models.TeamMember.user_id == member_id))
+    items, next_cursor = _page(query, models.Team.id, limit, cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+def get_members_page(db: Session, limit: int, cursor: Optional[int] = None, course_id: Optional[int] = None, team_id: Optional[int] = None):
+    """Users on at least one team, with their teams; ``course_id``/``team_id`` narrow it to that course or team."""
+    membership = select(models.TeamMember.user_id)
+    if course_id is not None:
+        membership = membership.join(models.Team).where(models.Team.course_id == course_id)
+    if team_id is not None:
+        membership = membership.where(models.TeamMember.team_id == team_id)
+    query = db.query(models.User).options(*loaders.MEMBER).filter(models.User.id.in_(membership))
+    items, next_cursor = _page(query, models.User.id, limit, cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@retry_on_lock
 def create_course(db: Session, course: course_schema.CourseCreate):
     db_course = models.Course(name=course.name)
     db.add(db_course)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A course with this name already exists.")
     db.refresh(db_course)
     return db_course
 
+@retry_on_lock
 def create_team(db: Session, team: team_schema.TeamBase, course_id: int):
+    # Foreign keys are enforced, so check the reference up front for a clean 404
+    if db.query(models.Course.id).filter(models.Course.id == course_id).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
     db_team = models.Team(name=team.name, course_id=course_id)
     db.add(db_team)
-    db.commit()
-    db.refresh(db_team)
-    return db_team
+    try:
+        db.commit()
+    except IntegrityError: # Duplicate name, or the course was deleted meanwhile
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The team could not be created: its name is taken or its course no longer exists.")
+    return db.query(models.Team).options(*loaders.TEAM).filter(models.Team.id == db_team.id).first()
 
+@retry_on_lock
 def add_team_member(db: Session, team_id: int, user_id: int):
     # Check if user and team exist
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -46,6 +246,11 @@ def add_team_member(db: Session, team_id: int, user_id: int):
 
     db_team_member = models.TeamMember(user_id=user_id, team_id=team_id)
     db.add(db_team_member)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError: # Already a member, or the user or team was deleted meanwhile
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The user is already a member of this team, or the team or user no longer exists.")
+    principal_cache.invalidate_user(user_id)
     db.refresh(db_team_member)
     return db_team_member
@@ -0,0 +1,175 @@
+"""Hot/cold split of the reservation tables.
+
+Only the current and coming months take bookings. Closed months are moved
+to ``reservations_archive`` and ``reservation_participants_archive``, so the
+hot tables and their indexes only hold recent data. Archived months always
+form a prefix of the calendar. ``boundary`` is the first day that is still
+hot, and reads split a date range at it with ``split_range``. Bookings
+before the boundary are refused.
+
+A month is archived in three steps, each safe to rerun:
+
+1. Copy its rows to the archive, ``batch_size`` reservations per
+   transaction. Reads still go to the hot tables.
+2. In one transaction, copy rows booked since step 1 and record the month
+   in ``archived_months``. From then on reads go to the archive and
+   bookings for the month are refused.
+3. Delete its hot rows, in batches. Waitlist entries promoted to one of
+   them keep their team, date and slot but lose the ``reservation_id``
+   link, which only points into the hot table.
+
+The occupancy ledger and the usage rollups are kept as they are. A step
+that fails is rolled back and the next run picks up where it stopped.
+
+    python -m app.services.archive_service [--keep-months 1] [--batch-size 5000]
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.projections import ARCHIVE, HOT, ReservationTables
+
+BATCH_SIZE = 5000
+KEEP_MONTHS = 1 # Closed months kept hot, for late corrections and recent reports
+
+def month_start(day: date, months_back: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def next_month(day: date) -> date:
+    return month_start(day, -1)
+
+def boundary(db: Session) -> Optional[date]:
+    """The first hot day, or None if nothing is archived."""
+    last_archived = db.query(func.max(models.ArchivedMonth.month)).scalar()
+    if last_archived is None:
+        return None
+    year, month = map(int, last_archived.split("-"))
+    return next_month(date(year, month, 1))
+
+def split_range(db: Session, start_date: date, end_date: date) -> List[Tuple[ReservationTables, date, date]]:
+    """Split ``start_date..end_date`` into (tables, start, end) parts, oldest first."""
+    first_hot = boundary(db)
+    if first_hot is None or start_date >= first_hot:
+        return [(HOT, start_date, end_date)]
+    if end_date < first_hot:
+        return [(ARCHIVE, start_date, end_date)]
+    return [(ARCHIVE, start_date, first_hot - timedelta(days=1)), (HOT, first_hot, end_date)]
+
+def tables_for(db: Session, day: date) -> ReservationTables:
+    first_hot = boundary(db)
+    return ARCHIVE if first_hot is not None and day < first_hot else HOT
+
+def check_open(db: Session, day: date):
+    """Refuse bookings in archived months."""
+    first_hot = boundary(db)
+    if first_hot is not None and day < first_hot:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Reservations for {day.year}-{day.month:02d} are archived and can no longer be changed."
+        )
+
+def _copy(db: Session, reservation_ids):
+    hot, cold = HOT.reservation, ARCHIVE.reservation
+    columns = ["id", "team_id", "reservation_date", "time_slot", "is_confirmed"]
+    db.execute(insert(cold).prefix_with("OR IGNORE").from_select(
+        columns, select(*(getattr(hot, column) for column in columns)).where(hot.id.in_(reservation_ids))
+    ))
+    db.execute(insert(ARCHIVE.participant).prefix_with("OR IGNORE").from_select(
+        ["reservation_id", "user_id"],
+        select(HOT.participant.reservation_id, HOT.participant.user_id).where(HOT.participant.reservation_id.in_(reservation_ids)),
+    ))
+
+def archive_month(db: Session, first_day: date, batch_size: int = BATCH_SIZE) -> int:
+    """Move one month to the archive. Returns the number of reservations it holds there."""
+    try:
+        return _archive_month(db, first_day, batch_size)
+    except Exception:
+        db.rollback()
+        raise
+
+def _archive_month(db: Session, first_day: date, batch_size: int) -> int:
+    last_day = next_month(first_day) - timedelta(days=1)
+    hot = HOT.reservation
+    in_month = hot.reservation_date.between(first_day, last_day)
+
+    # 1. Copy, resuming after the last id already copied
+    last_id = 0
+    while True:
+        ids = db.scalars(select(hot.id).where(in_month, hot.id > last_id).order_by(hot.id).limit(batch_size)).all()
+        if not ids:
+            break
+        _copy(db, ids)
+        db.commit()
+        last_id = ids[-1]
+
+    # 2. Catch up and switch reads over
+    month = f"{first_day.year:04d}-{first_day.month:02d}"
+    _copy(db, select(hot.id).where(in_month))
+    count = db.query(func.count(ARCHIVE.reservation.id)).filter(
+        ARCHIVE.reservation.reservation_date.between(first_day, last_day)
+    ).scalar()
+    db.merge(models.ArchivedMonth(month=month, reservations=count))
+    db.commit()
+
+    # 3. Drop the hot copies
+    _delete_hot(db, first_day, last_day, batch_size)
+    return count
+
+def _delete_hot(db: Session, first_day: date, last_day: date, batch_size: int):
+    hot = HOT.reservation
+    while True:
+        ids = db.scalars(select(hot.id).where(hot.reservation_date.between(first_day, last_day)).limit(batch_size)).all()
+        if not ids:
+            break
+        db.execute(update(models.WaitlistEntry).where(models.WaitlistEntry.reservation_id.in_(ids)).values(reservation_id=None))
+        db.execute(delete(HOT.participant).where(HOT.participant.reservation_id.in_(ids)))
+        db.execute(delete(hot).where(hot.id.in_(ids)))
+        db.commit()
+
+def archive_closed_months(db: Session, keep_months: int = KEEP_MONTHS, batch_size: int = BATCH_SIZE, today: Optional[date] = None):
+    """Archive every month before the last ``keep_months`` closed ones. Returns [(month, reservations)]."""
+    cutoff = month_start(today or date.today(), keep_months)
+    archived = []
+
+    # Finish months whose step 3 was interrupted
+    first_hot = boundary(db)
+    if first_hot is not None:
+        oldest = db.query(func.min(HOT.reservation.reservation_date)).filter(HOT.reservation.reservation_date < first_hot).scalar()
+        if oldest is not None:
+            try:
+                _delete_hot(db, oldest, first_hot - timedelta(days=1), batch_size)
+            except Exception:
+                db.rollback()
+                raise
+
+    oldest = db.query(func.min(HOT.reservation.reservation_date)).scalar()
+    if oldest is None:
+        return archived
+    # Keep the archive a prefix: continue from the boundary, or start at the oldest month
+    month = first_hot or month_start(oldest)
+    while month < cutoff:
+        archived.append((f"{month.year:04d}-{month.month:02d}", archive_month(db, month, batch_size)))
+        month = next_month(month)
+    return archived
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Move closed months of reservations to the archive tables.")
+    parser.add_argument("--keep-months", type=int, default=KEEP_MONTHS, help="Closed months to keep in the hot tables")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for month, count in archive_closed_months(db, args.keep_months, args.batch_size):
+            print(f"{month}: {count:,} reservations archived")
+    finally:
+        db.close()
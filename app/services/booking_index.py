@@ -0,0 +1,111 @@
+"""Process-local index of who is booked in which slot.
+
+For every day it holds, per time slot, the booked team ids and a frozenset
+of the booked user ids, plus the day's ``date:`` version stamp from
+``version_service``. The booking engine's team and member checks become a
+dict lookup and a set intersection instead of joins over the reservation
+tables.
+
+Months are loaded on first use. Before a day is used, its stamp is compared
+with the database (a primary-key lookup) and the day is reloaded if another
+writer got there first. The booking engine only consults the index after
+claiming the slot in the occupancy ledger. That claim takes SQLite's write
+lock, so the stamp it compares against is the latest one, and the index is
+exact for the rest of the transaction. After a commit the engine applies
+its own booking, which moves the day to the stamp it bumped. The unique
+indexes remain the final arbiter.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services import version_service
+
+MAX_MONTHS = 12 # Months kept in memory, least recently used dropped first
+
+@dataclass
+class DayBookings:
+    version: int
+    team_slots: Dict[int, models.TimeSlot] = field(default_factory=dict) # team id -> booked slot
+    slot_users: Dict[models.TimeSlot, FrozenSet[int]] = field(default_factory=dict) # slot -> booked user ids
+
+    def add(self, time_slot: models.TimeSlot, team_id: int, user_ids: Iterable[int]):
+        self.team_slots[team_id] = time_slot
+        # Replaced, not updated in place, so a concurrent reader sees either set whole
+        self.slot_users[time_slot] = self.slot_users.get(time_slot, frozenset()).union(user_ids)
+
+class BookingIndex:
+    def __init__(self, max_months: int = MAX_MONTHS):
+        self.max_months = max_months
+        self._lock = threading.Lock()
+        self._months: "OrderedDict[Tuple[int, int], Dict[date, DayBookings]]" = OrderedDict()
+
+    def _load(self, db: Session, first_day: date, last_day: date) -> Dict[date, DayBookings]:
+        days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+        versions = version_service.get_versions(db, [version_service.date_scope(day) for day in days])
+        bookings = {day: DayBookings(version=versions[version_service.date_scope(day)]) for day in days}
+        rows = db.query(
+            models.Reservation.reservation_date,
+            models.Reservation.time_slot,
+            models.Reservation.team_id,
+            models.ReservationParticipant.user_id,
+        ).join(models.ReservationParticipant).filter(
+            models.Reservation.reservation_date.between(first_day, last_day)
+        )
+        for row in rows:
+            bookings[row.reservation_date].add(row.time_slot, row.team_id, (row.user_id,))
+        return bookings
+
+    def day(self, db: Session, day: date) -> DayBookings:
+        """The bookings of ``day``, reconciled with the database.
+
+        Call inside the booking transaction, after the ledger claim.
+        """
+        key = (day.year, day.month)
+        with self._lock:
+            month = self._months.get(key)
+            if month is not None:
+                self._months.move_to_end(key)
+        # As in the settings registry, the lock is never held across a query
+        if month is None:
+            first_day = date(day.year, day.month, 1)
+            last_day = (first_day + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            month = self._load(db, first_day, last_day)
+            with self._lock:
+                self._months[key] = month
+                while len(self._months) > self.max_months:
+                    self._months.popitem(last=False)
+            return month[day]
+
+        scope = version_service.date_scope(day)
+        version = version_service.get_versions(db, [scope])[scope]
+        bookings = month[day]
+        if bookings.version != version:
+            bookings = self._load(db, day, day)[day]
+            with self._lock:
+                month[day] = bookings
+        return bookings
+
+    def apply(self, day: date, version: int, time_slot: models.TimeSlot, team_id: int, user_ids: Iterable[int]):
+        """Record a committed booking that moved ``day`` from ``version`` to ``version + 1``.
+
+        Skipped if the index no longer holds the day at ``version``. The next
+        check then reloads it.
+        """
+        with self._lock:
+            month = self._months.get((day.year, day.month))
+            bookings = month.get(day) if month is not None else None
+            if bookings is not None and bookings.version == version:
+                bookings.add(time_slot, team_id, user_ids)
+                bookings.version = version + 1
+
+    def clear(self):
+        with self._lock:
+            self._months.clear()
+
+index = BookingIndex()
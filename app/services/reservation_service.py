@@ -1,95 +1,541 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import calendar
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, bindparam, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
-from app.db import models
+from app.db import models, loaders, projections
+from app.db.database import retry_on_lock
+from app.core import admission, pubsub
+from app.core.auth_cache import Principal
+from app.core.metrics import metrics
+from app.services import archive_service, booking_index, settings_service, usage_service, version_service
 from app.schemas import reservation as reservation_schema
 
+def month_range(year: int, month: int):
+    """Return the first and last day of a calendar month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
 def get_reservations_for_month(db: Session, year: int, month: int):
-    # A more robust way would be to use calendar month range
-    return db.query(models.Reservation).filter(
-        and_(
-            models.Reservation.reservation_date >= f"{year}-{month:02d}-01",
-            models.Reservation.reservation_date <= f"{year}-{month:02d}-31"
-        )
+    """A month's reservations as plain dicts (schemas.reservation.Reservation)."""
+    first_day, last_day = month_range(year, month)
+    # Whole months are archived, so the month lives in exactly one place
+    tables = archive_service.tables_for(db, first_day)
+    return projections.reservations(
+        db, tables.reservation.reservation_date.between(first_day, last_day),
+        order_by=(tables.reservation.reservation_date, tables.reservation.time_slot), tables=tables,
+    )
+
+def get_month_availability(db: Session, year: int, month: int, user_id: int):
+    """Per-day/per-slot booking counts for a month plus the user's own bookings."""
+    first_day, last_day = month_range(year, month)
+    max_teams = get_max_concurrent_teams(db)
+    reservation, participant = archive_service.tables_for(db, first_day)
+
+    slot_counts = db.query(
+        reservation.reservation_date,
+        reservation.time_slot,
+        func.count(reservation.id).label("booked_count")
+    ).filter(
+        reservation.reservation_date.between(first_day, last_day)
+    ).group_by(
+        reservation.reservation_date, reservation.time_slot
+    ).order_by(
+        reservation.reservation_date, reservation.time_slot
     ).all()
 
-def create_reservation(db: Session, reservation: reservation_schema.ReservationCreate, user_id: int):
+    my_reservations = db.query(
+        reservation.id,
+        reservation.reservation_date,
+        reservation.time_slot,
+        reservation.team_id
+    ).join(participant, participant.reservation_id == reservation.id).filter(
+        participant.user_id == user_id,
+        reservation.reservation_date.between(first_day, last_day)
+    ).order_by(reservation.reservation_date).all()
+
+    return {
+        "year": year,
+        "month": month,
+        "max_concurrent_teams": max_teams,
+        "slots": [
+            {
+                "reservation_date": row.reservation_date,
+                "time_slot": row.time_slot,
+                "booked_count": row.booked_count,
+                "remaining": max(max_teams - row.booked_count, 0),
+            }
+            for row in slot_counts
+        ],
+        "my_reservations": [row._asdict() for row in my_reservations],
+    }
+
+def get_max_concurrent_teams(db: Session) -> int:
+    return settings_service.registry.get(db, "max_concurrent_teams")
+
+def warm_caches(db: Session, today: Optional[date] = None):
+    """Load the settings and the current month's bookings and occupancy, so the first requests don't."""
+    today = today or date.today()
+    max_teams = get_max_concurrent_teams(db)
+    booking_index.index.day(db, today)
+    first_day, last_day = month_range(today.year, today.month)
+    ledger = models.SlotOccupancy
+    for row in db.query(ledger).filter(ledger.reservation_date.between(first_day, last_day)):
+        admission.occupancy.record(row.reservation_date, row.time_slot, row.booked_count, max_teams)
+
+# --- Live availability ---
+# Clients subscribe to the channel of the month they display and to the
+# broadcast channel for capacity changes. Messages carry absolute counts,
+# so applying one twice is harmless.
+AVAILABILITY_BROADCAST = "availability:*"
+
+def availability_channel(year: int, month: int) -> str:
+    return f"availability:{year:04d}-{month:02d}"
+
+def publish_slot_counts(slot_counts, max_teams: int):
+    """Push committed (date, time slot, booked count) rows to the month channels and the admission view."""
+    by_month = {}
+    for reservation_date, time_slot, booked_count in slot_counts:
+        admission.occupancy.record(reservation_date, time_slot, booked_count, max_teams)
+        by_month.setdefault((reservation_date.year, reservation_date.month), []).append({
+            "reservation_date": reservation_date.isoformat(),
+            "time_slot": time_slot.value,
+            "booked_count": booked_count,
+            "remaining": max(max_teams - booked_count, 0),
+        })
+    for (year, month), slots in by_month.items():
+        pubsub.broker.publish(availability_channel(year, month), {
+            "type": "slots",
+            "max_concurrent_teams": max_teams,
+            "slots": slots,
+        })
+
+def publish_capacity(max_teams: int):
+    admission.occupancy.clear()
+    pubsub.broker.publish(AVAILABILITY_BROADCAST, {"type": "capacity", "max_concurrent_teams": max_teams})
+
+def _ensure_ledger_rows(db: Session, slots):
+    """Create missing occupancy ledger rows for (date, time slot) pairs.
+
+    Rows are created on the first booking of a slot, counting any
+    reservations that predate the ledger. As the first write of a booking
+    transaction, this also takes the write lock that serializes every
+    later check.
+    """
+    ledger = models.SlotOccupancy
+    existing_count = select(func.count(models.Reservation.id)).where(
+        models.Reservation.reservation_date == bindparam("slot_date", type_=ledger.reservation_date.type),
+        models.Reservation.time_slot == bindparam("slot_time", type_=ledger.time_slot.type),
+    ).scalar_subquery()
+    db.execute(
+        insert(ledger).prefix_with("OR IGNORE").values(
+            reservation_date=bindparam("slot_date", type_=ledger.reservation_date.type),
+            time_slot=bindparam("slot_time", type_=ledger.time_slot.type),
+            booked_count=existing_count,
+        ),
+        [{"slot_date": reservation_date, "slot_time": time_slot} for reservation_date, time_slot in slots],
+    )
+
+def _claim_slot(db: Session, reservation_date, time_slot, max_teams: int):
+    """Take one seat in the (date, time slot) occupancy ledger.
+
+    Returns the new booked count, or None if the slot is already full.
+    """
+    ledger = models.SlotOccupancy
+    _ensure_ledger_rows(db, [(reservation_date, time_slot)])
+    result = db.execute(
+        update(ledger)
+        .where(
+            ledger.reservation_date == reservation_date,
+            ledger.time_slot == time_slot,
+            ledger.booked_count < max_teams,
+        )
+        .values(booked_count=ledger.booked_count + 1)
+        .returning(ledger.booked_count)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar()
+
+def _check_participants(db: Session, team_id: int, participant_ids: set, user_id: int):
     # 1. Check if the requesting user is in the list of participants
-    if user_id not in reservation.participant_ids:
+    if user_id not in participant_ids:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You must be a participant to create a reservation.")
 
     # 2. Check if all participants are members of the selected team
-    team_members_query = db.query(models.TeamMember.user_id).filter(models.TeamMember.team_id == reservation.team_id).all()
+    team_members_query = db.query(models.TeamMember.user_id).filter(models.TeamMember.team_id == team_id).all()
     team_member_ids = {member.user_id for member in team_members_query}
-    if not set(reservation.participant_ids).issubset(team_member_ids):
+    if not participant_ids.issubset(team_member_ids):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="All participants must be members of the selected team.")
 
-    # 3. Check if the team has already booked today (any time slot)
-    existing_booking_for_team = db.query(models.Reservation).filter(
-        models.Reservation.team_id == reservation.team_id,
-        models.Reservation.reservation_date == reservation.reservation_date
-    ).first()
-    if existing_booking_for_team:
-        raise HTTPException(
+class SlotFullError(HTTPException):
+    """The 409 for a slot at capacity, told apart from other conflicts by admission control and the waitlist."""
+
+    def __init__(self, max_teams: int):
+        super().__init__(
             status_code=status.HTTP_409_CONFLICT,
-            detail=f"This team has already booked for {existing_booking_for_team.time_slot.value} on this day."
+            detail=f"Booking failed. The maximum number of teams ({max_teams}) for this time slot has been reached.",
+            headers={"X-Slot-Full": "1"}, # Lets clients offer the waitlist
         )
+        self.max_teams = max_teams
 
-    # 4. Check for member conflicts for the selected participants
-    # First, check against the concurrent team limit
-    try:
-        max_teams_setting = db.query(models.SystemSettings).filter(models.SystemSettings.key == "max_concurrent_teams").first()
-        max_teams = int(max_teams_setting.value)
-    except (AttributeError, ValueError):
-        max_teams = 6 # Default value if not set or invalid
+def admit(principal: Principal, team_id: int, slots=()):
+    """Admission control ahead of a booking: rate limits, then a fast fail for slots known to be full.
 
-    reservations_at_same_time = db.query(models.Reservation).filter(
-        models.Reservation.reservation_date == reservation.reservation_date,
-        models.Reservation.time_slot == reservation.time_slot
-    ).count()
+    The team's bucket is only charged if the principal is a member; other
+    requests are refused by the membership check anyway. Raises 429 or
+    SlotFullError without touching the database.
+    """
+    admission.check_rate(principal.id, team_id if team_id in principal.team_ids else None)
+    for reservation_date, time_slot in slots:
+        max_teams = admission.occupancy.full_capacity(reservation_date, time_slot)
+        if max_teams is not None:
+            admission.reject("slot_full")
+            raise SlotFullError(max_teams)
 
-    if reservations_at_same_time >= max_teams:
+def _book(db: Session, reservation: reservation_schema.ReservationCreate, participant_ids: set, max_teams: int):
+    """Run the booking checks and insert the reservation, without committing.
+
+    Returns (reservation id, new booked count of the slot, the day's
+    version before the booking). Raises HTTPException on a conflict; the
+    caller rolls back, or commits and calls ``_booked``.
+    """
+    # 3. Check against the concurrent team limit
+    booked_count = _claim_slot(db, reservation.reservation_date, reservation.time_slot, max_teams)
+    # Read the archive boundary under the write lock the claim took, so
+    # archiving can't switch the month over before this booking commits
+    archive_service.check_open(db, reservation.reservation_date)
+    if booked_count is None:
+        raise SlotFullError(max_teams)
+
+    # 4. and 5. run against the booking index; the claim above holds the
+    # write lock, so the index is exact until commit
+    bookings = booking_index.index.day(db, reservation.reservation_date)
+
+    # 4. Check if the team has already booked today (any time slot)
+    existing_slot = bookings.team_slots.get(reservation.team_id)
+    if existing_slot:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail=f"Booking failed. The maximum number of teams ({max_teams}) for this time slot has been reached."
+            detail=f"This team has already booked for {existing_slot.value} on this day."
         )
 
-    # Now, check for individual member conflicts
-    conflicting_reservations = db.query(models.Reservation).join(models.ReservationParticipant).filter(
-        models.Reservation.reservation_date == reservation.reservation_date,
-        models.Reservation.time_slot == reservation.time_slot,
-        models.ReservationParticipant.user_id.in_(reservation.participant_ids)
-    ).all()
-
-    if conflicting_reservations:
-        conflicting_users = set()
-        for res in conflicting_reservations:
-            for p in res.participants:
-                if p.user_id in reservation.participant_ids:
-                    conflicting_users.add(p.user.full_name)
-        
-        if conflicting_users:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Booking failed. The following members already have a reservation at this time: {', '.join(sorted(list(conflicting_users)))}"
-            )
+    # 5. Check for individual member conflicts for the selected participants
+    conflicting_ids = bookings.slot_users.get(reservation.time_slot, frozenset()) & participant_ids
+    if conflicting_ids:
+        conflicting_users = db.query(models.User.full_name).filter(models.User.id.in_(conflicting_ids)).all()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Booking failed. The following members already have a reservation at this time: {', '.join(sorted({u.full_name for u in conflicting_users}))}"
+        )
 
     # All checks passed, create the reservation and participants
     db_reservation = models.Reservation(
         reservation_date=reservation.reservation_date,
         time_slot=reservation.time_slot,
-        team_id=reservation.team_id
+        team_id=reservation.team_id,
+        participants=[models.ReservationParticipant(user_id=p_id) for p_id in participant_ids]
     )
     db.add(db_reservation)
-    db.commit()
-    db.refresh(db_reservation)
+    version_service.bump_reservation_dates(db, [reservation.reservation_date])
+    usage_service.record_bookings(db, [(reservation.reservation_date, reservation.time_slot, reservation.team_id, participant_ids)])
+    db.flush()
+    return db_reservation.id, booked_count, bookings.version
 
-    for p_id in reservation.participant_ids:
-        participant = models.ReservationParticipant(reservation_id=db_reservation.id, user_id=p_id)
-        db.add(participant)
-    
+def _booked(reservation: reservation_schema.ReservationCreate, participant_ids: set, day_version: int):
+    """Bring the booking index up to date after the commit of a ``_book``."""
+    booking_index.index.apply(reservation.reservation_date, day_version, reservation.time_slot, reservation.team_id, participant_ids)
+
+BOOKING_INTEGRITY_DETAIL = "Booking failed. This team or one of its members already has a reservation at this time."
+
+@retry_on_lock
+def create_reservation(db: Session, reservation: reservation_schema.ReservationCreate, user_id: int):
+    participant_ids = set(reservation.participant_ids)
+    _check_participants(db, reservation.team_id, participant_ids, user_id)
+    max_teams = get_max_concurrent_teams(db)
+
+    # Everything below runs in a single transaction. Claiming the slot in the
+    # ledger first makes the remaining checks and the insert atomic.
+    try:
+        reservation_id, booked_count, day_version = _book(db, reservation, participant_ids, max_teams)
+        db.commit()
+    except SlotFullError:
+        db.rollback()
+        admission.occupancy.record(reservation.reservation_date, reservation.time_slot, max_teams, max_teams)
+        raise
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=BOOKING_INTEGRITY_DETAIL)
+
+    _booked(reservation, participant_ids, day_version)
+    publish_slot_counts([(reservation.reservation_date, reservation.time_slot, booked_count)], max_teams)
+    return db.query(models.Reservation).options(*loaders.RESERVATION).filter(
+        models.Reservation.id == reservation_id
+    ).first()
+
+@retry_on_lock
+def create_reservations_batch(db: Session, batch: reservation_schema.BatchReservationCreate, user_id: int):
+    """Book many (date, time slot) entries for one team in a single transaction.
+
+    Every check is one set-based query over the whole batch. Entries that
+    fail a check are reported as conflicts; the rest are created.
+    """
+    participant_ids = set(batch.participant_ids)
+    _check_participants(db, batch.team_id, participant_ids, user_id)
+    max_teams = get_max_concurrent_teams(db)
+
+    entries = list(dict.fromkeys(batch.expand())) # Drop exact duplicates, keep order
+    results = {}
+    accepted = []
+    ledger = models.SlotOccupancy
+    slot_counts = []
+    try:
+        if entries:
+            # Takes the write lock, so the archive boundary read next is
+            # exact until commit
+            _ensure_ledger_rows(db, entries)
+        first_hot = archive_service.boundary(db)
+        seen_dates = set()
+        for entry in entries:
+            if first_hot is not None and entry[0] < first_hot:
+                results[entry] = {"status": "conflict", "detail": "This month is archived and can no longer be changed."}
+                continue
+            if entry[0] in seen_dates:
+                results[entry] = {"status": "conflict", "detail": "This team can only book one time slot per day."}
+                continue
+            seen_dates.add(entry[0])
+            accepted.append(entry)
+
+        if accepted:
+            dates = [entry[0] for entry in accepted]
+
+            # Capacity of every requested slot
+            booked = {
+                (row.reservation_date, row.time_slot): row.booked_count
+                for row in db.query(ledger.reservation_date, ledger.time_slot, ledger.booked_count).filter(
+                    tuple_(ledger.reservation_date, ledger.time_slot).in_(accepted)
+                )
+            }
+            # Days on which the team already has a reservation
+            team_days = {
+                row.reservation_date: row.time_slot
+                for row in db.query(models.Reservation.reservation_date, models.Reservation.time_slot).filter(
+                    models.Reservation.team_id == batch.team_id,
+                    models.Reservation.reservation_date.in_(dates)
+                )
+            }
+            # Participants already booked in any of the requested slots
+            member_conflicts = {}
+            for row in db.query(
+                models.Reservation.reservation_date, models.Reservation.time_slot, models.User.full_name
+            ).select_from(models.Reservation).join(models.ReservationParticipant).join(
+                models.User, models.ReservationParticipant.user_id == models.User.id
+            ).filter(
+                tuple_(models.Reservation.reservation_date, models.Reservation.time_slot).in_(accepted),
+                models.ReservationParticipant.user_id.in_(participant_ids)
+            ):
+                member_conflicts.setdefault((row.reservation_date, row.time_slot), set()).add(row.full_name)
+
+            to_create = []
+            for entry in accepted:
+                if entry[0] in team_days:
+                    results[entry] = {"status": "conflict", "detail": f"This team has already booked for {team_days[entry[0]].value} on this day."}
+                elif booked.get(entry, 0) >= max_teams:
+                    results[entry] = {"status": "conflict", "detail": f"The maximum number of teams ({max_teams}) for this time slot has been reached."}
+                elif entry in member_conflicts:
+                    results[entry] = {"status": "conflict", "detail": f"The following members already have a reservation at this time: {', '.join(sorted(member_conflicts[entry]))}"}
+                else:
+                    to_create.append(entry)
+
+            if to_create:
+                slot_counts = db.execute(
+                    update(ledger)
+                    .where(tuple_(ledger.reservation_date, ledger.time_slot).in_(to_create))
+                    .values(booked_count=ledger.booked_count + 1)
+                    .returning(ledger.reservation_date, ledger.time_slot, ledger.booked_count)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                reservations = [
+                    models.Reservation(
+                        reservation_date=reservation_date,
+                        time_slot=time_slot,
+                        team_id=batch.team_id,
+                        participants=[models.ReservationParticipant(user_id=p_id) for p_id in participant_ids]
+                    )
+                    for reservation_date, time_slot in to_create
+                ]
+                db.add_all(reservations)
+                version_service.bump_reservation_dates(db, [reservation_date for reservation_date, _ in to_create])
+                usage_service.record_bookings(db, [
+                    (reservation_date, time_slot, batch.team_id, participant_ids) for reservation_date, time_slot in to_create
+                ])
+                db.flush()
+                for entry, db_reservation in zip(to_create, reservations):
+                    results[entry] = {"status": "created", "reservation_id": db_reservation.id}
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=BOOKING_INTEGRITY_DETAIL)
+    except Exception:
+        db.rollback()
+        raise
+
+    publish_slot_counts(slot_counts, max_teams)
+    response = [
+        {"reservation_date": reservation_date, "time_slot": time_slot, **results[(reservation_date, time_slot)]}
+        for reservation_date, time_slot in entries
+    ]
+    return {
+        "created": sum(1 for item in response if item["status"] == "created"),
+        "results": response,
+    }
+
+# --- Waitlist ---
+# Teams that find a slot full can queue for it. Whenever the slot may have
+# gained a seat (when capacity is raised, and when a team joins), the queue
+# is worked front to back through the regular booking checks, one
+# transaction per entry. An entry that fails a check other than capacity is
+# dropped with the reason; a full slot stops its queue. Callers run
+# promote_waitlist on its own after their change has committed, not from
+# inside another retried transaction, so a lock retry never repeats it.
+waitlist_joined = metrics.counter("waitlist_joined_total", "Teams queued for a full slot")
+waitlist_promoted = metrics.counter("waitlist_promoted_total", "Waitlist entries turned into reservations")
+waitlist_dropped = metrics.counter("waitlist_dropped_total", "Waitlist entries dropped after failing a booking check")
+
+def _waitlist_entries(db: Session, entries):
+    """Entries as dicts (schemas.waitlist.WaitlistEntry), with the queue positions of waiting ones in one query."""
+    waiting = [entry.id for entry in entries if entry.status == models.WaitlistStatus.WAITING]
+    positions = {}
+    if waiting:
+        entry, ahead = models.WaitlistEntry, aliased(models.WaitlistEntry)
+        positions = dict(db.query(entry.id, func.count(ahead.id)).join(ahead, and_(
+            ahead.reservation_date == entry.reservation_date,
+            ahead.time_slot == entry.time_slot,
+            ahead.status == models.WaitlistStatus.WAITING,
+            ahead.id <= entry.id,
+        )).filter(entry.id.in_(waiting)).group_by(entry.id).all())
+    return [{
+        "id": entry.id,
+        "team_id": entry.team_id,
+        "reservation_date": entry.reservation_date,
+        "time_slot": entry.time_slot,
+        "status": entry.status,
+        "position": positions.get(entry.id),
+        "reservation_id": entry.reservation_id,
+        "detail": entry.detail,
+    } for entry in entries]
+
+@retry_on_lock
+def join_waitlist(db: Session, reservation: reservation_schema.ReservationCreate, user_id: int) -> int:
+    """Queue the team for the slot; returns the entry id. The caller runs ``promote_waitlist`` next."""
+    participant_ids = set(reservation.participant_ids)
+    _check_participants(db, reservation.team_id, participant_ids, user_id)
+    archive_service.check_open(db, reservation.reservation_date)
+    existing_slot = db.query(models.Reservation.time_slot).filter(
+        models.Reservation.team_id == reservation.team_id,
+        models.Reservation.reservation_date == reservation.reservation_date
+    ).first()
+    if existing_slot:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"This team has already booked for {existing_slot.time_slot.value} on this day."
+        )
+
+    entry = models.WaitlistEntry(
+        team_id=reservation.team_id,
+        reservation_date=reservation.reservation_date,
+        time_slot=reservation.time_slot,
+        requested_by=user_id,
+        participant_ids=",".join(str(p_id) for p_id in sorted(participant_ids)),
+    )
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This team is already on the waitlist for this time slot.")
+    metrics.inc(waitlist_joined)
+    return entry.id
+
+def get_waitlist_entry(db: Session, entry_id: int):
+    entry = db.get(models.WaitlistEntry, entry_id)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Waitlist entry not found.")
+    return _waitlist_entries(db, [entry])[0]
+
+def get_waitlist(db: Session, team_ids):
+    """Current and upcoming waitlist entries of the given teams."""
+    entries = db.query(models.WaitlistEntry).filter(
+        models.WaitlistEntry.team_id.in_(team_ids),
+        models.WaitlistEntry.reservation_date >= date.today(),
+    ).order_by(models.WaitlistEntry.reservation_date, models.WaitlistEntry.time_slot, models.WaitlistEntry.id).all()
+    return _waitlist_entries(db, entries)
+
+@retry_on_lock
+def leave_waitlist(db: Session, entry_id: int, team_ids):
+    deleted = db.query(models.WaitlistEntry).filter(
+        models.WaitlistEntry.id == entry_id,
+        models.WaitlistEntry.team_id.in_(team_ids),
+        models.WaitlistEntry.status == models.WaitlistStatus.WAITING,
+    ).delete(synchronize_session=False)
     db.commit()
-    db.refresh(db_reservation)
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Waitlist entry not found.")
 
-    return db_reservation
+@retry_on_lock
+def promote_waitlist(db: Session, slots=None) -> int:
+    """Book waiting teams, oldest first, while their slots have seats. Returns the number promoted.
+
+    ``slots`` limits the work to some (date, time slot) pairs; by default
+    every upcoming slot with a queue is tried.
+    """
+    query = db.query(models.WaitlistEntry).filter(
+        models.WaitlistEntry.status == models.WaitlistStatus.WAITING,
+        models.WaitlistEntry.reservation_date >= date.today(),
+    )
+    if slots is not None:
+        query = query.filter(tuple_(models.WaitlistEntry.reservation_date, models.WaitlistEntry.time_slot).in_(slots))
+    entries = query.order_by(models.WaitlistEntry.id).all()
+    if not entries:
+        return 0
+
+    max_teams = get_max_concurrent_teams(db)
+    full_slots = set()
+    promoted = 0
+    for entry in entries:
+        slot = (entry.reservation_date, entry.time_slot)
+        if slot in full_slots:
+            continue
+        participant_ids = {int(p_id) for p_id in entry.participant_ids.split(",")}
+        booking = reservation_schema.ReservationCreate(
+            reservation_date=entry.reservation_date, time_slot=entry.time_slot,
+            team_id=entry.team_id, participant_ids=sorted(participant_ids),
+        )
+        try:
+            # Membership may have changed since the team joined the queue
+            _check_participants(db, entry.team_id, participant_ids, entry.requested_by)
+            reservation_id, booked_count, day_version = _book(db, booking, participant_ids, max_teams)
+            entry.status = models.WaitlistStatus.PROMOTED
+            entry.reservation_id = reservation_id
+            db.commit()
+        except SlotFullError:
+            db.rollback()
+            full_slots.add(slot)
+            continue
+        except (HTTPException, IntegrityError) as e:
+            db.rollback()
+            entry.status = models.WaitlistStatus.DROPPED
+            entry.detail = e.detail if isinstance(e, HTTPException) else BOOKING_INTEGRITY_DETAIL
+            db.commit()
+            metrics.inc(waitlist_dropped)
+            continue
+        _booked(booking, participant_ids, day_version)
+        promoted += 1
+        metrics.inc(waitlist_promoted)
+        publish_slot_counts([(entry.reservation_date, entry.time_slot, booked_count)], max_teams)
+    return promoted
@@ -0,0 +1,252 @@
+"""Bulk roster import for users, courses, teams and memberships.
+
+A roster can be CSV with a header row, NDJSON (one object per line) or a
+JSON array. Each row has the fields:
+
+    username, full_name, password, course, team
+
+Only ``username`` is required. New users also need a password. Existing
+users get their full_name updated and keep their password. A row with
+both ``course`` and ``team`` puts the user in that team, creating the
+course and team when needed.
+
+Rows are streamed and processed ``BATCH_SIZE`` at a time. Each batch takes
+one lookup query per entity type, bulk inserts and a single commit.
+Passwords are hashed in parallel on the hashing pool, within its bulk
+limit so logins keep their share. A bad row is reported with its row
+number and does not stop the import. A batch that runs into another
+writer's lock is rolled back and retried on its own; batches already
+committed stay imported.
+
+    python -m app.services.roster_service roster.csv
+"""
+import csv
+import io
+import json
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.auth_cache import principal_cache
+from app.core.hashing import password_hasher
+from app.db import models
+from app.db.database import retry_on_lock
+from app.services import version_service
+
+ROSTER_FIELDS = ("username", "full_name", "password", "course", "team")
+ROSTER_FORMATS = ("csv", "ndjson", "json")
+BATCH_SIZE = 500
+
+def roster_format(filename: str) -> Optional[str]:
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return {"csv": "csv", "json": "json", "ndjson": "ndjson", "jsonl": "ndjson"}.get(extension)
+
+def read_roster(stream: BinaryIO, fmt: str) -> Iterator[object]:
+    """Yield raw rows from a binary stream.
+
+    A row that cannot be parsed is yielded as a ValueError, so it can be
+    reported without aborting the import.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(text)
+        elif fmt == "ndjson":
+            for line in text:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield ValueError(f"Invalid JSON: {e}")
+        elif fmt == "json":
+            data = json.load(text)
+            if not isinstance(data, list):
+                raise ValueError("A JSON roster must be an array of objects")
+            yield from data
+        else:
+            raise ValueError(f"Unsupported roster format '{fmt}'")
+    finally:
+        text.detach()
+
+def _clean(raw: dict) -> Dict[str, Optional[str]]:
+    row = {}
+    for field in ROSTER_FIELDS:
+        value = raw.get(field)
+        row[field] = str(value).strip() if value is not None and str(value).strip() else None
+    return row
+
+def _write_batch(db: Session, batch: List[Tuple[int, object]], result: dict, errors: List[dict]):
+    rows = []
+    for number, raw in batch:
+        if isinstance(raw, Exception):
+            errors.append({"row": number, "error": str(raw)})
+        elif not isinstance(raw, dict):
+            errors.append({"row": number, "error": "Row must be an object"})
+        else:
+            row = _clean(raw)
+            if not row["username"]:
+                errors.append({"row": number, "error": "username is required"})
+            elif bool(row["course"]) != bool(row["team"]):
+                errors.append({"row": number, "error": "course and team must be given together"})
+            else:
+                rows.append((number, row))
+    if not rows:
+        return
+
+    # Users
+    usernames = {row["username"] for _, row in rows}
+    existing_users = {
+        user.username: user
+        for user in db.query(models.User.id, models.User.username, models.User.full_name).filter(models.User.username.in_(usernames))
+    }
+    new_users: Dict[str, dict] = {}
+    updated_names: Dict[int, str] = {}
+    valid_rows = []
+    for number, row in rows:
+        username = row["username"]
+        existing = existing_users.get(username)
+        if existing is not None:
+            if row["full_name"] and row["full_name"] != existing.full_name:
+                updated_names[existing.id] = row["full_name"]
+        elif username not in new_users:
+            if not row["password"]:
+                errors.append({"row": number, "error": "password is required for a new user"})
+                continue
+            new_users[username] = {
+                "username": username,
+                "full_name": row["full_name"],
+                "password": row["password"],
+                "is_admin": username == "admin",
+            }
+        valid_rows.append((number, row))
+
+    if new_users:
+        hashes = password_hasher.hash_many([user["password"] for user in new_users.values()])
+        for user, hashed_password in zip(new_users.values(), hashes):
+            user["password"] = hashed_password
+        db.execute(insert(models.User), list(new_users.values()))
+    if updated_names:
+        db.execute(update(models.User), [{"id": user_id, "full_name": name} for user_id, name in updated_names.items()])
+        version_service.bump(db, [version_service.GLOBAL_SCOPE]) # Participant names appear in reservation payloads
+
+    # Courses and teams
+    course_names = {row["course"] for _, row in valid_rows if row["course"]}
+    courses = {}
+    missing_courses = set()
+    if course_names:
+        courses = {c.name: c.id for c in db.query(models.Course.id, models.Course.name).filter(models.Course.name.in_(course_names))}
+        missing_courses = course_names - courses.keys()
+        if missing_courses:
+            db.execute(insert(models.Course), [{"name": name} for name in sorted(missing_courses)])
+            courses.update({c.name: c.id for c in db.query(models.Course.id, models.Course.name).filter(models.Course.name.in_(missing_courses))})
+
+    team_names = {row["team"] for _, row in valid_rows if row["team"]}
+    teams = {}
+    missing_teams = {}
+    if team_names:
+        teams = {t.name: (t.id, t.course_id) for t in db.query(models.Team.id, models.Team.name, models.Team.course_id).filter(models.Team.name.in_(team_names))}
+        for _, row in valid_rows:
+            if row["team"] and row["team"] not in teams and row["team"] not in missing_teams:
+                missing_teams[row["team"]] = courses[row["course"]]
+        if missing_teams:
+            db.execute(insert(models.Team), [{"name": name, "course_id": course_id} for name, course_id in missing_teams.items()])
+            teams.update({t.name: (t.id, t.course_id) for t in db.query(models.Team.id, models.Team.name, models.Team.course_id).filter(models.Team.name.in_(missing_teams.keys()))})
+
+    # Memberships
+    user_ids = {u.username: u.id for u in db.query(models.User.id, models.User.username).filter(models.User.username.in_(usernames))}
+    pairs = set()
+    new_pairs = set()
+    for number, row in valid_rows:
+        if not row["team"]:
+            continue
+        team_id, course_id = teams[row["team"]]
+        if course_id != courses[row["course"]]:
+            errors.append({"row": number, "error": f"Team '{row['team']}' belongs to a different course"})
+            continue
+        pairs.add((user_ids[row["username"]], team_id))
+    if pairs:
+        existing_pairs = set(
+            db.query(models.TeamMember.user_id, models.TeamMember.team_id).filter(
+                tuple_(models.TeamMember.user_id, models.TeamMember.team_id).in_(pairs)
+            ).all()
+        )
+        new_pairs = pairs - existing_pairs
+        if new_pairs:
+            db.execute(insert(models.TeamMember), [{"user_id": u, "team_id": t} for u, t in sorted(new_pairs)])
+
+    db.commit()
+    result["users_created"] += len(new_users)
+    result["users_updated"] += len(updated_names)
+    result["courses_created"] += len(missing_courses)
+    result["teams_created"] += len(missing_teams)
+    result["memberships_added"] += len(new_pairs)
+    for user_id in {user_id for user_id, _ in new_pairs} | updated_names.keys():
+        principal_cache.invalidate_user(user_id)
+
+@retry_on_lock
+def _import_batch(db: Session, batch: List[Tuple[int, object]], result: dict):
+    # Row errors are collected per attempt, so a retried batch reports them once
+    errors = []
+    try:
+        _write_batch(db, batch, result, errors)
+    except IntegrityError as e:
+        db.rollback()
+        errors.append({
+            "row": batch[0][0],
+            "error": f"Rows {batch[0][0]}-{batch[-1][0]} were not imported: {e.orig}",
+        })
+    result["errors"].extend(errors)
+
+def import_roster(db: Session, rows: Iterable[object], batch_size: int = BATCH_SIZE) -> dict:
+    result = {
+        "rows": 0,
+        "users_created": 0,
+        "users_updated": 0,
+        "courses_created": 0,
+        "teams_created": 0,
+        "memberships_added": 0,
+        "errors": [],
+    }
+    # Row numbers are 1-based, counting data rows only
+    numbered = enumerate(rows, start=1)
+    while True:
+        try:
+            batch = list(islice(numbered, batch_size))
+        except (ValueError, csv.Error) as e:
+            result["errors"].append({"row": result["rows"] + 1, "error": f"Could not read roster: {e}"})
+            break
+        if not batch:
+            break
+        result["rows"] += len(batch)
+        _import_batch(db, batch, result)
+    return result
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import a roster of users, courses, teams and memberships.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=ROSTER_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or roster_format(args.path)
+    if fmt is None:
+        parser.error("Cannot tell the roster format from the file name; pass --format")
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            summary = import_roster(db, read_roster(stream, fmt), batch_size=args.batch_size)
+    finally:
+        db.close()
+        password_hasher.shutdown()
+    errors = summary.pop("errors")
+    print(", ".join(f"{key}: {value}" for key, value in summary.items()))
+    for error in errors:
+        print(f"row {error['row']}: {error['error']}")
@@ -0,0 +1,101 @@
+"""Typed, in-memory registry of the ``system_settings`` table.
+
+Values are parsed and validated once and then served from memory. A write
+through ``admin_service.update_setting`` bumps the row's ``version`` and
+refreshes this process immediately. Other workers notice within
+``STALENESS_SECONDS`` through a ``MAX(version)`` check on the tiny settings table.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+STALENESS_SECONDS = 2.0
+
+@dataclass(frozen=True)
+class SettingDefinition:
+    parse: Callable[[str], Any]
+    default: Any
+    validate: Callable[[Any], bool] = lambda value: True
+    description: str = ""
+
+SETTING_DEFINITIONS: Dict[str, SettingDefinition] = {
+    "max_concurrent_teams": SettingDefinition(
+        parse=int,
+        default=6,
+        validate=lambda value: value >= 1,
+        description="Maximum number of teams that can book the same time slot",
+    ),
+}
+
+class SettingsRegistry:
+    def __init__(self, definitions: Dict[str, SettingDefinition], staleness_seconds: float = STALENESS_SECONDS):
+        self.definitions = definitions
+        self.staleness_seconds = staleness_seconds
+        self._lock = threading.Lock()
+        self._raw: Dict[str, str] = {}
+        self._values: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def parse(self, key: str, raw: str) -> Any:
+        """Parse and validate a raw value. Raises ValueError if it is invalid."""
+        definition = self.definitions.get(key)
+        if definition is None:
+            return raw
+        try:
+            value = definition.parse(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for setting '{key}': {raw!r}")
+        if not definition.validate(value):
+            raise ValueError(f"Invalid value for setting '{key}': {raw!r}")
+        return value
+
+    def _load(self, db: Session, version: int):
+        raw = {row.key: row.value for row in db.query(models.SystemSettings.key, models.SystemSettings.value)}
+        values = {key: definition.default for key, definition in self.definitions.items()}
+        for key, value in raw.items():
+            try:
+                values[key] = self.parse(key, value)
+            except ValueError:
+                pass # Keep the default for values that fail validation
+        with self._lock:
+            self._raw, self._values, self._version = raw, values, version
+
+    def _sync(self, db: Session):
+        # The lock is never held across a query: under the async DB mode the
+        # query yields to the event loop, and another request could then block on it.
+        if self._version is not None and time.monotonic() - self._checked_at < self.staleness_seconds:
+            return
+        version = db.query(func.coalesce(func.max(models.SystemSettings.version), 0)).scalar()
+        if version != self._version:
+            self._load(db, version)
+        self._checked_at = time.monotonic()
+
+    def get(self, db: Session, key: str) -> Any:
+        self._sync(db)
+        return self._values.get(key)
+
+    def version(self, db: Session) -> int:
+        """Version of the values currently served, for use as a validator."""
+        self._sync(db)
+        return self._version
+
+    def all(self, db: Session) -> List[Dict[str, str]]:
+        self._sync(db)
+        return [{"key": key, "value": value} for key, value in self._raw.items()]
+
+    def refresh(self, db: Session):
+        with self._lock:
+            self._version = None
+        self._sync(db)
+
+registry = SettingsRegistry(SETTING_DEFINITIONS)
+
+def next_version(db: Session) -> int:
+    return db.query(func.coalesce(func.max(models.SystemSettings.version), 0)).scalar() + 1
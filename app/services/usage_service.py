@@ -0,0 +1,157 @@
+"""Monthly usage rollups for the admin analytics.
+
+Three tables count bookings per month:
+
+* ``team_month_usage``: reservations per team and time slot
+* ``course_month_usage``: reservations and participants per course
+* ``user_month_usage``: reservations each user takes part in
+
+The booking engine calls ``record_bookings`` in the booking transaction, so
+the rollups commit or roll back with the reservations they count. Reports
+read one month through the month indexes, so their cost does not grow
+with history. ``backfill`` rebuilds all three tables from the reservations,
+e.g. after an import that bypassed the booking engine:
+
+    python -m app.services.usage_service
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, union
+from sqlalchemy.dialects.sqlite import insert as upsert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.projections import ARCHIVE, HOT
+
+def month_key(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+def _increment(db: Session, model, key_columns, counts: Dict[tuple, tuple], value_columns):
+    if not counts:
+        return
+    stmt = upsert(model)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[getattr(model, column) for column in key_columns],
+            set_={column: getattr(model, column) + getattr(stmt.excluded, column) for column in value_columns},
+        ),
+        [
+            {**dict(zip(key_columns, key)), **dict(zip(value_columns, values))}
+            for key, values in sorted(counts.items())
+        ],
+    )
+
+def record_bookings(db: Session, bookings: Iterable[Tuple[date, models.TimeSlot, int, Iterable[int]]]):
+    """Count new (date, time slot, team id, participant ids) bookings. Call before the booking's commit."""
+    bookings = [(day, time_slot, team_id, list(participant_ids)) for day, time_slot, team_id, participant_ids in bookings]
+    if not bookings:
+        return
+    course_ids = dict(db.query(models.Team.id, models.Team.course_id).filter(
+        models.Team.id.in_({team_id for _, _, team_id, _ in bookings})
+    ))
+
+    team_counts, user_counts = Counter(), Counter()
+    course_counts: Dict[tuple, list] = {}
+    for day, time_slot, team_id, participant_ids in bookings:
+        month = month_key(day)
+        team_counts[(team_id, month, time_slot)] += 1
+        totals = course_counts.setdefault((course_ids[team_id], month), [0, 0])
+        totals[0] += 1
+        totals[1] += len(participant_ids)
+        for user_id in participant_ids:
+            user_counts[(user_id, month)] += 1
+
+    _increment(db, models.TeamMonthUsage, ("team_id", "month", "time_slot"), {key: (n,) for key, n in team_counts.items()}, ("reservations",))
+    _increment(db, models.CourseMonthUsage, ("course_id", "month"), {key: tuple(n) for key, n in course_counts.items()}, ("reservations", "participants"))
+    _increment(db, models.UserMonthUsage, ("user_id", "month"), {key: (n,) for key, n in user_counts.items()}, ("participations",))
+
+def backfill(db: Session) -> Dict[str, int]:
+    """Rebuild the rollups from the reservations, hot and archived, in one transaction. Returns the row counts."""
+    # UNION, not UNION ALL: a month being archived is in both places until its hot rows are deleted
+    reservations = union(*(
+        select(tables.reservation.id, tables.reservation.team_id, tables.reservation.reservation_date, tables.reservation.time_slot)
+        for tables in (HOT, ARCHIVE)
+    )).subquery("reservations")
+    participants = union(*(
+        select(tables.participant.reservation_id, tables.participant.user_id) for tables in (HOT, ARCHIVE)
+    )).subquery("participants")
+    reservation, participant = reservations.c, participants.c
+    month = func.strftime("%Y-%m", reservation.reservation_date)
+
+    for model in (models.TeamMonthUsage, models.CourseMonthUsage, models.UserMonthUsage):
+        db.execute(delete(model))
+    db.execute(insert(models.TeamMonthUsage).from_select(
+        ["team_id", "month", "time_slot", "reservations"],
+        select(reservation.team_id, month, reservation.time_slot, func.count())
+        .group_by(reservation.team_id, month, reservation.time_slot),
+    ))
+    participant_counts = select(participant.reservation_id, func.count().label("participants")).group_by(participant.reservation_id).subquery()
+    db.execute(insert(models.CourseMonthUsage).from_select(
+        ["course_id", "month", "reservations", "participants"],
+        select(models.Team.course_id, month, func.count(), func.coalesce(func.sum(participant_counts.c.participants), 0))
+        .select_from(reservations)
+        .join(models.Team, models.Team.id == reservation.team_id)
+        .outerjoin(participant_counts, participant_counts.c.reservation_id == reservation.id)
+        .group_by(models.Team.course_id, month),
+    ))
+    db.execute(insert(models.UserMonthUsage).from_select(
+        ["user_id", "month", "participations"],
+        select(participant.user_id, month, func.count())
+        .join(reservations, reservation.id == participant.reservation_id)
+        .group_by(participant.user_id, month),
+    ))
+    db.commit()
+    return {
+        model.__tablename__: db.query(func.count()).select_from(model).scalar()
+        for model in (models.TeamMonthUsage, models.CourseMonthUsage, models.UserMonthUsage)
+    }
+
+# --- Reports ---
+
+def get_course_usage(db: Session, year: int, month: int):
+    usage = models.CourseMonthUsage
+    rows = db.query(usage.course_id, models.Course.name, usage.reservations, usage.participants).join(
+        models.Course, models.Course.id == usage.course_id
+    ).filter(usage.month == f"{year:04d}-{month:02d}").order_by(usage.reservations.desc(), usage.course_id)
+    return [row._asdict() for row in rows]
+
+def get_team_usage(db: Session, year: int, month: int, course_id: Optional[int] = None):
+    usage = models.TeamMonthUsage
+    query = db.query(usage.team_id, models.Team.name, models.Team.course_id, usage.time_slot, usage.reservations).join(
+        models.Team, models.Team.id == usage.team_id
+    ).filter(usage.month == f"{year:04d}-{month:02d}")
+    if course_id is not None:
+        query = query.filter(models.Team.course_id == course_id)
+
+    teams: Dict[int, dict] = {}
+    for row in query:
+        team = teams.setdefault(row.team_id, {
+            "team_id": row.team_id,
+            "name": row.name,
+            "course_id": row.course_id,
+            "reservations": 0,
+            "by_time_slot": {time_slot.value: 0 for time_slot in models.TimeSlot},
+        })
+        team["reservations"] += row.reservations
+        team["by_time_slot"][row.time_slot.value] = row.reservations
+    return sorted(teams.values(), key=lambda team: (-team["reservations"], team["team_id"]))
+
+def get_user_usage(db: Session, year: int, month: int, limit: int = 100):
+    """The most active users of a month."""
+    usage = models.UserMonthUsage
+    rows = db.query(usage.user_id, models.User.username, models.User.full_name, usage.participations).join(
+        models.User, models.User.id == usage.user_id
+    ).filter(usage.month == f"{year:04d}-{month:02d}").order_by(usage.participations.desc(), usage.user_id).limit(limit)
+    return [row._asdict() for row in rows]
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for table, count in backfill(db).items():
+            print(f"{table:<20} {count:>10,}")
+    finally:
+        db.close()
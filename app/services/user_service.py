@@ -1,13 +1,28 @@
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.db import models
+from app.db import models, loaders
+from app.db.database import retry_on_lock
 from app.schemas.user import UserCreate
 from app.core.security import get_password_hash
+from app.core.auth_cache import Principal
 
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def get_principal(db: Session, username: str):
+    user = db.query(models.User.id, models.User.username, models.User.is_admin).filter(models.User.username == username).first()
+    if user is None:
+        return None
+    team_ids = frozenset(row.team_id for row in db.query(models.TeamMember.team_id).filter(models.TeamMember.user_id == user.id))
+    return Principal(id=user.id, username=user.username, is_admin=bool(user.is_admin), team_ids=team_ids)
+
+def get_user_details(db: Session, user_id: int):
+    return db.query(models.User).options(*loaders.USER_DETAILS).filter(models.User.id == user_id).first()
+
+@retry_on_lock
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     # If username is 'admin', make them an admin user.
     is_admin = True if user.username == 'admin' else False
     db_user = models.User(
@@ -19,4 +34,9 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+@retry_on_lock
+def update_password_hash(db: Session, user_id: int, hashed_password: str):
+    db.query(models.User).filter(models.User.id == user_id).update({models.User.password: hashed_password})
+    db.commit()
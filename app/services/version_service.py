@@ -0,0 +1,61 @@
+"""Version stamps behind the ETags of reservation reads.
+
+Every write that changes what a read returns bumps the stamps of the scopes
+it touches, in its own transaction, so a stamp never gets ahead of the data.
+Checking a stamp is a primary-key lookup on ``data_versions`` and never
+touches the reservation tables.
+"""
+from datetime import date
+from typing import Dict, Iterable
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+# Bumped by writes that can change any reservation payload, such as renamed users
+GLOBAL_SCOPE = "reservations"
+
+def month_scope(year: int, month: int) -> str:
+    return f"month:{year:04d}-{month:02d}"
+
+def date_scope(day: date) -> str:
+    return f"date:{day.isoformat()}"
+
+def bump(db: Session, scopes: Iterable[str]):
+    """Increment the stamps of ``scopes``. Call before the write's commit."""
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    stmt = insert(models.DataVersion)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[models.DataVersion.scope],
+            set_={"version": models.DataVersion.version + 1},
+        ),
+        [{"scope": scope, "version": 1} for scope in scopes],
+    )
+
+def bump_reservation_dates(db: Session, days: Iterable[date]):
+    scopes = set()
+    for day in days:
+        scopes.add(month_scope(day.year, day.month))
+        scopes.add(date_scope(day))
+    bump(db, scopes)
+
+def get_versions(db: Session, scopes: Iterable[str]) -> Dict[str, int]:
+    scopes = list(scopes)
+    versions = dict.fromkeys(scopes, 0)
+    versions.update(
+        db.query(models.DataVersion.scope, models.DataVersion.version).filter(models.DataVersion.scope.in_(scopes)).all()
+    )
+    return versions
+
+def reservations_etag(db: Session, scope: str) -> str:
+    """Strong ETag for a reservation read covered by ``scope``.
+
+    Read it before the payload: a write landing in between then only costs
+    the client one extra full response, never a stale 304.
+    """
+    versions = get_versions(db, [scope, GLOBAL_SCOPE])
+    return f'"{scope}.{versions[scope]}.{versions[GLOBAL_SCOPE]}"'
@@ -38,9 +38,17 @@ document.addEventListener('DOMContentLoaded', async function () {
 });
 
 // --- Admin Dashboard Logic ---
+let openAdminDate = null;
+
 async function initializeAdminDashboard() {
     const today = new Date();
     await renderAdminCalendar(today.getFullYear(), today.getMonth() + 1);
+    // Keep an open day modal current while other teams book
+    subscribeAvailability(today.getFullYear(), today.getMonth() + 1, message => {
+        if (message.type === 'slots' && message.slots.some(s => s.reservation_date === openAdminDate)) {
+            openAdminDayModal(openAdminDate);
+        }
+    });
 }
 
 async function renderAdminCalendar(year, month) {
@@ -66,6 +74,7 @@ async function openAdminDayModal(date) {
     dateDisplay.textContent = date;
     detailsContainer.innerHTML = 'Loading...';
     modal.style.display = 'block';
+    openAdminDate = date;
 
     const token = localStorage.getItem('accessToken');
     try {
@@ -102,14 +111,19 @@ async function openAdminDayModal(date) {
     }
 
     // Add close functionality
-    modal.querySelector('.close-button').onclick = () => modal.style.display = 'none';
+    modal.querySelector('.close-button').onclick = () => closeAdminDayModal(modal);
     window.onclick = function(event) {
         if (event.target == modal) {
-            modal.style.display = 'none';
+            closeAdminDayModal(modal);
         }
     }
 }
 
+function closeAdminDayModal(modal) {
+    modal.style.display = 'none';
+    openAdminDate = null;
+}
+
 // --- Settings Page Logic ---
 async function initializeSettingsPage() {
     const form = document.getElementById('settings-form');
@@ -0,0 +1,65 @@
+// Live availability updates for one month, pushed by the server as
+// server-sent events. fetch() is used instead of EventSource so the request
+// can carry the Authorization header.
+//
+// onMessage receives {type: 'ready'} whenever the stream (re)connects and
+// the caller should (re)load its snapshot, then 'slots', 'capacity' and
+// 'resync' messages.
+function subscribeAvailability(year, month, onMessage) {
+    const controller = new AbortController();
+    let retryDelay = 1000;
+
+    async function connect() {
+        const token = localStorage.getItem('accessToken');
+        try {
+            const response = await fetch(`/api/student/reservations/stream?year=${year}&month=${month}`, {
+                headers: { 'Authorization': `Bearer ${token}` },
+                signal: controller.signal
+            });
+            if (response.status === 401) {
+                logout();
+                return;
+            }
+            if (!response.ok) throw new Error('Availability stream failed');
+
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += value;
+                let end;
+                while ((end = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, end);
+                    buffer = buffer.slice(end + 2);
+                    handleFrame(frame);
+                }
+                retryDelay = 1000;
+            }
+        } catch (error) {
+            if (controller.signal.aborted) return;
+            console.error(error);
+        }
+        if (!controller.signal.aborted) {
+            setTimeout(connect, retryDelay);
+            retryDelay = Math.min(retryDelay * 2, 30000);
+        }
+    }
+
+    function handleFrame(frame) {
+        let event = 'message';
+        let data = '';
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (event === 'ready') {
+            onMessage({ type: 'ready' });
+        } else if (data) {
+            onMessage(JSON.parse(data));
+        }
+    }
+
+    connect();
+    return { close: () => controller.abort() };
+}
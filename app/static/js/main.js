@@ -5,6 +5,11 @@ document.addEventListener('DOMContentLoaded', function () {
 });
 
 let currentUser = null;
+let calendarState = null;
+let availabilitySubscription = null;
+let snapshotLoad = 0; // Id of the latest snapshot request; older ones are discarded
+let pendingMessages = null; // Updates received while a snapshot loads, or null
+const TIME_SLOTS = ['MORNING', 'LUNCH', 'DINNER'];
 
 async function initializeReservationPage() {
     const token = localStorage.getItem('accessToken');
@@ -16,7 +21,7 @@ async function initializeReservationPage() {
 
     await fetchUserData(token);
     const today = new Date();
-    await renderCalendar(today.getFullYear(), today.getMonth() + 1);
+    showMonth(today.getFullYear(), today.getMonth() + 1);
 }
 
 async function fetchUserData(token) {
@@ -33,23 +38,73 @@ async function fetchUserData(token) {
     }
 }
 
+// Subscribe to live updates for the month; the calendar is (re)loaded
+// whenever the stream reports it is ready, so no update is missed.
+// Updates that arrive while the snapshot is in flight are held back and
+// applied on top of it, in order: they may postdate the snapshot.
+function showMonth(year, month) {
+    if (availabilitySubscription) availabilitySubscription.close();
+    calendarState = { year, month, maxTeams: 0, slots: new Map(), mySlots: new Set() };
+    snapshotLoad++;
+    pendingMessages = null;
+    availabilitySubscription = subscribeAvailability(year, month, handleAvailabilityMessage);
+}
+
+function handleAvailabilityMessage(message) {
+    if (!calendarState) return;
+    if (message.type === 'ready' || message.type === 'resync') {
+        renderCalendar(calendarState.year, calendarState.month);
+    } else if (pendingMessages) {
+        pendingMessages.push(message);
+    } else {
+        applyAvailabilityMessage(message);
+    }
+}
+
+function applyAvailabilityMessage(message) {
+    if (message.type === 'slots') {
+        calendarState.maxTeams = message.max_concurrent_teams;
+        message.slots.forEach(s => {
+            calendarState.slots.set(`${s.reservation_date}|${s.time_slot}`, s);
+            renderDaySlots(s.reservation_date);
+        });
+    } else if (message.type === 'capacity') {
+        calendarState.maxTeams = message.max_concurrent_teams;
+        calendarState.slots.forEach(s => {
+            s.remaining = Math.max(calendarState.maxTeams - s.booked_count, 0);
+        });
+        document.querySelectorAll('#calendar .day').forEach(dayEl => renderDaySlots(dayEl.dataset.date));
+    }
+}
+
 async function renderCalendar(year, month) {
     const calendarEl = document.getElementById('calendar');
     calendarEl.innerHTML = '';
     // Calendar header etc. would go here
 
+    const load = ++snapshotLoad;
+    pendingMessages = pendingMessages || [];
     const token = localStorage.getItem('accessToken');
-    let reservations = [];
+    let summary = { slots: [], my_reservations: [], max_concurrent_teams: 0 };
     try {
-        const response = await fetch(`/api/student/reservations?year=${year}&month=${month}`, {
+        const response = await fetch(`/api/student/reservations/summary?year=${year}&month=${month}`, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         if(response.ok) {
-            reservations = await response.json();
+            summary = await response.json();
         }
     } catch (error) {
         console.error("Could not fetch reservations");
     }
+    if (load !== snapshotLoad) return; // A newer snapshot is on its way
+
+    calendarState = {
+        year,
+        month,
+        maxTeams: summary.max_concurrent_teams,
+        slots: new Map(summary.slots.map(s => [`${s.reservation_date}|${s.time_slot}`, s])),
+        mySlots: new Set(summary.my_reservations.map(r => `${r.reservation_date}|${r.time_slot}`))
+    };
 
     const daysInMonth = new Date(year, month, 0).getDate();
     for (let i = 1; i <= daysInMonth; i++) {
@@ -57,21 +112,32 @@ async function renderCalendar(year, month) {
         dayEl.className = 'day';
         const currentDateStr = `${year}-${String(month).padStart(2, '0')}-${String(i).padStart(2, '0')}`;
         dayEl.dataset.date = currentDateStr;
-        
-        let dayContent = `<div class="day-number">${i}</div>`;
-        const dayReservations = reservations.filter(r => r.reservation_date === currentDateStr);
-        if(dayReservations.length > 0) {
-            dayContent += `<div class="reservations">`;
-            dayReservations.forEach(r => {
-                dayContent += `<div class="reservation-tag">${r.time_slot}</div>`;
-            });
-            dayContent += `</div>`;
-        }
-
-        dayEl.innerHTML = dayContent;
+        dayEl.innerHTML = `<div class="day-number">${i}</div><div class="reservations"></div>`;
         dayEl.addEventListener('click', () => openModal(currentDateStr));
         calendarEl.appendChild(dayEl);
+        renderDaySlots(currentDateStr);
     }
+
+    const held = pendingMessages;
+    pendingMessages = null;
+    held.forEach(applyAvailabilityMessage);
+}
+
+function renderDaySlots(dateStr) {
+    const container = document.querySelector(`#calendar .day[data-date="${dateStr}"] .reservations`);
+    if (!container) return;
+
+    let content = '';
+    TIME_SLOTS.forEach(slot => {
+        const key = `${dateStr}|${slot}`;
+        const s = calendarState.slots.get(key);
+        if (!s || s.booked_count === 0) return;
+        let tagClass = 'reservation-tag';
+        if (s.remaining === 0) tagClass += ' full';
+        if (calendarState.mySlots.has(key)) tagClass += ' mine';
+        content += `<div class="${tagClass}">${slot} ${s.booked_count}/${calendarState.maxTeams}</div>`;
+    });
+    container.innerHTML = content;
 }
 
 // --- Modal & Form Logic ---
@@ -136,6 +202,29 @@ function closeModal() {
     modal.style.display = 'none';
 }
 
+async function joinWaitlist(reservationData, token) {
+    const response = await fetch('/api/student/waitlist', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify(reservationData)
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        modalErrorMessage.textContent = data.detail || '대기자 등록에 실패했습니다.';
+        modalErrorMessage.style.display = 'block';
+        return;
+    }
+    if (data.status === 'PROMOTED') {
+        alert('자리가 나서 바로 예약되었습니다.');
+    } else {
+        alert(`대기자 명단에 등록되었습니다. (대기 순번: ${data.position})`);
+    }
+    closeModal();
+}
+
 closeButton.onclick = closeModal;
 window.onclick = function(event) {
     if (event.target == modal) {
@@ -185,6 +274,8 @@ reservationForm.addEventListener('submit', async function(e) {
             closeModal();
             const date = new Date(reservationDateInput.value);
             await renderCalendar(date.getFullYear(), date.getMonth() + 1);
+        } else if (response.status === 409 && response.headers.get('X-Slot-Full') && confirm('이 시간대는 마감되었습니다. 대기자 명단에 등록할까요? 자리가 나면 자동으로 예약됩니다.')) {
+            await joinWaitlist(reservationData, token);
         } else {
             const errorData = await response.json();
             modalErrorMessage.textContent = errorData.detail || '예약에 실패했습니다.';
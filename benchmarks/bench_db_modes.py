@@ -0,0 +1,79 @@
+"""Compare requests per second of DB_MODE=sync and DB_MODE=async at high concurrency.
+
+Starts a uvicorn server per mode against the configured DATABASE_URL and
+drives it with concurrent authenticated month-view and /users/me requests.
+Needs a seeded database (``python -m app.db.seed``) and ``httpx``:
+
+    python -m benchmarks.bench_db_modes [--concurrency 200] [--requests 4000]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_MODE=mode)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn ({mode}) did not start")
+
+async def drive(base_url: str, username: str, password: str, concurrency: int, total: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        response = await client.post("/api/auth/token", data={"username": username, "password": password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        paths = ["/api/student/reservations?year=2026&month=11", "/api/auth/users/me"]
+        remaining = iter(range(total))
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            for i in remaining:
+                r = await client.get(paths[i % len(paths)], headers=headers)
+                if r.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start), errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--username", default="student1")
+    parser.add_argument("--password", default="password123")
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        server = start_server(mode, args.port)
+        try:
+            rps, errors = asyncio.run(drive(
+                f"http://127.0.0.1:{args.port}", args.username, args.password, args.concurrency, args.requests
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{mode:>5}: {rps:8.1f} req/s ({errors} errors, concurrency {args.concurrency})")
+
+if __name__ == "__main__":
+    main()
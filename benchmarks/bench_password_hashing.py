@@ -0,0 +1,49 @@
+"""Microbenchmark: password verifications (logins) per second per core.
+
+    BCRYPT_ROUNDS=12 python -m benchmarks.bench_password_hashing [--logins 200] [--workers N]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.core import security
+from app.core.config import settings
+from app.core.hashing import PasswordHasherPool
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # A hash made under the current policy, so no login triggers a rehash
+    hashed = security.get_password_hash("password123")
+
+    # Inline, on one core
+    sample = max(args.logins // 10, 5)
+    start = time.perf_counter()
+    for _ in range(sample):
+        security.verify_password("password123", hashed)
+    inline_rate = sample / (time.perf_counter() - start)
+
+    # Through the hashing pool
+    pool = PasswordHasherPool(max_workers=args.workers, max_pending=args.logins)
+
+    async def run():
+        await pool.verify_and_update("password123", hashed) # Warm up the worker processes
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.verify_and_update("password123", hashed) for _ in range(args.logins)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    pool.shutdown()
+    pool_rate = args.logins / elapsed
+
+    print(f"bcrypt rounds:        {settings.BCRYPT_ROUNDS}")
+    print(f"inline (1 core):      {inline_rate:8.1f} logins/s")
+    print(f"pool ({args.workers} workers):    {pool_rate:8.1f} logins/s")
+    print(f"pool per core:        {pool_rate / args.workers:8.1f} logins/s/core")
+
+if __name__ == "__main__":
+    main()
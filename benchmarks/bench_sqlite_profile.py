@@ -0,0 +1,114 @@
+"""Mixed read/write throughput with and without the SQLite connection profile.
+
+Reader threads load month availability while writer threads book slots,
+for a fixed duration, against a fresh temporary database per run:
+
+    python -m benchmarks.bench_sqlite_profile [--readers 8] [--writers 4] [--seconds 10]
+
+"default" is SQLite's stock rollback journal, with no PRAGMAs. "profile"
+is app.db.database.sqlite_profile (WAL, synchronous=NORMAL, busy_timeout,
+cache_size, mmap_size). Sample runs on a 1-CPU container, 10s each:
+
+    4 readers, 4 writers
+     default:  reads    506.1/s  writes    38.9/s  lock errors 0
+     profile:  reads    554.8/s  writes    55.4/s  lock errors 0
+    8 readers, 4 writers
+     default:  reads    560.2/s  writes    20.3/s  lock errors 0
+     profile:  reads    569.3/s  writes    20.8/s  lock errors 0
+
+With a single core the GIL, not SQLite locking, is the limit once readers
+outnumber writers. Run on a multi-core host to see the effect of WAL more clearly.
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base, build_engine, sqlite_profile
+from app.schemas.reservation import ReservationCreate
+from app.services import reservation_service
+
+TEAMS = 400
+
+def prepare(path: str, profile):
+    engine = build_engine(f"sqlite:///{path}", profile=profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    db.add(models.Course(id=1, name="bench"))
+    db.add(models.SystemSettings(key="max_concurrent_teams", value=str(TEAMS)))
+    db.add_all(models.Team(id=t, name=f"team{t}", course_id=1) for t in range(1, TEAMS + 1))
+    db.add_all(models.User(id=t, username=f"user{t}", password="x", full_name=f"User {t}") for t in range(1, TEAMS + 1))
+    db.add_all(models.TeamMember(user_id=t, team_id=t) for t in range(1, TEAMS + 1))
+    db.commit()
+    db.close()
+    return engine, Session
+
+def run(profile, readers: int, writers: int, seconds: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session = prepare(os.path.join(tmp, "bench.db"), profile)
+        counts = {"reads": 0, "writes": 0, "lock_errors": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+        next_booking = iter(range(10**9))
+
+        def read_loop():
+            db = Session()
+            while time.monotonic() < deadline:
+                reservation_service.get_month_availability(db, 2026, 11, user_id=1)
+                db.rollback()
+                with lock:
+                    counts["reads"] += 1
+            db.close()
+
+        def write_loop():
+            db = Session()
+            while time.monotonic() < deadline:
+                with lock:
+                    n = next(next_booking)
+                team_id = n % TEAMS + 1
+                booking = ReservationCreate(
+                    reservation_date=datetime.date(2026, 11, 1) + datetime.timedelta(days=n // TEAMS),
+                    time_slot=models.TimeSlot.LUNCH,
+                    team_id=team_id,
+                    participant_ids=[team_id],
+                )
+                try:
+                    # Bypass retry_on_lock so lock errors are counted, not hidden
+                    reservation_service.create_reservation.__wrapped__(db, booking, user_id=team_id)
+                    key = "writes"
+                except OperationalError:
+                    db.rollback()
+                    key = "lock_errors"
+                with lock:
+                    counts[key] += 1
+            db.close()
+
+        threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+        threads += [threading.Thread(target=write_loop) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+        return {key: value / seconds if key != "lock_errors" else value for key, value in counts.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    for name, profile in (("default", None), ("profile", sqlite_profile)):
+        result = run(profile, args.readers, args.writers, args.seconds)
+        print(f"{name:>8}:  reads {result['reads']:8.1f}/s  writes {result['writes']:7.1f}/s  lock errors {result['lock_errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Load harness for the booking flow: login storm, calendar browsing and a booking rush.
+
+Runs against the app in-process (ASGI, the default) or against a running
+server with ``--url``. It creates its own fixture if missing: one course,
+``--teams`` teams of ``--team-size`` students, all with the password
+``password123``, plus the rush bookings. In-process runs write to a
+temporary copy of the configured DATABASE_URL, which is deleted
+afterwards. Writing to the configured database itself, which a ``--url``
+server necessarily uses, takes ``--use-configured-db``. Then it runs three
+scenarios:
+
+* login:   every fixture user logs in at once (bounded by ``--concurrency``)
+* browse:  every user loads the month summary, the month list and /users/me
+           ``--browse-rounds`` times
+* rush:    one member of every team books the same (date, time slot) at the
+           same instant; all but ``max_concurrent_teams`` must get a 409
+
+Each scenario reports throughput, p50/p95/p99 latency, error and conflict
+ratios and, in-process only, SQL statements per request. Save a run with
+``--output`` and compare a later run against it with ``--baseline``:
+
+    python -m benchmarks.load_harness --output baseline.json
+    python -m benchmarks.load_harness --baseline baseline.json
+    python -m benchmarks.load_harness --url http://127.0.0.1:8000 --use-configured-db
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from contextlib import closing, nullcontext
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import func
+from sqlalchemy.engine import make_url
+
+from app.core import security
+from app.core.config import settings
+# Modules that build the engine (app.db.*) are imported once use_database
+# has picked the database.
+
+ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = "password123"
+COURSE_NAME = "Load test"
+
+def use_database(use_configured: bool, tmp_dir: str) -> str:
+    """Point the app at the database the harness writes to; return its URL.
+
+    Unless ``use_configured`` is set, that is a copy of the configured
+    SQLite database (or an empty one) in ``tmp_dir``. Must run before
+    anything imports ``app.db.database``.
+    """
+    if use_configured:
+        return settings.DATABASE_URL
+    path = os.path.join(tmp_dir, "load_harness.db")
+    source = make_url(settings.DATABASE_URL).database
+    if settings.DATABASE_URL.startswith("sqlite") and source and source != ":memory:" and os.path.exists(source):
+        with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(path)) as dst:
+            src.backup(dst) # Includes anything still in the WAL
+    settings.DATABASE_URL = f"sqlite:///{path}"
+    return settings.DATABASE_URL
+
+def ensure_fixture(teams: int, team_size: int) -> List[dict]:
+    """Create the load-test users and teams if missing; return them as [{id, username, team_id}]."""
+    from app.db import migrations, models
+    from app.db.database import SessionLocal, engine
+
+    migrations.setup_schema(engine)
+    db = SessionLocal()
+    try:
+        course = db.query(models.Course).filter(models.Course.name == COURSE_NAME).first()
+        if course is None:
+            course = models.Course(name=COURSE_NAME)
+            db.add(course)
+            db.flush()
+        hashed = None
+        members = []
+        for t in range(1, teams + 1):
+            team_name = f"load-team-{t}"
+            team = db.query(models.Team).filter(models.Team.name == team_name).first()
+            if team is None:
+                team = models.Team(name=team_name, course_id=course.id)
+                db.add(team)
+                db.flush()
+            for m in range(1, team_size + 1):
+                username = f"load{t}-{m}"
+                user = db.query(models.User).filter(models.User.username == username).first()
+                if user is None:
+                    hashed = hashed or security.get_password_hash(PASSWORD) # One hash for all users
+                    user = models.User(username=username, full_name=f"Load {t}-{m}", password=hashed)
+                    db.add(user)
+                    db.flush()
+                    db.add(models.TeamMember(user_id=user.id, team_id=team.id))
+                members.append({"id": user.id, "username": username, "team_id": team.id})
+        db.commit()
+        return members
+    finally:
+        db.close()
+
+def free_rush_date() -> date:
+    """A date after every existing reservation, so the rush slot starts empty."""
+    from app.db import models
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        latest = db.query(func.max(models.Reservation.reservation_date)).scalar()
+    finally:
+        db.close()
+    return max(latest or date.today(), date.today()) + timedelta(days=1)
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class ScenarioStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.statements: Optional[int] = None
+        self.elapsed = 0.0
+
+    async def call(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies.append(time.perf_counter() - start)
+            self.statuses["transport_error"] += 1
+            return None
+        self.latencies.append(time.perf_counter() - start)
+        self.statuses[response.status_code] += 1
+        return response
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        conflicts = self.statuses.get(409, 0)
+        ok = sum(count for status, count in self.statuses.items() if isinstance(status, int) and status < 400)
+        ms = lambda value: None if value is None else round(value * 1000, 2)
+        return {
+            "requests": requests,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(requests / self.elapsed, 1) if self.elapsed else None,
+            "latency_ms": {
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "p99": ms(percentile(latencies, 99)),
+                "max": ms(latencies[-1] if latencies else None),
+            },
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            "error_ratio": round((requests - ok - conflicts) / requests, 4) if requests else None,
+            "conflict_ratio": round(conflicts / requests, 4) if requests else None,
+            "sql_statements_per_request": round(self.statements / requests, 2) if self.statements is not None and requests else None,
+        }
+
+class Harness:
+    def __init__(self, client: httpx.AsyncClient, members: List[dict], concurrency: int, count_statements: bool):
+        self.client = client
+        self.members = members
+        self.concurrency = concurrency
+        self.count_statements = count_statements
+        self.tokens: Dict[str, str] = {}
+
+    async def run(self, name: str, jobs, concurrency: Optional[int] = None) -> ScenarioStats:
+        """Run ``jobs`` (coroutine functions taking the stats) with at most ``concurrency`` in flight."""
+        from app.db.query_counter import QueryCounter
+
+        stats = ScenarioStats(name)
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def bounded(job):
+            async with semaphore:
+                await job(stats)
+
+        with QueryCounter(_counted_engine()) if self.count_statements else nullcontext() as counter:
+            start = time.perf_counter()
+            await asyncio.gather(*(bounded(job) for job in jobs))
+            stats.elapsed = time.perf_counter() - start
+        if counter is not None:
+            stats.statements = counter.count
+        return stats
+
+    def headers(self, username: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[username]}"}
+
+    async def login_storm(self) -> ScenarioStats:
+        async def login(member, stats):
+            response = await stats.call(self.client, "POST", "/api/auth/token", data={"username": member["username"], "password": PASSWORD})
+            if response is not None and response.status_code == 200:
+                self.tokens[member["username"]] = response.json()["access_token"]
+        return await self.run("login", [lambda stats, m=member: login(m, stats) for member in self.members])
+
+    async def browse(self, rounds: int, year: int, month: int) -> ScenarioStats:
+        paths = [
+            f"/api/student/reservations/summary?year={year}&month={month}",
+            f"/api/student/reservations?year={year}&month={month}",
+            "/api/auth/users/me",
+        ]
+
+        async def browse_user(username, stats):
+            for _ in range(rounds):
+                for path in paths:
+                    await stats.call(self.client, "GET", path, headers=self.headers(username))
+
+        users = [member["username"] for member in self.members if member["username"] in self.tokens]
+        return await self.run("browse", [lambda stats, u=username: browse_user(u, stats) for username in users])
+
+    async def booking_rush(self, rush_date: date, time_slot: str) -> ScenarioStats:
+        leads = {}
+        for member in self.members:
+            if member["username"] in self.tokens:
+                leads.setdefault(member["team_id"], member)
+        start = asyncio.Event()
+
+        async def book(member, stats):
+            await start.wait()
+            await stats.call(self.client, "POST", "/api/student/reservations", headers=self.headers(member["username"]), json={
+                "reservation_date": rush_date.isoformat(),
+                "time_slot": time_slot,
+                "team_id": member["team_id"],
+                "participant_ids": [member["id"]],
+            })
+
+        async def release():
+            await asyncio.sleep(0.05) # Let every request reach the barrier first
+            start.set()
+
+        # The rush is not bounded by --concurrency: every team fires at once
+        release_task = asyncio.get_running_loop().create_task(release())
+        stats = await self.run("rush", [lambda stats, m=member: book(m, stats) for member in leads.values()], concurrency=max(len(leads), 1))
+        await release_task
+        return stats
+
+def _counted_engine():
+    from app.db.database import async_engine, engine
+
+    if settings.DB_MODE == "async":
+        return async_engine.sync_engine
+    return engine
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_scenarios(args, members: List[dict]) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120)
+        lifespan = nullcontext()
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://harness", timeout=120)
+        # ASGITransport sends no lifespan events; run startup (schema, cache
+        # warming) and shutdown (hashing workers) around the scenarios as a
+        # server would
+        lifespan = app.router.lifespan_context(app)
+
+    rush_date = args.rush_date or free_rush_date()
+    async with lifespan, client:
+        harness = Harness(client, members, args.concurrency, count_statements=not args.url)
+        results = {}
+        for stats in [
+            await harness.login_storm(),
+            await harness.browse(args.browse_rounds, rush_date.year, rush_date.month),
+            await harness.booking_rush(rush_date, args.time_slot),
+        ]:
+            results[stats.name] = stats.summary()
+        results["rush"]["slot"] = {"reservation_date": rush_date.isoformat(), "time_slot": args.time_slot}
+    return results
+
+def print_results(results: Dict[str, dict], baseline: Optional[dict]):
+    print(f"{'scenario':<8} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'409s':>7} {'SQL/req':>8}")
+    for name, s in results.items():
+        latency = s["latency_ms"]
+        sql = "-" if s["sql_statements_per_request"] is None else f"{s['sql_statements_per_request']:.2f}"
+        print(
+            f"{name:<8} {s['requests']:>6} {s['throughput_rps']:>8} {latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8} "
+            f"{s['error_ratio']:>7.2%} {s['conflict_ratio']:>7.2%} {sql:>8}"
+        )
+    if baseline:
+        print(f"\nvs. baseline {baseline['meta'].get('git_revision')} ({baseline['meta']['started_at']}):")
+        for name, s in results.items():
+            base = baseline["scenarios"].get(name)
+            if not base:
+                continue
+            change = lambda new, old: "n/a" if not new or not old else f"{(new - old) / old:+.1%}"
+            print(
+                f"{name:<8} req/s {change(s['throughput_rps'], base['throughput_rps']):>8}   "
+                f"p95 {change(s['latency_ms']['p95'], base['latency_ms']['p95']):>8}   "
+                f"p99 {change(s['latency_ms']['p99'], base['latency_ms']['p99']):>8}"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running server; in-process ASGI if omitted")
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--team-size", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--browse-rounds", type=int, default=5)
+    parser.add_argument("--rush-date", type=date.fromisoformat, help="Default: the day after the latest reservation")
+    parser.add_argument("--time-slot", default="LUNCH", choices=["MORNING", "LUNCH", "DINNER"])
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previous --output file")
+    parser.add_argument(
+        "--use-configured-db", action="store_true",
+        help="Write the fixture and bookings to the configured DATABASE_URL instead of a temporary copy",
+    )
+    args = parser.parse_args()
+    if args.url and not args.use_configured_db:
+        parser.error("--url writes the fixture to the server's own database; pass --use-configured-db to confirm")
+
+    with tempfile.TemporaryDirectory(prefix="load-harness-") as tmp_dir:
+        use_database(args.use_configured_db, tmp_dir)
+        members = ensure_fixture(args.teams, args.team_size)
+        started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        scenarios = asyncio.run(run_scenarios(args, members))
+        if not args.use_configured_db:
+            from app.db.database import async_engine, engine
+
+            engine.dispose() # Release the copy before the directory is removed
+            if async_engine is not None:
+                asyncio.run(async_engine.dispose())
+    results = {
+        "meta": {
+            "started_at": started_at,
+            "git_revision": _git_revision(),
+            "target": args.url or "asgi",
+            "db_mode": settings.DB_MODE,
+            "database_url": settings.DATABASE_URL,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": {key: str(value) if value is not None else None for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "scenarios": scenarios,
+    }
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_results(scenarios, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Shared fixtures.
+
+The suite runs against a throwaway SQLite file, never the configured
+database: the environment is set before anything from ``app`` is imported.
+Every test starts from empty tables and empty in-process caches.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["METRICS_ENABLED"] = "false"
+
+import pytest
+
+from app.core import admission
+from app.core.auth_cache import principal_cache
+from app.core.security import create_access_token, get_password_hash
+from app.db import migrations, models
+from app.db.database import Base, SessionLocal, engine
+from app.services import booking_index, settings_service
+
+PASSWORD = "pw"
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    migrations.setup_schema(engine)
+
+@pytest.fixture(autouse=True)
+def clean():
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    booking_index.index.clear()
+    principal_cache.clear()
+    admission.user_limiter.clear()
+    admission.team_limiter.clear()
+    admission.occupancy.clear()
+    with SessionLocal() as db:
+        settings_service.registry.refresh(db)
+    yield
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def password_hash():
+    return get_password_hash(PASSWORD)
+
+class Factory:
+    """Builds courses, teams and users with predictable ids and names."""
+
+    def __init__(self, db, password_hash):
+        self.db = db
+        self.password_hash = password_hash
+        self.users = 0
+
+    def user(self, is_admin=False, **fields) -> models.User:
+        self.users += 1
+        user = models.User(
+            username=fields.pop("username", f"user{self.users}"), password=fields.pop("password", self.password_hash),
+            full_name=fields.pop("full_name", f"User {self.users}"), is_admin=is_admin, **fields,
+        )
+        self.db.add(user)
+        self.db.flush()
+        return user
+
+    def course(self, name="course") -> models.Course:
+        course = models.Course(name=name)
+        self.db.add(course)
+        self.db.flush()
+        return course
+
+    def team(self, course: models.Course, members: int = 3, name=None) -> models.Team:
+        team = models.Team(name=name or f"team{self.db.query(models.Team).count() + 1}", course_id=course.id)
+        self.db.add(team)
+        self.db.flush()
+        for _ in range(members):
+            self.db.add(models.TeamMember(team_id=team.id, user_id=self.user().id))
+        self.db.flush()
+        return team
+
+    def setting(self, key: str, value: str):
+        self.db.merge(models.SystemSettings(key=key, value=value, version=settings_service.next_version(self.db)))
+
+    def commit(self):
+        self.db.commit()
+        settings_service.registry.refresh(self.db)
+
+@pytest.fixture
+def factory(db, password_hash):
+    return Factory(db, password_hash)
+
+def auth_headers(user: models.User) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": user.username})}
+
+def member_ids(db, team: models.Team):
+    return [row.user_id for row in db.query(models.TeamMember.user_id).filter_by(team_id=team.id).order_by(models.TeamMember.user_id)]
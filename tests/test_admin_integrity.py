@@ -0,0 +1,34 @@
+"""Admin writes report bad references and duplicates as 4xx, with foreign keys enforced."""
+from tests.conftest import auth_headers
+
+def test_create_team_for_missing_course_is_404(client, factory):
+    admin = factory.user(is_admin=True)
+    factory.commit()
+    response = client.post("/api/admin/teams?course_id=999", json={"name": "orphans"}, headers=auth_headers(admin))
+    assert response.status_code == 404
+
+def test_duplicate_team_name_is_409(client, factory):
+    admin = factory.user(is_admin=True)
+    course = factory.course()
+    factory.team(course, name="taken")
+    factory.commit()
+    response = client.post(f"/api/admin/teams?course_id={course.id}", json={"name": "taken"}, headers=auth_headers(admin))
+    assert response.status_code == 409
+
+def test_duplicate_course_name_is_409(client, factory):
+    admin = factory.user(is_admin=True)
+    factory.course(name="taken")
+    factory.commit()
+    response = client.post("/api/admin/courses", json={"name": "taken"}, headers=auth_headers(admin))
+    assert response.status_code == 409
+
+def test_team_member_references(client, factory):
+    admin = factory.user(is_admin=True)
+    team = factory.team(factory.course(), members=0)
+    user = factory.user()
+    factory.commit()
+    headers = auth_headers(admin)
+    assert client.post(f"/api/admin/teams/{team.id}/members/999", headers=headers).status_code == 404
+    assert client.post(f"/api/admin/teams/999/members/{user.id}", headers=headers).status_code == 404
+    assert client.post(f"/api/admin/teams/{team.id}/members/{user.id}", headers=headers).status_code == 200
+    assert client.post(f"/api/admin/teams/{team.id}/members/{user.id}", headers=headers).status_code == 409
@@ -0,0 +1,45 @@
+"""Booking rate limits: a team's bucket is only charged for its own members."""
+from app.core import admission
+from app.db import models
+
+from tests.conftest import auth_headers, member_ids
+
+def booking(team_id, participant_ids, day):
+    return {"reservation_date": day, "time_slot": "MORNING", "team_id": team_id, "participant_ids": participant_ids}
+
+def small_team_bucket(monkeypatch, burst):
+    monkeypatch.setattr(admission.team_limiter, "burst", burst)
+    monkeypatch.setattr(admission.team_limiter, "rate", 0.001)
+
+def test_outsiders_do_not_drain_a_teams_bucket(client, db, factory, monkeypatch):
+    small_team_bucket(monkeypatch, 2)
+    course = factory.course()
+    team, other = factory.team(course), factory.team(course)
+    factory.commit()
+    members = member_ids(db, team)
+    outsider = db.get(models.User, member_ids(db, other)[0])
+
+    for day in range(1, 5):
+        response = client.post("/api/student/reservations", json=booking(team.id, members, f"2031-05-{day:02d}"), headers=auth_headers(outsider))
+        assert response.status_code == 403
+
+    member = db.get(models.User, members[0])
+    response = client.post("/api/student/reservations", json=booking(team.id, members, "2031-05-10"), headers=auth_headers(member))
+    assert response.status_code == 200, response.text
+
+def test_members_share_their_teams_bucket(client, db, factory, monkeypatch):
+    small_team_bucket(monkeypatch, 2)
+    course = factory.course()
+    team = factory.team(course)
+    factory.commit()
+    members = member_ids(db, team)
+
+    codes = [
+        client.post(
+            "/api/student/reservations", json=booking(team.id, members, f"2031-05-{day:02d}"),
+            headers=auth_headers(db.get(models.User, members[day % len(members)])),
+        ).status_code
+        for day in range(1, 4)
+    ]
+    assert codes[-1] == 429
+    assert all(code != 429 for code in codes[:-1])
@@ -0,0 +1,108 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.schemas.reservation import BatchReservationCreate, ReservationCreate
+from app.services import archive_service, reservation_service
+from tests.conftest import member_ids
+
+def book(db, team, day: date, time_slot=models.TimeSlot.MORNING) -> models.Reservation:
+    reservation = models.Reservation(team_id=team.id, reservation_date=day, time_slot=time_slot, is_confirmed=True)
+    db.add(reservation)
+    db.flush()
+    for user_id in member_ids(db, team):
+        db.add(models.ReservationParticipant(reservation_id=reservation.id, user_id=user_id))
+    return reservation
+
+def test_archive_unlinks_promoted_waitlist_entries(db, factory):
+    course = factory.course()
+    team = factory.team(course)
+    reservation = book(db, team, date(2024, 1, 15))
+    db.add(models.WaitlistEntry(
+        team_id=team.id, reservation_date=reservation.reservation_date, time_slot=reservation.time_slot,
+        requested_by=member_ids(db, team)[0], participant_ids=",".join(map(str, member_ids(db, team))),
+        status=models.WaitlistStatus.PROMOTED, reservation_id=reservation.id,
+    ))
+    db.commit()
+
+    archived = archive_service.archive_closed_months(db, keep_months=1, today=date(2024, 3, 10))
+
+    assert archived == [("2024-01", 1)]
+    assert db.query(models.Reservation).count() == 0
+    assert db.query(models.ArchivedReservation).count() == 1
+    entry = db.query(models.WaitlistEntry).one()
+    assert entry.status == models.WaitlistStatus.PROMOTED and entry.reservation_id is None
+    assert archive_service.boundary(db) == date(2024, 2, 1)
+
+def test_failed_step_is_rolled_back_and_resumed(db, factory, monkeypatch):
+    course = factory.course()
+    team = factory.team(course)
+    book(db, team, date(2024, 1, 15))
+    db.commit()
+
+    def fail(db, *args):
+        db.execute(delete(models.ReservationParticipant))
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(archive_service, "_delete_hot", fail)
+    with pytest.raises(RuntimeError):
+        archive_service.archive_closed_months(db, keep_months=1, today=date(2024, 3, 10))
+    assert not db.in_transaction()
+    assert db.query(models.ReservationParticipant).count() == 3
+    monkeypatch.undo()
+
+    # Step 2 went through, so the rerun only has to finish the delete
+    assert archive_service.archive_closed_months(db, keep_months=1, today=date(2024, 3, 10)) == []
+    assert db.query(models.Reservation).count() == 0
+    assert db.query(models.ArchivedReservation).count() == 1
+
+def archive_in_between(monkeypatch, name):
+    """Run archiving in its own session just before ``reservation_service.<name>`` takes the write lock."""
+    original = getattr(reservation_service, name)
+
+    def archive_first(db, *args, **kwargs):
+        with SessionLocal() as other:
+            archive_service.archive_closed_months(other, keep_months=1, today=date(2024, 3, 10))
+        monkeypatch.setattr(reservation_service, name, original)
+        return original(db, *args, **kwargs)
+
+    monkeypatch.setattr(reservation_service, name, archive_first)
+
+def test_booking_racing_the_archive_is_refused_not_lost(db, factory, monkeypatch):
+    course = factory.course()
+    team, other = factory.team(course), factory.team(course)
+    book(db, other, date(2024, 1, 20)) # Gives the archive a month to move
+    db.commit()
+    archive_in_between(monkeypatch, "_claim_slot")
+
+    with pytest.raises(HTTPException) as refused:
+        reservation_service.create_reservation(
+            db, ReservationCreate(reservation_date=date(2024, 1, 15), time_slot=models.TimeSlot.LUNCH, team_id=team.id, participant_ids=member_ids(db, team)),
+            member_ids(db, team)[0],
+        )
+
+    assert refused.value.status_code == 409
+    assert archive_service.boundary(db) == date(2024, 2, 1)
+    assert db.query(models.Reservation).filter(models.Reservation.reservation_date < date(2024, 2, 1)).count() == 0
+
+def test_batch_racing_the_archive_reports_archived_entries(db, factory, monkeypatch):
+    course = factory.course()
+    team, other = factory.team(course), factory.team(course)
+    book(db, other, date(2024, 1, 20))
+    db.commit()
+    archive_in_between(monkeypatch, "_ensure_ledger_rows")
+
+    result = reservation_service.create_reservations_batch(
+        db, BatchReservationCreate(
+            team_id=team.id, participant_ids=member_ids(db, team),
+            entries=[{"reservation_date": "2024-01-15", "time_slot": "LUNCH"}, {"reservation_date": "2024-02-15", "time_slot": "LUNCH"}],
+        ),
+        member_ids(db, team)[0],
+    )
+
+    assert [item["status"] for item in result["results"]] == ["conflict", "created"]
+    assert db.query(models.Reservation).filter(models.Reservation.reservation_date < date(2024, 2, 1)).count() == 0
@@ -0,0 +1,27 @@
+"""Only the build output under the static directory is served immutable."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.assets import DIST_DIRNAME, IMMUTABLE, REVALIDATE, AssetFiles
+
+def make_client(static_dir):
+    app = FastAPI()
+    app.mount("/static", AssetFiles(directory=str(static_dir)), name="static")
+    return TestClient(app)
+
+def test_cache_policy_ignores_directories_above_the_static_root(tmp_path):
+    # Deployed under a directory that happens to be called "dist"
+    static_dir = tmp_path / DIST_DIRNAME / "static"
+    (static_dir / "js").mkdir(parents=True)
+    (static_dir / "js" / "main.js").write_text("plain")
+    (static_dir / DIST_DIRNAME / "js").mkdir(parents=True)
+    (static_dir / DIST_DIRNAME / "js" / "main.0123456789ab.js").write_text("hashed")
+    (static_dir / DIST_DIRNAME / "js" / "main.0123456789ab.js.gz").write_bytes(b"gz")
+
+    client = make_client(static_dir)
+    plain = client.get("/static/js/main.js")
+    assert plain.headers["Cache-Control"] == REVALIDATE
+
+    hashed = client.get("/static/dist/js/main.0123456789ab.js", headers={"Accept-Encoding": "identity"})
+    assert hashed.headers["Cache-Control"] == IMMUTABLE
+    assert hashed.text == "hashed"
@@ -0,0 +1,85 @@
+"""Cached principals expire with their token or TTL and drop stale team memberships."""
+import time
+from datetime import date, timedelta
+
+from jose import jwt
+
+from app.core import auth_cache
+from app.core.auth_cache import Principal, PrincipalCache
+from app.core.security import create_access_token
+from app.db import models
+
+from tests.conftest import auth_headers, member_ids
+
+PRINCIPAL = Principal(id=1, username="kim", is_admin=False, team_ids=frozenset({3}))
+
+def test_entries_expire_at_the_ttl_or_the_token_exp(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth_cache.time, "time", lambda: now[0])
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    cache.put("long-lived", PRINCIPAL, token_exp=now[0] + 3600)
+    cache.put("short-lived", PRINCIPAL, token_exp=now[0] + 30)
+
+    now[0] += 29
+    assert cache.get("long-lived") == PRINCIPAL and cache.get("short-lived") == PRINCIPAL
+    now[0] += 1
+    assert cache.get("short-lived") is None # Token expired before the TTL
+    assert cache.get("long-lived") == PRINCIPAL
+    now[0] += 30
+    assert cache.get("long-lived") is None # TTL reached before the token expired
+
+def test_invalidate_user_drops_every_token_of_the_user():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    other = Principal(id=2, username="lee", is_admin=False, team_ids=frozenset())
+    for token, principal in (("a", PRINCIPAL), ("b", PRINCIPAL), ("c", other)):
+        cache.put(token, principal, token_exp=time.time() + 3600)
+
+    cache.invalidate_user(PRINCIPAL.id)
+
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == other
+
+def test_expired_token_is_refused_after_being_cached(client, factory):
+    user = factory.user()
+    factory.commit()
+    token = create_access_token({"sub": user.username}, expires_delta=timedelta(seconds=1))
+    headers = {"Authorization": "Bearer " + token}
+
+    assert client.get("/api/auth/users/me", headers=headers).status_code == 200
+    # exp is whole seconds and jose compares it with the whole current second
+    time.sleep(max(0.0, jwt.get_unverified_claims(token)["exp"] - time.time()) + 1.1)
+    assert client.get("/api/auth/users/me", headers=headers).status_code == 401
+
+def waitlisted_team(db, factory):
+    """A team with a waitlist entry, which only its members see."""
+    team = factory.team(factory.course())
+    db.add(models.WaitlistEntry(
+        team_id=team.id, reservation_date=date(2031, 9, 1), time_slot=models.TimeSlot.LUNCH,
+        requested_by=member_ids(db, team)[0], participant_ids=str(member_ids(db, team)[0]),
+    ))
+    return team
+
+def test_adding_a_team_member_refreshes_the_cached_principal(client, db, factory):
+    team = waitlisted_team(db, factory)
+    admin = factory.user(is_admin=True, username="admin")
+    student = factory.user()
+    factory.commit()
+    assert client.get("/api/student/waitlist", headers=auth_headers(student)).json() == [] # Now cached
+
+    response = client.post(f"/api/admin/teams/{team.id}/members/{student.id}", headers=auth_headers(admin))
+    assert response.status_code == 200, response.text
+
+    assert [entry["team_id"] for entry in client.get("/api/student/waitlist", headers=auth_headers(student)).json()] == [team.id]
+
+def test_roster_import_refreshes_the_cached_principal(client, db, factory):
+    team = waitlisted_team(db, factory)
+    admin = factory.user(is_admin=True, username="admin")
+    student = factory.user()
+    factory.commit()
+    assert client.get("/api/student/waitlist", headers=auth_headers(student)).json() == []
+
+    roster = f"username,full_name,password,course,team\n{student.username},{student.full_name},,{team.course.name},{team.name}\n"
+    response = client.post("/api/admin/roster/import", headers=auth_headers(admin), files={"file": ("roster.csv", roster)})
+    assert response.json()["memberships_added"] == 1, response.text
+
+    assert [entry["team_id"] for entry in client.get("/api/student/waitlist", headers=auth_headers(student)).json()] == [team.id]
@@ -0,0 +1,44 @@
+"""Batch and recurrence requests are bounded before any dates are built."""
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.reservation import MAX_BATCH_ENTRIES, BatchReservationCreate, RecurrenceRule
+
+from tests.conftest import auth_headers
+
+def batch(**fields):
+    return BatchReservationCreate(team_id=1, participant_ids=[1], **fields)
+
+def test_recurrence_dates():
+    rule = RecurrenceRule(start_date=date(2031, 3, 3), end_date=date(2031, 3, 31), time_slot="LUNCH", interval_weeks=2)
+    assert rule.dates() == [date(2031, 3, 3), date(2031, 3, 17), date(2031, 3, 31)]
+    assert rule.count() == 3
+
+def test_recurrence_up_to_date_max_is_rejected_not_overflowed():
+    with pytest.raises(ValidationError, match="at most"):
+        batch(recurrence={"start_date": "2031-03-03", "end_date": "9999-12-31", "time_slot": "LUNCH"})
+
+def test_recurrence_ending_at_date_max():
+    rule = RecurrenceRule(start_date=date(9999, 12, 1), end_date=date.max, time_slot="LUNCH")
+    assert rule.dates()[-1] == date(9999, 12, 29)
+    assert len(batch(recurrence=rule.model_dump()).expand()) == 5
+
+def test_entries_and_recurrence_share_the_limit():
+    entries = [{"reservation_date": "2031-03-02", "time_slot": "LUNCH"}] * (MAX_BATCH_ENTRIES - 1)
+    batch(entries=entries, recurrence={"start_date": "2031-03-03", "end_date": "2031-03-03", "time_slot": "LUNCH"})
+    with pytest.raises(ValidationError):
+        batch(entries=entries, recurrence={"start_date": "2031-03-03", "end_date": "2031-03-10", "time_slot": "LUNCH"})
+    with pytest.raises(ValidationError):
+        batch(entries=entries * 2)
+
+def test_endpoint_rejects_unbounded_recurrence_with_422(client, factory):
+    team = factory.team(factory.course(), members=1)
+    factory.commit()
+    user = team.members[0].user
+    response = client.post("/api/student/reservations/batch", headers=auth_headers(user), json={
+        "team_id": team.id, "participant_ids": [user.id],
+        "recurrence": {"start_date": "2031-03-03", "end_date": "9999-12-31", "time_slot": "LUNCH"},
+    })
+    assert response.status_code == 422
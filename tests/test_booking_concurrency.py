@@ -0,0 +1,84 @@
+"""The capacity limit and the one-booking-per-team-per-day rule hold under concurrent bookings."""
+import threading
+from collections import Counter
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import func
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.schemas.reservation import ReservationCreate
+from app.services import reservation_service
+
+from tests.conftest import member_ids
+
+DAY = date(2031, 3, 4)
+MAX_TEAMS = 3
+
+def book_concurrently(requests):
+    """Run ``(team_id, time_slot, participant_ids)`` bookings in one thread each, released together."""
+    barrier = threading.Barrier(len(requests))
+    outcomes = []
+
+    def book(team_id, time_slot, participant_ids):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            reservation_service.create_reservation(
+                db,
+                ReservationCreate(reservation_date=DAY, time_slot=time_slot, team_id=team_id, participant_ids=participant_ids),
+                participant_ids[0],
+            )
+            outcomes.append(201)
+        except HTTPException as exc:
+            outcomes.append(exc.status_code)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=book, args=request) for request in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(outcomes)
+
+def test_capacity_and_team_rules_hold_under_concurrency(db, factory):
+    course = factory.course()
+    teams = [factory.team(course, members=2) for _ in range(12)]
+    factory.setting("max_concurrent_teams", str(MAX_TEAMS))
+    factory.commit()
+
+    # Every team tries every slot at once: at most MAX_TEAMS teams per slot,
+    # and each team ends up with at most one slot
+    requests = [
+        (team.id, time_slot, member_ids(db, team))
+        for team in teams for time_slot in models.TimeSlot
+    ]
+    outcomes = book_concurrently(requests)
+
+    assert set(outcomes) <= {201, 409}
+    assert outcomes[201] == MAX_TEAMS * len(models.TimeSlot)
+
+    db.expire_all()
+    per_slot = dict(db.query(models.Reservation.time_slot, func.count()).filter_by(reservation_date=DAY).group_by(models.Reservation.time_slot))
+    assert all(count <= MAX_TEAMS for count in per_slot.values())
+    per_team = db.query(models.Reservation.team_id, func.count()).group_by(models.Reservation.team_id, models.Reservation.reservation_date).all()
+    assert all(count == 1 for _, count in per_team)
+    ledger = dict(db.query(models.SlotOccupancy.time_slot, models.SlotOccupancy.booked_count).filter_by(reservation_date=DAY))
+    assert ledger == per_slot
+
+def test_members_are_not_double_booked_under_concurrency(db, factory):
+    course = factory.course()
+    team_a, team_b = factory.team(course, members=2), factory.team(course, members=2)
+    shared = factory.user()
+    db.add_all([models.TeamMember(team_id=team_a.id, user_id=shared.id), models.TeamMember(team_id=team_b.id, user_id=shared.id)])
+    factory.commit()
+
+    outcomes = book_concurrently([
+        (team_a.id, models.TimeSlot.LUNCH, [shared.id]),
+        (team_b.id, models.TimeSlot.LUNCH, [shared.id]),
+    ])
+
+    assert outcomes == Counter({201: 1, 409: 1})
+    assert db.query(models.ReservationParticipant).filter_by(user_id=shared.id).count() == 1
@@ -0,0 +1,60 @@
+"""The booking index reconciles with writes made outside the booking engine."""
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.schemas.reservation import ReservationCreate
+from app.services import booking_index, reservation_service, version_service
+
+from tests.conftest import member_ids
+
+DAY = date(2031, 7, 8)
+
+def book(db, team, time_slot=models.TimeSlot.MORNING, day=DAY):
+    participant_ids = member_ids(db, team)
+    return reservation_service.create_reservation(
+        db, ReservationCreate(reservation_date=day, time_slot=time_slot, team_id=team.id, participant_ids=participant_ids), participant_ids[0],
+    )
+
+def test_out_of_band_booking_is_seen_on_the_next_check(db, factory):
+    course = factory.course()
+    booked, out_of_band, sharing = factory.team(course), factory.team(course), factory.team(course)
+    shared_user = member_ids(db, out_of_band)[0]
+    db.add(models.TeamMember(team_id=sharing.id, user_id=shared_user))
+    factory.commit()
+    book(db, booked) # Loads the month into the index
+    assert booking_index.index.day(db, DAY).slot_users[models.TimeSlot.MORNING] == frozenset(member_ids(db, booked))
+
+    # Another writer books directly and bumps the day's stamp, as every writer must
+    with SessionLocal() as other:
+        other.add(models.Reservation(
+            reservation_date=DAY, time_slot=models.TimeSlot.MORNING, team_id=out_of_band.id,
+            participants=[models.ReservationParticipant(user_id=user_id) for user_id in member_ids(other, out_of_band)],
+        ))
+        version_service.bump_reservation_dates(other, [DAY])
+        other.commit()
+
+    with pytest.raises(HTTPException) as conflict:
+        book(db, sharing)
+    assert conflict.value.status_code == 409
+    assert "already have a reservation at this time" in conflict.value.detail
+
+    # The team check sees the direct booking too
+    with pytest.raises(HTTPException) as conflict:
+        book(db, out_of_band, models.TimeSlot.DINNER)
+    assert "This team has already booked for MORNING" in conflict.value.detail
+
+def test_large_user_ids_are_indexed_as_ids(db, factory):
+    course = factory.course()
+    team = factory.team(course, members=0)
+    users = [factory.user(id=10**12 + offset) for offset in range(2)]
+    for user in users:
+        db.add(models.TeamMember(team_id=team.id, user_id=user.id))
+    factory.commit()
+
+    book(db, team)
+
+    assert booking_index.index.day(db, DAY).slot_users[models.TimeSlot.MORNING] == {user.id for user in users}
@@ -0,0 +1,58 @@
+"""Conditional GETs: 304 while nothing changed, a fresh 200 and ETag after a write."""
+from app.db import models
+
+from tests.conftest import auth_headers, member_ids
+
+MONTH_URL = "/api/student/reservations?year=2031&month=3"
+DATE_URL = "/api/admin/reservations-by-date?reservation_date=2031-03-04"
+OTHER_MONTH_URL = "/api/student/reservations?year=2031&month=4"
+
+def revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+def test_reservation_reads_revalidate_until_a_booking(client, db, factory):
+    admin = factory.user(is_admin=True)
+    team = factory.team(factory.course())
+    factory.commit()
+    participant_ids = member_ids(db, team)
+    reader = auth_headers(admin)
+    etags = {}
+    for url in (MONTH_URL, DATE_URL, OTHER_MONTH_URL):
+        response = client.get(url, headers=reader)
+        assert response.status_code == 200
+        etags[url] = response.headers["ETag"]
+        assert revalidate(client, url, reader, etags[url]).status_code == 304
+
+    booker = db.get(models.User, participant_ids[0])
+    response = client.post("/api/student/reservations", headers=auth_headers(booker), json={
+        "reservation_date": "2031-03-04", "time_slot": "LUNCH", "team_id": team.id, "participant_ids": participant_ids,
+    })
+    assert response.status_code == 200, response.text
+
+    for url in (MONTH_URL, DATE_URL):
+        response = revalidate(client, url, reader, etags[url])
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etags[url]
+        assert [reservation["team_id"] for reservation in response.json()] == [team.id]
+        assert revalidate(client, url, reader, response.headers["ETag"]).status_code == 304
+    # A booking in March leaves April's ETag alone
+    assert revalidate(client, OTHER_MONTH_URL, reader, etags[OTHER_MONTH_URL]).status_code == 304
+
+def test_settings_revalidate_until_a_change(client, factory):
+    admin = factory.user(is_admin=True)
+    factory.setting("max_concurrent_teams", "6")
+    factory.commit()
+    headers = auth_headers(admin)
+
+    response = client.get("/api/admin/settings", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert revalidate(client, "/api/admin/settings", headers, etag).status_code == 304
+
+    response = client.put("/api/admin/settings", headers=headers, json={"key": "max_concurrent_teams", "value": "4"})
+    assert response.status_code == 200, response.text
+
+    response = revalidate(client, "/api/admin/settings", headers, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json() == [{"key": "max_concurrent_teams", "value": "4"}]
@@ -0,0 +1,55 @@
+"""Projected reads encode to the same bytes as the Pydantic response model did."""
+from datetime import date
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import fast_json
+from app.db import loaders, models
+from app.schemas.reservation import Reservation
+
+from tests.conftest import auth_headers
+
+def seed(db, factory):
+    admin = factory.user(is_admin=True, username="admin")
+    course = factory.course()
+    users = [factory.user(full_name=name) for name in ("Zoë Ünal", "李雷", None, "O'Brien \"Ob\"")]
+    teams = [factory.team(course, members=0) for _ in range(3)]
+    for team, members in zip(teams, (users[:2], users[2:], users[1:3])):
+        for user in reversed(members):
+            db.add(models.TeamMember(team_id=team.id, user_id=user.id))
+    bookings = [
+        (teams[0], date(2031, 3, 4), models.TimeSlot.DINNER, users[:2], True),
+        (teams[1], date(2031, 3, 4), models.TimeSlot.DINNER, users[2:], False),
+        (teams[2], date(2031, 3, 4), models.TimeSlot.MORNING, users[1:3], False),
+        (teams[1], date(2031, 3, 28), models.TimeSlot.LUNCH, users[3:], True),
+    ]
+    for team, day, time_slot, participants, confirmed in bookings:
+        db.add(models.Reservation(
+            team_id=team.id, reservation_date=day, time_slot=time_slot, is_confirmed=confirmed,
+            participants=[models.ReservationParticipant(user_id=user.id) for user in reversed(participants)],
+        ))
+    factory.commit()
+    return admin
+
+def pydantic_body(db, *criteria) -> bytes:
+    """The body the ``response_model`` path rendered from ORM objects."""
+    rows = db.query(models.Reservation).options(*loaders.RESERVATION).filter(*criteria).order_by(
+        models.Reservation.reservation_date, models.Reservation.time_slot, models.Reservation.id,
+    ).all()
+    return JSONResponse(jsonable_encoder([Reservation.model_validate(row, from_attributes=True) for row in rows])).body
+
+@pytest.mark.parametrize("encoder", ["orjson", "stdlib"])
+def test_projected_reads_match_the_pydantic_body(client, db, factory, monkeypatch, encoder):
+    if encoder == "stdlib":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    admin = seed(db, factory)
+    db.expire_all()
+
+    month = client.get("/api/student/reservations?year=2031&month=3", headers=auth_headers(admin))
+    assert month.content == pydantic_body(db, models.Reservation.reservation_date.between(date(2031, 3, 1), date(2031, 3, 31)))
+    by_date = client.get("/api/admin/reservations-by-date?reservation_date=2031-03-04", headers=auth_headers(admin))
+    assert by_date.content == pydantic_body(db, models.Reservation.reservation_date == date(2031, 3, 4))
+    assert '"time_slot":"DINNER"' in by_date.text and '"reservation_date":"2031-03-04"' in by_date.text
+    assert "Zoë Ünal" in by_date.text # Not \u-escaped
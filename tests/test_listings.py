@@ -0,0 +1,31 @@
+"""Course and team listings for students."""
+from app.db import models
+
+from tests.conftest import auth_headers
+
+def test_students_list_only_their_own_courses_and_teams(client, db, factory):
+    course, other_course = factory.course("course"), factory.course("other")
+    team, second_team = factory.team(course), factory.team(other_course)
+    factory.team(course)
+    student = db.get(models.User, team.members[0].user_id)
+    db.add(models.TeamMember(team_id=second_team.id, user_id=student.id))
+    factory.commit()
+
+    teams = client.get("/api/student/teams", headers=auth_headers(student)).json()
+    assert [item["id"] for item in teams["items"]] == [team.id, second_team.id]
+    teams = client.get(f"/api/student/teams?course_id={other_course.id}", headers=auth_headers(student)).json()
+    assert [item["id"] for item in teams["items"]] == [second_team.id]
+
+    courses = client.get("/api/student/courses", headers=auth_headers(student)).json()
+    assert [(item["id"], item["team_count"]) for item in courses["items"]] == [(course.id, 2), (other_course.id, 1)]
+
+def test_team_members_come_back_in_user_id_order(client, db, factory):
+    course = factory.course()
+    team = factory.team(course, members=0)
+    users = [factory.user() for _ in range(4)]
+    for user in reversed(users):
+        db.add(models.TeamMember(team_id=team.id, user_id=user.id))
+    factory.commit()
+
+    teams = client.get("/api/student/teams", headers=auth_headers(users[0])).json()
+    assert [member["id"] for member in teams["items"][0]["member_details"]] == [user.id for user in users]
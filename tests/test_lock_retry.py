@@ -0,0 +1,125 @@
+"""Lock retries back off without blocking the event loop on an AsyncSession."""
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.dependencies import run_db
+from app.db import models
+from app.db.database import async_database_url, retry_on_lock
+from app.services import roster_service
+
+from tests.conftest import auth_headers
+
+def locked():
+    return OperationalError("UPDATE slot_occupancy ...", {}, sqlite3.OperationalError("database is locked"))
+
+def flaky(failures: int):
+    calls = []
+
+    @retry_on_lock
+    def write(db):
+        calls.append(db)
+        if len(calls) <= failures:
+            raise locked()
+        return "done"
+    return write, calls
+
+def test_sync_session_retries(db):
+    write, calls = flaky(2)
+    assert write(db) == "done"
+    assert len(calls) == 3
+
+def test_async_session_retries_without_blocking_the_loop():
+    write, calls = flaky(settings.DB_LOCK_RETRIES)
+
+    async def main():
+        engine = create_async_engine(async_database_url(settings.DATABASE_URL))
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        try:
+            async with async_sessionmaker(engine)() as session:
+                result = await run_db(session, write)
+        finally:
+            ticking.cancel()
+            await engine.dispose()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == "done"
+    assert len(calls) == settings.DB_LOCK_RETRIES + 1
+    # The backoff adds up to at least 0.35 s; the loop kept running throughout
+    assert ticks >= 20
+
+def test_async_session_gives_up_after_the_retries():
+    write, calls = flaky(settings.DB_LOCK_RETRIES + 1)
+
+    async def main():
+        engine = create_async_engine(async_database_url(settings.DATABASE_URL))
+        try:
+            async with async_sessionmaker(engine)() as session:
+                await run_db(session, write)
+        finally:
+            await engine.dispose()
+
+    with pytest.raises(OperationalError):
+        asyncio.run(main())
+    assert len(calls) == settings.DB_LOCK_RETRIES + 1
+
+ROSTER = "username,full_name,password,course,team\nnewcomer,New Comer,pw,Locks,Locks-1\nnobody,,,,\n"
+
+def locked_batches(monkeypatch, failures: int):
+    """Make the first ``failures`` roster batch writes hit a lock on commit, after doing their work."""
+    write_batch = roster_service._write_batch
+    calls = []
+
+    def flaky_write(db, batch, result, errors):
+        calls.append(batch)
+        if len(calls) > failures:
+            return write_batch(db, batch, result, errors)
+        def commit():
+            raise locked()
+        db.commit = commit
+        try:
+            write_batch(db, batch, result, errors)
+        finally:
+            del db.commit
+    monkeypatch.setattr(roster_service, "_write_batch", flaky_write)
+    return calls
+
+def test_roster_batch_is_retried_on_lock(client, db, factory, monkeypatch):
+    admin = factory.user(is_admin=True, username="admin")
+    factory.commit()
+    calls = locked_batches(monkeypatch, 1)
+
+    response = client.post("/api/admin/roster/import", headers=auth_headers(admin), files={"file": ("roster.csv", ROSTER)})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(calls) == 2
+    # Counted and reported once, though the batch ran twice
+    assert (body["users_created"], body["memberships_added"]) == (1, 1)
+    assert body["errors"] == [{"row": 2, "error": "password is required for a new user"}]
+    assert db.query(models.User).filter_by(username="newcomer").count() == 1
+
+def test_roster_import_is_503_when_the_lock_persists(client, db, factory, monkeypatch):
+    admin = factory.user(is_admin=True, username="admin")
+    factory.commit()
+    monkeypatch.setattr(settings, "DB_LOCK_RETRIES", 1)
+    calls = locked_batches(monkeypatch, 2)
+
+    response = client.post("/api/admin/roster/import", headers=auth_headers(admin), files={"file": ("roster.csv", ROSTER)})
+
+    assert response.status_code == 503, response.text
+    assert len(calls) == 2
+    assert db.query(models.User).filter_by(username="newcomer").count() == 0
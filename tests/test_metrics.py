@@ -0,0 +1,28 @@
+from app.core.config import settings
+from app.core.metrics import metrics
+
+from tests.conftest import auth_headers
+
+def test_requests_are_labelled_with_the_full_route_template(db, factory, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    admin = factory.user(is_admin=True, username="admin")
+    course = factory.course()
+    team = factory.team(course, members=0)
+    student = factory.user()
+    factory.commit()
+
+    with TestClient(create_app()) as client:
+        client.post(f"/api/admin/teams/{team.id}/members/{student.id}", headers=auth_headers(admin))
+        client.get("/api/student/reservations?year=2031&month=1", headers=auth_headers(student))
+        client.get("/login")
+        client.get("/static/missing.css")
+    rendered = metrics.render()
+
+    for route in (
+        "/api/admin/teams/{team_id}/members/{user_id}", "/api/student/reservations", "/login", "/static/{path}",
+    ):
+        assert f'route="{route}"' in rendered, route
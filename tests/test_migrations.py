@@ -0,0 +1,43 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from app.db import migrations, models
+from app.db.database import engine
+from app.services import usage_service
+
+from tests.conftest import member_ids
+
+def test_usage_rollups_are_backfilled_on_upgrade(db, factory):
+    course = factory.course()
+    team = factory.team(course)
+    for day in (date(2031, 1, 5), date(2031, 2, 5)):
+        reservation = models.Reservation(team_id=team.id, reservation_date=day, time_slot=models.TimeSlot.MORNING)
+        reservation.participants = [models.ReservationParticipant(user_id=user_id) for user_id in member_ids(db, team)]
+        db.add(reservation)
+    factory.commit()
+    # A database from before the rollups: bookings, empty rollup tables, schema version 2
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_migrations WHERE version >= 3"))
+    assert db.query(models.TeamMonthUsage).count() == 0
+
+    applied = migrations.upgrade(engine)
+
+    assert [migration.name for migration in applied] == ["usage_rollups"]
+    assert migrations.current_version(engine) == migrations.MIGRATIONS[-1].version
+    assert db.query(models.TeamMonthUsage.month, models.TeamMonthUsage.reservations).order_by(models.TeamMonthUsage.month).all() == [
+        ("2031-01", 1), ("2031-02", 1),
+    ]
+    assert db.query(models.CourseMonthUsage.month, models.CourseMonthUsage.participants).order_by(models.CourseMonthUsage.month).all() == [
+        ("2031-01", 3), ("2031-02", 3),
+    ]
+    assert db.query(models.UserMonthUsage).count() == 6
+    assert migrations.upgrade(engine) == []
+
+    # The migration's frozen SQL agrees with the live rebuild
+    def rollups():
+        return [sorted(tuple(row) for row in db.execute(text(f"SELECT * FROM {table}")))
+                for table in ("team_month_usage", "course_month_usage", "user_month_usage")]
+    migrated = rollups()
+    usage_service.backfill(db)
+    assert rollups() == migrated
@@ -0,0 +1,26 @@
+"""Month routes validate year and month instead of failing to build the date."""
+import pytest
+
+from tests.conftest import auth_headers
+
+STUDENT_ROUTES = ["/api/student/reservations", "/api/student/reservations/summary", "/api/student/reservations/stream"]
+ADMIN_ROUTES = ["/api/admin/usage/courses", "/api/admin/usage/teams", "/api/admin/usage/users"]
+
+@pytest.mark.parametrize("query", ["year=0&month=1", "year=10000&month=1", "year=2031&month=13"])
+def test_out_of_range_months_are_rejected(client, factory, query):
+    student = factory.user()
+    admin = factory.user(is_admin=True, username="admin")
+    factory.commit()
+
+    for routes, user in ((STUDENT_ROUTES, student), (ADMIN_ROUTES, admin)):
+        for route in routes:
+            response = client.get(f"{route}?{query}", headers=auth_headers(user))
+            assert response.status_code == 422, (route, response.status_code)
+
+def test_edge_years_are_served(client, factory):
+    student = factory.user()
+    factory.commit()
+
+    for query in ("year=1&month=1", "year=9999&month=12"):
+        assert client.get(f"/api/student/reservations?{query}", headers=auth_headers(student)).json() == []
+        assert client.get(f"/api/student/reservations/summary?{query}", headers=auth_headers(student)).status_code == 200
@@ -0,0 +1,77 @@
+"""Bulk hashing (roster import) stays within its share of the hashing pool."""
+import asyncio
+import threading
+
+from app.core.config import settings
+from app.core.hashing import PasswordHasherPool, password_hasher
+from app.core.security import verify_password
+
+from tests.conftest import PASSWORD, auth_headers
+
+def test_hash_many_respects_the_bulk_limit():
+    pool = PasswordHasherPool(max_workers=2, max_pending=4)
+    passwords = [f"pw{index}" for index in range(40)]
+    result, peak = {}, [0]
+
+    def bulk():
+        result["hashes"] = pool.hash_many(passwords)
+
+    try:
+        worker = threading.Thread(target=bulk)
+        worker.start()
+        logins = 0
+        while worker.is_alive():
+            peak[0] = max(peak[0], pool.pending)
+            # A login submitted mid-import is admitted, not rejected with 503
+            asyncio.run(pool.hash("login"))
+            logins += 1
+        worker.join()
+    finally:
+        pool.shutdown()
+
+    assert peak[0] <= pool.bulk_limit
+    assert pool.stats()["rejected"] == 0
+    assert pool.pending == 0
+    assert pool.stats()["completed"] == len(passwords) + logins
+    hashes = result["hashes"]
+    assert all(verify_password(password, hashed) for password, hashed in zip(passwords, hashes))
+
+def test_roster_import_endpoint(client, factory):
+    admin = factory.user(is_admin=True)
+    factory.commit()
+    roster = "username,full_name,password,course,team\nkim,Kim,pw,c1,t1\nlee,Lee,pw,c1,t1\n"
+    response = client.post("/api/admin/roster/import", headers=auth_headers(admin), files={"file": ("roster.csv", roster)})
+    assert response.status_code == 200, response.text
+    assert response.json()["errors"] == []
+    token = client.post("/api/auth/token", data={"username": "kim", "password": "pw"})
+    assert token.status_code == 200
+
+def test_login_rehashes_a_hash_made_at_another_cost(client, db, factory):
+    from passlib.hash import bcrypt
+
+    user = factory.user(password=bcrypt.using(rounds=5).hash("pw"))
+    factory.commit()
+
+    assert client.post("/api/auth/token", data={"username": user.username, "password": "wrong"}).status_code == 401
+    db.refresh(user)
+    assert user.password.startswith("$2b$05$") # A failed login leaves the hash alone
+
+    assert client.post("/api/auth/token", data={"username": user.username, "password": "pw"}).status_code == 200
+    db.refresh(user)
+    assert user.password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert verify_password("pw", user.password)
+    assert client.post("/api/auth/token", data={"username": user.username, "password": "pw"}).status_code == 200
+
+def test_full_backlog_rejects_logins_with_503(client, factory, monkeypatch):
+    user = factory.user()
+    factory.commit()
+    rejected = password_hasher.stats()["rejected"]
+    monkeypatch.setattr(password_hasher, "pending", password_hasher.max_pending)
+
+    response = client.post("/api/auth/token", data={"username": user.username, "password": PASSWORD})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert password_hasher.stats()["rejected"] == rejected + 1
+    monkeypatch.undo()
+    assert client.post("/api/auth/token", data={"username": user.username, "password": PASSWORD}).status_code == 200
@@ -0,0 +1,50 @@
+"""Live update channel: slow subscribers resync, closed ones are dropped."""
+import asyncio
+
+from app.core import pubsub
+
+def test_overflow_is_replaced_by_one_resync():
+    async def main():
+        broker = pubsub.InProcessBroker(queue_size=2)
+        async with broker.subscribe(["month:2030-01"]) as subscription:
+            for n in range(5):
+                broker.publish("month:2030-01", {"n": n})
+            first = await subscription.get(timeout=1)
+            drained = await subscription.get(timeout=0.05)
+            # Once the client has the resync, updates flow again
+            broker.publish("month:2030-01", {"n": 5})
+            after = await subscription.get(timeout=1)
+        return first, drained, after
+
+    first, drained, after = asyncio.run(main())
+    assert first is pubsub.RESYNC
+    assert drained is None
+    assert after == {"n": 5}
+
+def test_leaving_the_subscription_unsubscribes():
+    async def main():
+        broker = pubsub.InProcessBroker()
+        async with broker.subscribe(["month:2030-01", "month:2030-02"]):
+            during = broker.subscriber_count()
+        broker.publish("month:2030-01", {"n": 0}) # Reaches nobody
+        return during, broker.subscriber_count()
+
+    assert asyncio.run(main()) == (1, 0)
+
+def test_closing_the_stream_unsubscribes(monkeypatch):
+    broker = pubsub.InProcessBroker()
+    monkeypatch.setattr(pubsub, "broker", broker)
+
+    async def main():
+        stream = pubsub.event_stream(["month:2030-01"], keepalive=1)
+        ready = await stream.__anext__()
+        broker.publish("month:2030-01", {"type": "slots", "slots": []})
+        update = await stream.__anext__()
+        during = broker.subscriber_count()
+        await stream.aclose() # What the server does when the client disconnects
+        return ready, update, during, broker.subscriber_count()
+
+    ready, update, during, after = asyncio.run(main())
+    assert ready.startswith("event: ready")
+    assert update == 'data: {"type":"slots","slots":[]}\n\n'
+    assert (during, after) == (1, 0)
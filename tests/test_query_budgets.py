@@ -0,0 +1,73 @@
+"""SQL statement budgets per endpoint.
+
+Each endpoint is called against a small and a ten times larger data set.
+The statement count must stay within its budget and must not grow with
+the data, so an N+1 regression fails here.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.db import models
+from app.db.database import engine
+from app.db.query_counter import QueryCounter
+
+from tests.conftest import auth_headers, member_ids
+
+FIRST_DAY = date(2031, 3, 1)
+
+def seed(db, factory, teams: int):
+    course = factory.course()
+    admin = factory.user(is_admin=True, username="admin")
+    created = [factory.team(course, members=3) for _ in range(teams)]
+    for index, team in enumerate(created):
+        day = FIRST_DAY + timedelta(days=index % 28)
+        reservation = models.Reservation(team_id=team.id, reservation_date=day, time_slot=list(models.TimeSlot)[index % 3])
+        reservation.participants = [models.ReservationParticipant(user_id=user_id) for user_id in member_ids(db, team)]
+        db.add(reservation)
+    student = db.query(models.User).join(models.TeamMember).filter(models.TeamMember.team_id == created[0].id).first()
+    # Every team queues for its slot, and the student's team for a slot on each day, behind them
+    queued = [(team, FIRST_DAY + timedelta(days=index % 28), list(models.TimeSlot)[index % 3]) for index, team in enumerate(created)]
+    queued += [(created[0], FIRST_DAY + timedelta(days=day), models.TimeSlot.DINNER) for day in range(min(teams, 28)) if day % 3 != 2]
+    for team, day, time_slot in queued:
+        db.add(models.WaitlistEntry(
+            team_id=team.id, reservation_date=day, time_slot=time_slot,
+            requested_by=member_ids(db, team)[0], participant_ids=",".join(map(str, member_ids(db, team))),
+        ))
+    factory.commit()
+    return {"admin": auth_headers(admin), "student": auth_headers(student), "course_id": course.id}
+
+# (name, who, url, budget). The budget counts every statement of the request,
+# including the version stamp lookups behind ETags.
+ENDPOINTS = [
+    ("users_me", "student", "/api/auth/users/me", 5),
+    ("month_reservations", "student", "/api/student/reservations?year=2031&month=3", 3),
+    ("month_summary", "student", "/api/student/reservations/summary?year=2031&month=3", 4),
+    ("reservations_by_date", "admin", "/api/admin/reservations-by-date?reservation_date=2031-03-01", 3),
+    ("reservation_range", "admin", "/api/admin/reservations?start_date=2031-03-01&end_date=2031-03-31&limit=200", 3),
+    ("waitlist", "student", "/api/student/waitlist", 2),
+    ("my_courses", "student", "/api/student/courses", 2),
+    ("my_teams", "student", "/api/student/teams", 2),
+    ("courses", "admin", "/api/admin/courses", 2),
+    ("teams", "admin", "/api/admin/teams?course_id={course_id}&limit=200", 2),
+    ("members", "admin", "/api/admin/members?limit=200", 2),
+]
+
+def count_statements(client, headers, url):
+    client.get(url, headers=headers) # Authenticates and warms the caches
+    with QueryCounter(engine) as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+@pytest.mark.parametrize("name, who, url, budget", ENDPOINTS, ids=[endpoint[0] for endpoint in ENDPOINTS])
+def test_query_budget(db, factory, client, name, who, url, budget):
+    counts = []
+    for teams in (5, 50):
+        with engine.begin() as conn:
+            for table in reversed(models.Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        context = seed(db, factory, teams)
+        counts.append(count_statements(client, context[who], url.format(**context)))
+    assert counts[0] == counts[1], f"{name}: statement count grows with the data ({counts[0]} -> {counts[1]})"
+    assert counts[1] <= budget, f"{name}: {counts[1]} statements, budget {budget}"
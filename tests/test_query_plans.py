@@ -0,0 +1,70 @@
+"""The booking and month queries are served by the booking indexes (migration 0001), not table scans."""
+from datetime import date
+
+import pytest
+
+from app.db.database import engine
+from app.db.query_counter import QueryCounter
+from app.schemas.reservation import ReservationCreate
+from app.services import booking_index, reservation_service
+
+from tests.conftest import member_ids
+
+DAY = date(2031, 3, 4)
+INDEXED_TABLES = ("reservations", "reservation_participants", "team_members")
+
+def query_plan(statement: str):
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, (None,) * statement.count("?")).all()
+    return [row[-1] for row in rows]
+
+def plans(fn):
+    """The query plans of every SELECT that ``fn`` runs."""
+    with QueryCounter(engine) as counter:
+        fn()
+    return {statement: query_plan(statement) for statement in counter.statements if statement.lstrip().upper().startswith("SELECT")}
+
+def assert_no_scans(statement_plans):
+    for statement, plan in statement_plans.items():
+        for step in plan:
+            assert not any(step.startswith(f"SCAN {table}") for table in INDEXED_TABLES), f"{step}\n{statement}"
+
+def uses(statement_plans, index: str) -> bool:
+    return any(index in step for plan in statement_plans.values() for step in plan)
+
+@pytest.fixture
+def booked(db, factory):
+    course = factory.course()
+    teams = [factory.team(course) for _ in range(3)]
+    factory.commit()
+    for team, time_slot in zip(teams[:2], ("MORNING", "LUNCH")):
+        participant_ids = member_ids(db, team)
+        reservation_service.create_reservation(
+            db, ReservationCreate(reservation_date=DAY, time_slot=time_slot, team_id=team.id, participant_ids=participant_ids), participant_ids[0],
+        )
+    return teams
+
+def test_booking_uses_indexes(db, booked):
+    team = booked[2]
+    participant_ids = member_ids(db, team)
+    booking_index.index.clear() # Include the index's month load
+    statement_plans = plans(lambda: reservation_service.create_reservation(
+        db, ReservationCreate(reservation_date=DAY, time_slot="DINNER", team_id=team.id, participant_ids=participant_ids), participant_ids[0],
+    ))
+    assert_no_scans(statement_plans)
+    assert uses(statement_plans, "ix_team_members_team_id")
+    assert uses(statement_plans, "ix_reservations_date_slot")
+
+def test_month_views_use_indexes(db, booked):
+    user_id = member_ids(db, booked[0])[0]
+    statement_plans = plans(lambda: (
+        reservation_service.get_reservations_for_month(db, DAY.year, DAY.month),
+        reservation_service.get_month_availability(db, DAY.year, DAY.month, user_id),
+    ))
+    assert_no_scans(statement_plans)
+    assert uses(statement_plans, "ix_reservations_date_slot")
+    assert uses(statement_plans, "ix_reservation_participants_user_id")
+
+def test_team_day_lookup_uses_unique_index():
+    plan = query_plan("SELECT id FROM reservations WHERE team_id = ? AND reservation_date = ?")
+    assert any("uq_reservations_team_date" in step for step in plan), plan
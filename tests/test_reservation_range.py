@@ -0,0 +1,111 @@
+"""Keyset pages and streamed exports of a date range, across the archive boundary."""
+import base64
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+from app.db import models
+from app.services import admin_service, archive_service
+
+from tests.conftest import auth_headers
+
+RANGE = "start_date=2031-01-01&end_date=2031-02-28"
+
+def seed(db, factory):
+    admin = factory.user(is_admin=True, username="admin")
+    course = factory.course()
+    teams = [factory.team(course, members=2) for _ in range(5)]
+    # Several teams per day and per slot, so pages break inside ties on date and slot
+    for offset, day in enumerate((date(2031, 1, 10), date(2031, 1, 31), date(2031, 2, 1), date(2031, 2, 14))):
+        for index, team in enumerate(teams[offset % 2:]):
+            db.add(models.Reservation(
+                team_id=team.id, reservation_date=day, time_slot=list(models.TimeSlot)[index % 2], is_confirmed=index % 2 == 0,
+                participants=[models.ReservationParticipant(user_id=member.user_id) for member in team.members],
+            ))
+    factory.commit()
+    archive_service.archive_closed_months(db, keep_months=0, today=date(2031, 2, 10)) # January goes cold
+    return auth_headers(admin)
+
+def all_items(client, headers):
+    response = client.get(f"/api/admin/reservations?{RANGE}&limit=1000", headers=headers).json()
+    assert response["next_cursor"] is None
+    return response["items"]
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7])
+def test_walking_the_pages_returns_every_reservation_once(client, db, factory, limit):
+    headers = seed(db, factory)
+    expected = all_items(client, headers)
+    assert archive_service.boundary(db) == date(2031, 2, 1)
+    assert len(expected) == db.query(models.Reservation).count() + db.query(models.ArchivedReservation).count()
+    keys = [(item["reservation_date"], item["time_slot"], item["id"]) for item in expected]
+    assert len(set(keys)) == len(keys)
+
+    walked, cursor = [], None
+    while True:
+        url = f"/api/admin/reservations?{RANGE}&limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url, headers=headers).json()
+        assert len(page["items"]) <= limit
+        walked += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert walked == expected
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "é",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    base64.urlsafe_b64encode(b"2031-01-10|MORNING").decode(),
+    base64.urlsafe_b64encode(b"2031-13-10|MORNING|1").decode(),
+    base64.urlsafe_b64encode(b"2031-01-10|BRUNCH|1").decode(),
+    base64.urlsafe_b64encode(b"2031-01-10|MORNING|one").decode(),
+])
+def test_malformed_cursor_is_a_400(client, factory, cursor):
+    admin = factory.user(is_admin=True, username="admin")
+    factory.commit()
+    response = client.get(
+        "/api/admin/reservations", params={"start_date": "2031-01-01", "end_date": "2031-02-28", "cursor": cursor}, headers=auth_headers(admin),
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+
+def test_csv_export_matches_the_rows(client, db, factory, monkeypatch):
+    monkeypatch.setattr(admin_service, "EXPORT_CHUNK_BYTES", 64) # Many chunks
+    headers = seed(db, factory)
+    expected = all_items(client, headers)
+
+    response = client.get(f"/api/admin/reservations/export?{RANGE}&format=csv", headers=headers)
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="reservations_2031-01-01_2031-02-28.csv"' in response.headers["content-disposition"]
+    assert response.text.startswith("﻿")
+    rows = list(csv.reader(io.StringIO(response.text[1:])))
+    assert tuple(rows[0]) == admin_service.CSV_COLUMNS
+    assert rows[1:] == [
+        [
+            str(item["id"]), item["reservation_date"], item["time_slot"], str(item["team_id"]), str(int(item["is_confirmed"])),
+            ";".join(str(p["user"]["id"]) for p in item["participants"]),
+            ";".join(p["user"]["username"] for p in item["participants"]),
+            ";".join(p["user"]["full_name"] or "" for p in item["participants"]),
+        ]
+        for item in expected
+    ]
+
+def test_ndjson_export_matches_the_rows(client, db, factory, monkeypatch):
+    monkeypatch.setattr(admin_service, "EXPORT_CHUNK_BYTES", 64)
+    headers = seed(db, factory)
+    expected = all_items(client, headers)
+
+    response = client.get(f"/api/admin/reservations/export?{RANGE}&format=ndjson", headers=headers)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+def test_export_rejects_a_reversed_range(client, factory):
+    admin = factory.user(is_admin=True, username="admin")
+    factory.commit()
+    response = client.get("/api/admin/reservations/export?start_date=2031-02-01&end_date=2031-01-01", headers=auth_headers(admin))
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+"""The settings registry: validation, defaults and cross-session refresh."""
+import pytest
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.services import settings_service
+from app.services.settings_service import SETTING_DEFINITIONS, SettingsRegistry
+
+from tests.conftest import auth_headers
+
+@pytest.mark.parametrize("raw", ["0", "-1", "abc", "", "2.5"])
+def test_invalid_values_are_rejected(raw):
+    with pytest.raises(ValueError):
+        settings_service.registry.parse("max_concurrent_teams", raw)
+
+def test_values_are_parsed_and_unknown_keys_kept_raw():
+    assert settings_service.registry.parse("max_concurrent_teams", "4") == 4
+    assert settings_service.registry.parse("motd", "hello") == "hello"
+
+def test_missing_or_invalid_rows_fall_back_to_the_default(db, factory):
+    registry = SettingsRegistry(SETTING_DEFINITIONS)
+    default = SETTING_DEFINITIONS["max_concurrent_teams"].default
+    assert registry.get(db, "max_concurrent_teams") == default
+
+    factory.setting("max_concurrent_teams", "zero") # Written around the API's validation
+    factory.commit()
+    registry.refresh(db)
+    assert registry.get(db, "max_concurrent_teams") == default
+
+def test_writes_from_another_session_are_seen_after_the_staleness_window(db, factory, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(settings_service.time, "monotonic", lambda: now[0])
+    factory.setting("max_concurrent_teams", "3")
+    factory.commit()
+    registry = SettingsRegistry(SETTING_DEFINITIONS, staleness_seconds=2.0)
+    assert registry.get(db, "max_concurrent_teams") == 3
+
+    with SessionLocal() as other: # Another worker's write
+        row = other.query(models.SystemSettings).filter_by(key="max_concurrent_teams").one()
+        version = settings_service.next_version(other)
+        row.value, row.version = "5", version
+        other.commit()
+
+    now[0] += 1.9
+    assert registry.get(db, "max_concurrent_teams") == 3 # Still inside the window
+    now[0] += 0.2
+    assert registry.get(db, "max_concurrent_teams") == 5
+    assert registry.version(db) == version
+
+def test_update_setting_validates_and_refreshes(client, db, factory):
+    admin = factory.user(is_admin=True, username="admin")
+    factory.setting("max_concurrent_teams", "3")
+    factory.commit()
+    headers = auth_headers(admin)
+
+    response = client.put("/api/admin/settings", json={"key": "max_concurrent_teams", "value": "0"}, headers=headers)
+    assert response.status_code == 400
+    response = client.put("/api/admin/settings", json={"key": "no_such_setting", "value": "1"}, headers=headers)
+    assert response.status_code == 404
+
+    assert client.put("/api/admin/settings", json={"key": "max_concurrent_teams", "value": "4"}, headers=headers).status_code == 200
+    assert settings_service.registry.get(db, "max_concurrent_teams") == 4 # No staleness wait in the writing process
@@ -0,0 +1,55 @@
+"""Importing the app is free of side effects, and startup stays within a time budget."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LIFESPAN_BUDGET_SECONDS = 2.0
+
+IMPORT_PROBE = """
+import json, os, sys
+import app.main
+print(json.dumps({
+    "modules": sorted(sys.modules),
+    "database_created": os.path.exists(sys.argv[1]),
+}))
+"""
+
+LIFESPAN_PROBE = """
+import json
+from fastapi.testclient import TestClient
+import app.main
+from app.db import migrations
+from app.db.database import engine
+
+application = app.main.create_app()
+with TestClient(application):
+    pass
+print(json.dumps({"seconds": application.state.startup_seconds, "version": migrations.current_version(engine)}))
+"""
+
+def run_probe(probe: str, database: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", probe, str(database)],
+        cwd=ROOT, env=dict(os.environ, DATABASE_URL=f"sqlite:///{database}"),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_has_no_side_effects(tmp_path):
+    database = tmp_path / "import.db"
+    probe = run_probe(IMPORT_PROBE, database)
+    assert not probe["database_created"]
+    for module in ("app.db.database", "app.routers", "app.services", "passlib", "jinja2"):
+        assert module not in probe["modules"], f"import app.main imports {module}"
+
+def test_lifespan_within_budget(tmp_path):
+    from app.db.migrations import MIGRATIONS
+
+    database = tmp_path / "startup.db"
+    for label in ("new", "existing"):
+        probe = run_probe(LIFESPAN_PROBE, database)
+        assert probe["version"] == MIGRATIONS[-1].version
+        assert probe["seconds"] < LIFESPAN_BUDGET_SECONDS, f"{label} database: {probe['seconds']:.2f}s"
@@ -0,0 +1,42 @@
+"""Waitlist positions and promotion through the API."""
+from app.db import models
+
+from tests.conftest import auth_headers, member_ids
+
+DAY = "2031-06-03"
+
+def booking(db, team):
+    return {"reservation_date": DAY, "time_slot": "LUNCH", "team_id": team.id, "participant_ids": member_ids(db, team)}
+
+def headers(db, team):
+    return auth_headers(db.get(models.User, member_ids(db, team)[0]))
+
+def test_queue_positions_and_promotion_on_raised_capacity(client, db, factory):
+    course = factory.course()
+    booked, first, second = (factory.team(course) for _ in range(3))
+    admin = factory.user(is_admin=True, username="admin")
+    factory.setting("max_concurrent_teams", "1")
+    factory.commit()
+
+    assert client.post("/api/student/reservations", json=booking(db, booked), headers=headers(db, booked)).status_code == 200
+    for position, team in enumerate((first, second), start=1):
+        response = client.post("/api/student/waitlist", json=booking(db, team), headers=headers(db, team))
+        assert response.status_code == 201, response.text
+        assert response.json()["status"] == "WAITING" and response.json()["position"] == position
+
+    response = client.put("/api/admin/settings", json={"key": "max_concurrent_teams", "value": "2"}, headers=auth_headers(admin))
+    assert response.json() == {"key": "max_concurrent_teams", "value": "2"}
+
+    [promoted] = client.get("/api/student/waitlist", headers=headers(db, first)).json()
+    assert promoted["status"] == "PROMOTED" and promoted["reservation_id"] is not None
+    [waiting] = client.get("/api/student/waitlist", headers=headers(db, second)).json()
+    assert waiting["status"] == "WAITING" and waiting["position"] == 1
+
+def test_joining_a_slot_with_room_books_it(client, db, factory):
+    course = factory.course()
+    team = factory.team(course)
+    factory.commit()
+
+    response = client.post("/api/student/waitlist", json=booking(db, team), headers=headers(db, team))
+    assert response.status_code == 201
+    assert response.json()["status"] == "PROMOTED" and response.json()["position"] is None